@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+性能基准测试脚本 - 简化版
+测量单只分析、批量分析、数据获取、序列化和HTML报告（单只、整批单页和报告目录）的延迟分位数、吞吐量和峰值内存，
+结果写入JSON，并可与保存的基线对比以发现性能回退
+
+默认使用合成数据源（DATA_SOURCE=synthetic），不依赖网络；
+也可设置DATA_SOURCE=http并启动本地接口替身，测量含网络延迟的场景。
+"""
+
+import os
+import sys
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# 启动用例按用户实际的调用环境运行命令行，只关闭磁盘缓存以便结果可复现
+STARTUP_ENV = dict(os.environ, CACHE_DIR="")
+
+# 在创建DataManager之前设置默认环境：合成数据、仅内存缓存（每个用例可从冷缓存开始）
+os.environ.setdefault("DATA_SOURCE", "synthetic")
+os.environ.setdefault("SYNTHETIC_SIZE", "12000")
+os.environ.setdefault("CACHE_DIR", "")
+
+from src.analysis.value_investing import ValueInvestingAnalyzer, AnalysisResult
+from src.data_sources.data_manager import DataManager
+from src.data_sources.history_store import ValuationHistoryStore
+from src.data_sources.synthetic_source import SyntheticSource
+from src.utils.timing import TimingStats, percentile
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# 命令行导入耗时预算（毫秒，已扣除解释器自身的启动时间），--import-budget-ms可覆盖
+IMPORT_BUDGET_MS = 75.0
+
+
+def peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存（MB），平台不支持时返回None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def summarize(name: str, samples: List[float], ops_per_sample: int = 1,
+              **extra: Any) -> Dict[str, Any]:
+    """
+    汇总一个用例的耗时样本
+
+    Args:
+        name: 用例名称
+        samples: 每个样本的耗时（秒）
+        ops_per_sample: 每个样本包含的操作数，用于计算吞吐量
+        extra: 附加字段
+
+    Returns:
+        用例结果字典，延迟单位为毫秒，吞吐量单位为操作数/秒
+    """
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "name": name,
+        "samples": len(samples),
+        "ops_per_sample": ops_per_sample,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "mean_ms": total / len(samples) * 1000 if samples else 0.0,
+        "throughput": len(samples) * ops_per_sample / total if total else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        **extra
+    }
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """执行fn repeat次，返回每次的耗时（秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def a_symbols(count: int) -> List[str]:
+    """合成股票池中的前count只A股代码"""
+    return [SyntheticSource.a_symbol(index) for index in range(count)]
+
+
+def run_python(args: Sequence[str]) -> float:
+    """在子进程中运行一次Python，返回耗时（秒）"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT, env=STARTUP_ENV, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+# ---- 用例 ----
+
+def bench_startup(repeat: int) -> List[Dict[str, Any]]:
+    """
+    命令行启动：每次在新进程中测量
+
+    startup.import为导入src.cli的耗时，startup.cli_hk为查询一只港股的完整命令耗时，
+    两者均扣除了空解释器启动时间的中位数。
+    """
+    rounds = max(5, repeat)
+    interpreter = percentile(sorted(run_python(["-c", "pass"]) for _ in range(rounds)), 50)
+    imports = [run_python(["-c", "import src.cli"]) - interpreter for _ in range(rounds)]
+    cli = [
+        run_python(["-m", "src.cli", "analyze", "00700", "--market", "HK"]) - interpreter
+        for _ in range(rounds)
+    ]
+    return [summarize("startup.import", imports, interpreter_ms=interpreter * 1000),
+            summarize("startup.cli_hk", cli, interpreter_ms=interpreter * 1000)]
+
+
+def bench_analyze_stock(repeat: int) -> List[Dict[str, Any]]:
+    """单只分析：首次调用（冷缓存）和重复调用（热缓存），股票池预先构建"""
+    analyzer = ValueInvestingAnalyzer()
+    analyzer.data_manager.get_universe("A")
+    symbols = a_symbols(repeat)
+    cold = [timed(lambda s=symbol: analyzer.analyze_stock(s, "A"), 1)[0] for symbol in symbols]
+    warm = [timed(lambda s=symbol: analyzer.analyze_stock(s, "A"), 1)[0] for symbol in symbols]
+    return [summarize("analyze_stock.cold", cold), summarize("analyze_stock.warm", warm)]
+
+
+def bench_batch_analyze(sizes: Sequence[int], repeat: int, workers: int) -> List[Dict[str, Any]]:
+    """
+    批量分析
+
+    cold每次使用新的分析器，包含股票池构建和估值获取；
+    warm复用同一个分析器，只测量缓存命中后的分析开销。
+    """
+    results = []
+    for size in sizes:
+        symbols = a_symbols(size)
+        rounds = max(1, repeat if size <= 1000 else repeat // 3)
+        cold = timed(
+            lambda: ValueInvestingAnalyzer().batch_analyze(symbols, "A", max_workers=workers),
+            rounds
+        )
+        results.append(summarize(f"batch_analyze.{size}.cold", cold, size, workers=workers))
+
+        analyzer = ValueInvestingAnalyzer()
+        analyzer.batch_analyze(symbols, "A", max_workers=workers)
+        warm = timed(lambda: analyzer.batch_analyze(symbols, "A", max_workers=workers), rounds)
+        results.append(summarize(f"batch_analyze.{size}.warm", warm, size, workers=workers))
+    return results
+
+
+def bench_leaderboard(sizes: Sequence[int], repeat: int, workers: int) -> List[Dict[str, Any]]:
+    """排行榜模式的批量分析（只保留前100名），使用热缓存的分析器"""
+    results = []
+    for size in sizes:
+        symbols = a_symbols(size)
+        rounds = max(1, repeat if size <= 1000 else repeat // 3)
+        analyzer = ValueInvestingAnalyzer()
+        analyzer.batch_analyze(symbols, "A", max_workers=workers, top=100)
+        samples = timed(
+            lambda: analyzer.batch_analyze(symbols, "A", max_workers=workers, top=100), rounds
+        )
+        results.append(summarize(f"leaderboard.{size}.top100", samples, size, workers=workers))
+    return results
+
+
+def bench_get_stock_info(count: int) -> List[Dict[str, Any]]:
+    """DataManager.get_stock_info：冷缓存与热缓存"""
+    manager = DataManager()
+    symbols = a_symbols(count)
+    manager.get_universe("A")
+    cold = [timed(lambda s=symbol: manager.get_stock_info(s, "A"), 1)[0] for symbol in symbols]
+    warm = [timed(lambda s=symbol: manager.get_stock_info(s, "A"), 1)[0] for symbol in symbols]
+    return [summarize("get_stock_info.cold", cold), summarize("get_stock_info.warm", warm)]
+
+
+def bench_serialize(results: List[AnalysisResult]) -> List[Dict[str, Any]]:
+    """AnalysisResult.to_dict以及JSON序列化"""
+    to_dict = [timed(result.to_dict, 1)[0] for result in results]
+    to_json = [
+        timed(lambda r=result: json.dumps(r.to_dict(), ensure_ascii=False), 1)[0]
+        for result in results
+    ]
+    return [summarize("to_dict", to_dict), summarize("to_json", to_json)]
+
+
+def bench_html_report(analyzer: ValueInvestingAnalyzer,
+                      results: List[AnalysisResult]) -> List[Dict[str, Any]]:
+    """单只股票HTML报告渲染"""
+    samples = [timed(lambda r=result: analyzer._generate_html_report(r), 1)[0] for result in results]
+    return [summarize("html_report", samples)]
+
+
+def bench_batch_report(size: int, repeat: int) -> List[Dict[str, Any]]:
+    """
+    批量HTML报告：整批结果写成一个页面
+
+    同时记录写出过程中的内存峰值（tracemalloc），逐只写入时应与批次大小基本无关。
+    """
+    analyzer = ValueInvestingAnalyzer()
+    analyzer._timing_stats = TimingStats(max_samples=1)
+    results = analyzer.batch_analyze(a_symbols(size), "A", columnar=True)
+
+    def write() -> None:
+        with tempfile.TemporaryFile("w", encoding="utf-8") as f:
+            analyzer.write_batch_report(results, f)
+
+    tracemalloc.start()
+    try:
+        write()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return [summarize(f"batch_report.{size}", timed(write, repeat), size,
+                      peak_bytes=peak)]
+
+
+def bench_report_directory(size: int, repeat: int) -> List[Dict[str, Any]]:
+    """
+    报告目录：每只股票一份HTML报告
+
+    分别用1个进程和全部CPU核渲染（每次写入空目录），以及结果均未变化时的跳过耗时。
+    """
+    analyzer = ValueInvestingAnalyzer()
+    results = analyzer.batch_analyze(a_symbols(size), "A", columnar=True)
+    cores = os.cpu_count() or 1
+    benchmarks = []
+    for workers in sorted({1, cores}):
+        def render(workers: int = workers) -> None:
+            with tempfile.TemporaryDirectory() as output_dir:
+                analyzer.write_reports(results, output_dir, workers=workers)
+        benchmarks.append(summarize(f"report_directory.{size}.w{workers}",
+                                    timed(render, repeat), size))
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        analyzer.write_reports(results, output_dir, workers=1)
+        benchmarks.append(summarize(
+            f"report_directory.{size}.unchanged",
+            timed(lambda: analyzer.write_reports(results, output_dir, workers=1), repeat), size
+        ))
+    return benchmarks
+
+
+def retained_bytes(fn: Callable[[], Any]) -> Tuple[Any, int]:
+    """执行fn，返回其结果和调用结束后仍被占用的内存（字节）"""
+    tracemalloc.start()
+    try:
+        value = fn()
+        return value, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_result_set(size: int, repeat: int) -> List[Dict[str, Any]]:
+    """
+    批量结果的内存占用：AnalysisResult列表与列式ResultSet
+
+    使用热缓存的分析器，只统计结果本身占用的内存（阶段耗时样本只保留1个，不计入）；
+    同时测量ResultSet的排序和取前100。
+    """
+    analyzer = ValueInvestingAnalyzer()
+    analyzer._timing_stats = TimingStats(max_samples=1)
+    symbols = a_symbols(size)
+    analyzer.batch_analyze(symbols, "A")
+
+    results, list_bytes = retained_bytes(lambda: analyzer.batch_analyze(symbols, "A"))
+    count = len(results)
+    del results
+    result_set, set_bytes = retained_bytes(
+        lambda: analyzer.batch_analyze(symbols, "A", columnar=True)
+    )
+    memory = {"list_bytes_per_result": list_bytes / count,
+              "result_set_bytes_per_result": set_bytes / count}
+    return [
+        summarize(f"result_set.{size}.sort", timed(lambda: result_set.sort("pe"), repeat),
+                  size, **memory),
+        summarize(f"result_set.{size}.top100", timed(lambda: result_set.top(100), repeat),
+                  size, **memory)
+    ]
+
+
+def bench_history_store(count: int, repeat: int) -> List[Dict[str, Any]]:
+    """
+    估值历史存储：写入10年历史、按股票读取区间、读取某日全市场、整批计算3/5/10年分位、追加一个交易日
+
+    历史数据预先生成，写入耗时不含合成数据的生成时间。
+    """
+    source = SyntheticSource(size=max(count, 1), seed=42)
+    symbols = a_symbols(count)
+    histories = [(symbol, source.get_valuation_history(symbol, "A", 10)) for symbol in symbols]
+    snapshot = source.get_valuation_snapshot()
+    per_call = max(20, repeat * 10)
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        store = ValuationHistoryStore(root_dir)
+        backfill = timed(lambda: store.backfill("A", histories), 1)
+        size_bytes = store.stats()["markets"]["A"]["bytes"]
+        del histories
+
+        # 每次追加都须晚于已有日期，依次使用2025年初的工作日
+        append_dates = iter(f"202501{day:02d}" for day in (2, 3, 6, 7, 8, 9, 10, 13, 14, 15,
+                                                            16, 17, 20, 21, 22, 23, 24, 27))
+        results = [
+            summarize(f"history_store.{count}.backfill_10y", backfill, count,
+                      bytes_per_symbol=size_bytes / count),
+            summarize("history_store.range_pe_10y",
+                      timed(lambda: store.get_history(symbols[0], "A", "20150101", fields=["pe"]),
+                            per_call)),
+            summarize("history_store.range_all_10y",
+                      timed(lambda: store.get_history(symbols[0], "A"), per_call)),
+            summarize(f"history_store.{count}.snapshot",
+                      timed(lambda: store.get_snapshot("A", "20241231"), per_call), count),
+            summarize(f"history_store.{count}.percentiles",
+                      timed(lambda: store.percentiles("A", snapshot), repeat), count),
+            summarize(f"history_store.{count}.append",
+                      timed(lambda: store.append("A", next(append_dates), snapshot),
+                            min(repeat, 18)), count)
+        ]
+        store.close()
+    return results
+
+
+def run(sizes: Sequence[int], repeat: int, workers: int,
+        cases: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    运行全部用例
+
+    Args:
+        sizes: 批量分析的批次规模
+        repeat: 每个用例的重复次数（单只类用例为调用次数）
+        workers: 批量分析的并发数
+        cases: 只运行名称包含其中任一子串的用例，None表示全部
+
+    Returns:
+        包含环境信息和各用例结果的字典
+    """
+    def wanted(name: str) -> bool:
+        return not cases or any(case in name for case in cases)
+
+    per_call = max(100, repeat * 20)
+    benchmarks: List[Dict[str, Any]] = []
+
+    if wanted("startup"):
+        benchmarks += bench_startup(repeat)
+    if wanted("analyze_stock"):
+        benchmarks += bench_analyze_stock(per_call)
+    if wanted("batch_analyze"):
+        benchmarks += bench_batch_analyze(sizes, repeat, workers)
+    if wanted("leaderboard"):
+        benchmarks += bench_leaderboard(sizes, repeat, workers)
+    if wanted("get_stock_info"):
+        benchmarks += bench_get_stock_info(per_call)
+    if wanted("result_set"):
+        benchmarks += bench_result_set(max(sizes), repeat)
+    if wanted("batch_report"):
+        benchmarks += bench_batch_report(max(sizes), repeat)
+    if wanted("report_directory"):
+        benchmarks += bench_report_directory(max(sizes), repeat)
+    if wanted("history_store"):
+        # 生成的历史数据全部驻留内存，股票数有上限
+        benchmarks += bench_history_store(min(max(sizes), 300), repeat)
+    if wanted("to_dict") or wanted("to_json") or wanted("html_report"):
+        analyzer = ValueInvestingAnalyzer()
+        results = analyzer.batch_analyze(a_symbols(per_call), "A")
+        if wanted("to_dict") or wanted("to_json"):
+            benchmarks += bench_serialize(results)
+        if wanted("html_report"):
+            benchmarks += bench_html_report(analyzer, results)
+
+    benchmarks = [item for item in benchmarks if wanted(item["name"])]
+    return {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "data_source": os.getenv("DATA_SOURCE"),
+            "synthetic_size": int(os.getenv("SYNTHETIC_SIZE", "0")),
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "workers": workers
+        },
+        "benchmarks": benchmarks
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float) -> List[Dict[str, Any]]:
+    """
+    与基线对比
+
+    p50延迟上升或吞吐量下降超过threshold（比例）的用例视为回退。
+
+    Returns:
+        回退用例列表，包含用例名、指标、基线值和当前值
+    """
+    base = {item["name"]: item for item in baseline.get("benchmarks", [])}
+    regressions = []
+    for item in current["benchmarks"]:
+        reference = base.get(item["name"])
+        if reference is None:
+            continue
+        if reference["p50_ms"] > 0 and item["p50_ms"] > reference["p50_ms"] * (1 + threshold):
+            regressions.append({"name": item["name"], "metric": "p50_ms",
+                                "baseline": reference["p50_ms"], "current": item["p50_ms"]})
+        if reference["throughput"] > 0 and item["throughput"] < reference["throughput"] * (1 - threshold):
+            regressions.append({"name": item["name"], "metric": "throughput",
+                                "baseline": reference["throughput"], "current": item["throughput"]})
+    return regressions
+
+
+def check_import_budget(report: Dict[str, Any], budget_ms: float) -> Optional[float]:
+    """
+    检查命令行导入耗时是否超出预算
+
+    Returns:
+        超出预算时返回startup.import的p50（毫秒），否则返回None
+    """
+    for item in report["benchmarks"]:
+        if item["name"] == "startup.import" and item["p50_ms"] > budget_ms:
+            return item["p50_ms"]
+    return None
+
+
+def print_table(report: Dict[str, Any]) -> None:
+    """以表格形式打印结果"""
+    print(f"{'用例':<28}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'吞吐量(/s)':>14}{'峰值内存(MB)':>14}")
+    print("-" * 86)
+    memory = None
+    report_peaks = []
+    for item in report["benchmarks"]:
+        rss = item["peak_rss_mb"]
+        print(f"{item['name']:<28}{item['p50_ms']:>10.3f}{item['p95_ms']:>10.3f}"
+              f"{item['p99_ms']:>10.3f}{item['throughput']:>14.1f}"
+              f"{'-' if rss is None else f'{rss:.1f}':>14}")
+        if "result_set_bytes_per_result" in item:
+            memory = item
+        if "peak_bytes" in item:
+            report_peaks.append(item)
+    if memory is not None:
+        print(f"\n每个结果占用内存: AnalysisResult列表 {memory['list_bytes_per_result']:.0f}字节，"
+              f"ResultSet {memory['result_set_bytes_per_result']:.0f}字节")
+    for item in report_peaks:
+        print(f"{item['name']} 写出过程内存峰值: {item['peak_bytes'] / 1024:.0f}KB")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="Gems 性能基准测试",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  %(prog)s --save-baseline benchmarks/baseline.json
+  %(prog)s --baseline benchmarks/baseline.json --threshold 0.2
+  %(prog)s --quick --cases batch_analyze
+  %(prog)s --cases startup --import-budget-ms 100
+        """
+    )
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="批量分析的批次规模，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的重复次数")
+    parser.add_argument("--workers", type=int, default=1, help="批量分析的并发数")
+    parser.add_argument("--quick", action="store_true", help="快速模式：最大批次1000，重复1次")
+    parser.add_argument("--cases", help="只运行名称包含这些子串的用例，逗号分隔")
+    parser.add_argument("--output", "-o", default="benchmark_results.json", help="结果文件")
+    parser.add_argument("--baseline", help="对比的基线文件")
+    parser.add_argument("--save-baseline", help="将本次结果另存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="回退阈值，0.2表示变慢超过20%%")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                        help=f"命令行导入耗时预算（毫秒），超出时以非零状态退出，默认{IMPORT_BUDGET_MS:g}")
+
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    repeat = args.repeat
+    if args.quick:
+        sizes = [size for size in sizes if size <= 1000]
+        repeat = 1
+    cases = [case for case in args.cases.split(",") if case] if args.cases else None
+
+    report = run(sizes, repeat, args.workers, cases)
+    print_table(report)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n结果已保存到: {path}")
+
+    failed = False
+    over_budget = check_import_budget(report, args.import_budget_ms)
+    if over_budget is not None:
+        print(f"\n命令行导入耗时超出预算: {over_budget:.1f}ms > {args.import_budget_ms:g}ms")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现{len(regressions)}项性能回退（阈值{args.threshold:.0%}）:")
+            for item in regressions:
+                print(f"  {item['name']} {item['metric']}: "
+                      f"{item['baseline']:.3f} -> {item['current']:.3f}")
+            failed = True
+        else:
+            print(f"\n与基线相比未发现性能回退（阈值{args.threshold:.0%}）")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,25 @@ __version__ = "1.0.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .data_sources import DataManager
-from .analysis import ValueInvestingAnalyzer, AnalysisResult, Recommendation
-from .utils import setup_logger
+from .utils.lazy import lazy_module_attrs
+
+# 导出名 -> 所在模块，首次访问时才导入，避免命令行启动时加载全部子模块
+_LAZY = {
+    "DataManager": ".data_sources.data_manager",
+    "ValueInvestingAnalyzer": ".analysis.value_investing",
+    "AnalysisResult": ".analysis.value_investing",
+    "ResultSet": ".analysis.result_set",
+    "Recommendation": ".analysis.value_investing",
+    "setup_logger": ".utils.logger"
+}
 
 __all__ = [
     "DataManager",
     "ValueInvestingAnalyzer",
     "AnalysisResult",
+    "ResultSet",
     "Recommendation",
     "setup_logger"
-]
\ No newline at end of file
+]
+
+__getattr__, __dir__ = lazy_module_attrs(__name__, _LAZY)
@@ -3,10 +3,35 @@
 提供价值投资分析功能
 """
 
-from .value_investing import ValueInvestingAnalyzer, AnalysisResult, Recommendation
+from ..utils.lazy import lazy_module_attrs
+
+# 导出名 -> 所在模块，首次访问时才导入
+_LAZY = {
+    "ValueInvestingAnalyzer": ".value_investing",
+    "AnalysisResult": ".value_investing",
+    "ResultSet": ".result_set",
+    "Recommendation": ".value_investing",
+    "score_stock": ".scoring",
+    "score_batch": ".scoring",
+    "columns_from_valuations": ".scoring",
+    "decode_recommendations": ".scoring",
+    "parse_screen": ".screener",
+    "screen_universe": ".screener",
+    "ScreenSyntaxError": ".screener"
+}
 
 __all__ = [
     "ValueInvestingAnalyzer",
     "AnalysisResult",
-    "Recommendation"
-]
\ No newline at end of file
+    "ResultSet",
+    "Recommendation",
+    "score_stock",
+    "score_batch",
+    "columns_from_valuations",
+    "decode_recommendations",
+    "parse_screen",
+    "screen_universe",
+    "ScreenSyntaxError"
+]
+
+__getattr__, __dir__ = lazy_module_attrs(__name__, _LAZY)
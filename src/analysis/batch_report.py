@@ -0,0 +1,267 @@
+"""
+批量HTML报告 - 简化版
+将整批分析结果写成一个可排序、分页的HTML页面（汇总表 + 每只股票的详情），
+逐只写入文件，内存占用与股票数无关；样式和脚本只输出一次
+"""
+
+from datetime import datetime
+from html import escape
+from typing import Callable, ContextManager, Iterable, Optional, TextIO
+
+from .report_template import REPORT_CSS, format_percent, percentile_metrics, recommendation_css
+from .result_set import AnalysisResult
+
+# 每页默认显示的股票数
+PAGE_SIZE = 50
+
+_STYLE = REPORT_CSS + """table { border-collapse: collapse; width: 100%; margin-bottom: 10px; }
+th, td { border-bottom: 1px solid #ddd; padding: 6px 8px; text-align: right; }
+th { cursor: pointer; background: #f5f5f5; user-select: none; }
+th.sorted-asc::after { content: " \\25B2"; }
+th.sorted-desc::after { content: " \\25BC"; }
+td.text, th.text { text-align: left; }
+.pager { margin: 10px 0 30px; }
+.pager button { margin-right: 8px; }
+"""
+
+# 排序：数值列按data-v比较，空值排在最后；分页：只把当前页的行和详情留在文档中
+_SCRIPT = """
+(function () {
+  var table = document.getElementById("summary");
+  var body = table.tBodies[0];
+  var rows = Array.prototype.slice.call(body.rows);
+  var details = document.getElementById("details");
+  var info = document.getElementById("page-info");
+  var size = document.getElementById("page-size");
+  var page = 0;
+  var shown = [];
+
+  function render() {
+    var pageSize = parseInt(size.value, 10);
+    var pages = Math.max(1, Math.ceil(rows.length / pageSize));
+    page = Math.max(0, Math.min(page, pages - 1));
+    var visible = rows.slice(page * pageSize, (page + 1) * pageSize);
+
+    var fragment = document.createDocumentFragment();
+    visible.forEach(function (row) { fragment.appendChild(row); });
+    body.textContent = "";
+    body.appendChild(fragment);
+
+    shown.forEach(function (section) { section.hidden = true; });
+    shown = [];
+    visible.forEach(function (row) {
+      var section = document.getElementById("s-" + row.getAttribute("data-key"));
+      if (section) {
+        section.hidden = false;
+        details.appendChild(section);
+        shown.push(section);
+      }
+    });
+    info.textContent = "第 " + (page + 1) + " / " + pages + " 页，共 " + rows.length + " 只";
+  }
+
+  function value(row, index, numeric) {
+    var cell = row.cells[index];
+    if (!numeric) {
+      return cell.textContent;
+    }
+    var text = cell.getAttribute("data-v");
+    return text === "" ? null : parseFloat(text);
+  }
+
+  Array.prototype.forEach.call(table.tHead.rows[0].cells, function (th, index) {
+    th.addEventListener("click", function () {
+      var numeric = !th.classList.contains("text");
+      var descending = !th.classList.contains("sorted-desc");
+      Array.prototype.forEach.call(table.tHead.rows[0].cells, function (other) {
+        other.classList.remove("sorted-asc", "sorted-desc");
+      });
+      th.classList.add(descending ? "sorted-desc" : "sorted-asc");
+      rows.sort(function (a, b) {
+        var x = value(a, index, numeric), y = value(b, index, numeric);
+        if (x === y) { return 0; }
+        if (x === null) { return 1; }
+        if (y === null) { return -1; }
+        var order = numeric ? x - y : x.localeCompare(y);
+        return descending ? -order : order;
+      });
+      page = 0;
+      render();
+    });
+  });
+
+  document.getElementById("page-prev").addEventListener("click", function () { page -= 1; render(); });
+  document.getElementById("page-next").addEventListener("click", function () { page += 1; render(); });
+  size.addEventListener("change", function () { page = 0; render(); });
+  render();
+})();
+"""
+
+_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <style>{style}</style>
+    <noscript><style>.section[hidden] {{ display: block; }}</style></noscript>
+</head>
+<body>
+    <div class="header">
+        <h1>{title}</h1>
+        <p>生成时间: {generated_at}</p>
+    </div>
+
+    <div class="pager">
+        <button id="page-prev" type="button">上一页</button>
+        <button id="page-next" type="button">下一页</button>
+        <select id="page-size">
+            <option value="{page_size}" selected>每页{page_size}只</option>
+            <option value="100">每页100只</option>
+            <option value="500">每页500只</option>
+        </select>
+        <span id="page-info"></span>
+    </div>
+
+    <table id="summary">
+        <thead>
+            <tr>
+                <th>#</th>
+                <th class="text">代码</th>
+                <th class="text">名称</th>
+                <th class="text">市场</th>
+                <th>总体评分</th>
+                <th class="text">建议</th>
+                <th>PE</th>
+                <th>PB</th>
+                <th>股息率(%)</th>
+                <th>PE分位(5年)</th>
+                <th>PB分位(5年)</th>
+                <th>市值</th>
+            </tr>
+        </thead>
+        <tbody>
+"""
+
+_ROW = """            <tr data-key="{key}">
+                <td data-v="{key}">{key}</td>
+                <td class="text"><a href="#s-{key}">{symbol}</a></td>
+                <td class="text">{name}</td>
+                <td class="text">{market}</td>
+                <td data-v="{overall_score}">{overall_score:.1f}</td>
+                <td class="text {css}">{recommendation}</td>
+                <td data-v="{pe}">{pe:.2f}</td>
+                <td data-v="{pb}">{pb:.2f}</td>
+                <td data-v="{dividend_yield}">{dividend_yield:.2f}</td>
+                <td data-v="{pe_percentile_5y_value}">{pe_percentile_5y}</td>
+                <td data-v="{pb_percentile_5y_value}">{pb_percentile_5y}</td>
+                <td data-v="{market_cap}">{market_cap:,.0f}</td>
+            </tr>
+"""
+
+_SECTION = """    <div class="section" id="s-{key}" hidden>
+        <h3>{name} ({symbol}) - {market}股</h3>
+        <p>分析日期: {analysis_date}</p>
+        <p class="{css}">建议: {recommendation}</p>
+        <p class="score">总体评分: {overall_score}/100</p>
+        <div class="metric">PE: {pe:.2f}</div>
+        <div class="metric">PB: {pb:.2f}</div>
+        <div class="metric">PS: {ps:.2f}</div>
+        <div class="metric">股息率: {dividend_yield:.2f}%</div>
+        <div class="metric">市值: {market_cap:,.0f}</div>{percentiles}
+        <h4>推荐理由</h4>
+        <ul>{reasons}</ul>
+        <h4>风险提示</h4>
+        <ul>{risks}</ul>
+    </div>
+"""
+
+_MIDDLE = """        </tbody>
+    </table>
+
+    <div id="details">
+"""
+
+_TAIL = """    </div>
+
+    <div class="section">
+        <h3>免责声明</h3>
+        <p>本报告基于模拟数据生成，仅供参考。实际使用时需要配置真实数据源。</p>
+        <p>股市有风险，投资需谨慎。</p>
+    </div>
+    <script>{script}</script>
+</body>
+</html>
+"""
+
+
+def _data_value(value: float) -> str:
+    # 缺失值输出为空，排序时排在最后
+    return "" if value != value else repr(value)
+
+
+def write_batch_report(results: Iterable[AnalysisResult], file: TextIO,
+                       title: str = "价值投资批量分析报告", page_size: int = PAGE_SIZE,
+                       timed: Optional[Callable[[AnalysisResult], ContextManager]] = None) -> int:
+    """
+    逐只写出批量HTML报告
+
+    汇总表的行直接写入file，详情先写入临时文件，汇总表结束后再整体复制过来，
+    因此只需遍历一次结果，内存中同时只有一只股票的HTML。
+
+    Args:
+        results: 分析结果，可以是生成器
+        file: 输出文件（文本模式）
+        title: 报告标题
+        page_size: 每页默认显示的股票数
+        timed: 返回计时上下文的函数，用于记录每只股票的render耗时
+
+    Returns:
+        写出的股票数
+    """
+    # 临时文件相关模块只在生成报告时导入
+    import shutil
+    import tempfile
+
+    file.write(_HEAD.format(title=escape(title), style=_STYLE, page_size=page_size,
+                            generated_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    count = 0
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as details:
+        for key, result in enumerate(results, 1):
+            if timed is None:
+                _write_result(key, result, file, details)
+            else:
+                with timed(result):
+                    _write_result(key, result, file, details)
+            count = key
+
+        file.write(_MIDDLE)
+        details.seek(0)
+        shutil.copyfileobj(details, file)
+
+    file.write(_TAIL.format(script=_SCRIPT))
+    return count
+
+
+def _write_result(key: int, result: AnalysisResult, table: TextIO, details: TextIO) -> None:
+    css = recommendation_css(result)
+    symbol, name, market = escape(result.symbol), escape(result.name), escape(result.market)
+    table.write(_ROW.format(
+        key=key, symbol=symbol, name=name, market=market, css=css,
+        recommendation=result.recommendation.value, overall_score=result.overall_score,
+        pe=result.pe, pb=result.pb, dividend_yield=result.dividend_yield,
+        market_cap=result.market_cap,
+        pe_percentile_5y=format_percent(result.pe_percentile_5y),
+        pe_percentile_5y_value=_data_value(result.pe_percentile_5y),
+        pb_percentile_5y=format_percent(result.pb_percentile_5y),
+        pb_percentile_5y_value=_data_value(result.pb_percentile_5y)
+    ))
+    details.write(_SECTION.format(
+        key=key, symbol=symbol, name=name, market=market, css=css,
+        analysis_date=escape(result.analysis_date),
+        recommendation=result.recommendation.value, overall_score=result.overall_score,
+        pe=result.pe, pb=result.pb, ps=result.ps, dividend_yield=result.dividend_yield,
+        market_cap=result.market_cap, percentiles=percentile_metrics(result),
+        reasons="".join(f'<li class="reason">{escape(reason)}</li>' for reason in result.reasons),
+        risks="".join(f'<li class="risk">{escape(risk)}</li>' for risk in result.risks)
+    ))
@@ -0,0 +1,135 @@
+"""
+排行榜 - 简化版
+批量分析时只保留排序最靠前的N个结果，内存占用与批次大小无关
+"""
+
+import heapq
+import math
+from typing import Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+from .result_set import AnalysisResult, NUMERIC_FIELDS
+
+# 排序方向
+ASC = "asc"
+DESC = "desc"
+
+
+class SortField(NamedTuple):
+    """排行榜的排序字段"""
+    name: str
+    descending: bool = True
+
+
+class LeaderboardSnapshot(NamedTuple):
+    """排行榜快照"""
+    # 已分析的股票数
+    analyzed: int
+    # 当前排行榜，排名靠前的在前
+    results: List[AnalysisResult]
+    # 是否为整批完成后的最终排行榜
+    final: bool
+
+
+def parse_sort_fields(spec: Union[str, Iterable[Union[str, SortField]]]) -> Tuple[SortField, ...]:
+    """
+    解析排序字段
+
+    Args:
+        spec: 逗号分隔的字符串或字段序列，每项为"字段"或"字段:asc/desc"，
+            默认降序（数值越大越靠前），如 "pe:asc,dividend_yield"
+
+    Returns:
+        排序字段元组
+
+    Raises:
+        ValueError: 字段不是AnalysisResult的数值字段或方向无法识别
+    """
+    items = spec.split(",") if isinstance(spec, str) else spec
+    fields = []
+    for item in items:
+        if isinstance(item, SortField):
+            field = item
+        else:
+            name, _, direction = item.strip().partition(":")
+            direction = direction.strip().lower() or DESC
+            if direction not in (ASC, DESC):
+                raise ValueError(f"排序方向只能是asc或desc: {item}")
+            field = SortField(name.strip(), direction == DESC)
+        if not field.name:
+            continue
+        if field.name not in NUMERIC_FIELDS:
+            raise ValueError(f"不支持的排序字段: {field.name}，可选: {', '.join(NUMERIC_FIELDS)}")
+        fields.append(field)
+    return tuple(fields)
+
+
+class Leaderboard:
+    """
+    有界排行榜
+
+    用大小为N的最小堆保存当前最好的N个结果，堆顶是榜上最差的一个，
+    新结果只需与堆顶比较。先按overall_score降序，再依次按tie_breaks比较，
+    仍相同时先加入的靠前，与batch_analyze排序后取前N的结果一致。
+    """
+
+    def __init__(self, size: int, by: Union[str, SortField] = "overall_score",
+                 tie_breaks: Union[str, Sequence[Union[str, SortField]]] = ()):
+        """
+        初始化排行榜
+
+        Args:
+            size: 保留的结果数
+            by: 主排序字段，默认总体评分（降序）
+            tie_breaks: 主排序字段相同时依次比较的字段，格式见parse_sort_fields
+        """
+        if size < 1:
+            raise ValueError(f"排行榜大小必须大于0: {size}")
+        self.size = size
+        self.fields = parse_sort_fields([by]) + parse_sort_fields(tie_breaks)
+        # 已加入的结果数，同时作为相同排序值时的先后次序
+        self.seen = 0
+        self._heap: List[Tuple[Tuple[float, ...], int, AnalysisResult]] = []
+
+    def _key(self, result: AnalysisResult) -> Tuple[float, ...]:
+        key = []
+        for field in self.fields:
+            value = getattr(result, field.name)
+            if value != value:
+                # 缺失值（NaN）排在最后
+                key.append(-math.inf)
+            else:
+                key.append(value if field.descending else -value)
+        return tuple(key)
+
+    def push(self, result: AnalysisResult) -> bool:
+        """
+        加入一个结果
+
+        Returns:
+            结果是否进入排行榜
+        """
+        self.seen += 1
+        entry = (self._key(result), -self.seen, result)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def extend(self, results: Iterable[AnalysisResult]) -> None:
+        """加入多个结果"""
+        for result in results:
+            self.push(result)
+
+    def results(self) -> List[AnalysisResult]:
+        """当前排行榜，排名靠前的在前"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def snapshot(self, final: bool = False) -> LeaderboardSnapshot:
+        """当前排行榜快照"""
+        return LeaderboardSnapshot(self.seen, self.results(), final)
+
+    def __len__(self) -> int:
+        return len(self._heap)
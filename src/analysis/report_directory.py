@@ -0,0 +1,195 @@
+"""
+报告目录 - 简化版
+把每只股票的HTML报告写入同一目录，渲染分布到多个进程，
+共用的样式文件只写一份；结果未变化且报告仍在时跳过该股票
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .report_template import (CSS_FILENAME, REPORT_CSS, SHARED_ASSETS, TEMPLATE_VERSION,
+                              render_stock_report)
+from .result_set import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# 记录每份报告对应结果指纹的清单文件
+MANIFEST_FILENAME = ".report_manifest.json"
+
+# 每次交给工作进程的报告数，摊薄进程间传递的开销
+DEFAULT_CHUNK_SIZE = 64
+
+_UNSAFE_CHARS = re.compile(r"[^\w.-]")
+
+
+def report_filename(result: AnalysisResult) -> str:
+    """报告文件名：市场_代码.html"""
+    return _UNSAFE_CHARS.sub("_", f"{result.market}_{result.symbol}") + ".html"
+
+
+def report_fingerprint(result: AnalysisResult) -> str:
+    """
+    计算报告内容的指纹
+
+    Args:
+        result: 分析结果，分析日期和阶段耗时不参与计算
+
+    Returns:
+        32位十六进制摘要，结果中任一展示字段或报告模板变化时随之变化
+    """
+    data = result.to_dict()
+    data.pop("analysis_date", None)
+    data.pop("timings", None)
+    payload = json.dumps([data, TEMPLATE_VERSION], sort_keys=True, ensure_ascii=False,
+                         separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _render_chunk(output_dir: str,
+                  items: List[Tuple[str, AnalysisResult]]) -> List[Tuple[str, Optional[str]]]:
+    """
+    渲染并写出一组报告
+
+    Returns:
+        [(文件名, 错误信息)]，成功时错误信息为None
+    """
+    done = []
+    for filename, result in items:
+        try:
+            report = render_stock_report(result, SHARED_ASSETS)
+            with open(os.path.join(output_dir, filename), "w", encoding="utf-8") as f:
+                f.write(report)
+            done.append((filename, None))
+        except Exception as e:
+            done.append((filename, str(e)))
+    return done
+
+
+def _load_manifest(output_dir: str) -> Dict[str, str]:
+    path = os.path.join(output_dir, MANIFEST_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取报告清单失败，全部重新生成: {e}")
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _save_manifest(output_dir: str, manifest: Dict[str, str]) -> None:
+    # 先写临时文件再替换，中断时不会留下不完整的清单
+    path = os.path.join(output_dir, MANIFEST_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, sort_keys=True, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _write_assets(output_dir: str) -> None:
+    """写出共用的样式文件，内容未变化时不改写"""
+    path = os.path.join(output_dir, CSS_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == REPORT_CSS:
+                return
+    except FileNotFoundError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(REPORT_CSS)
+
+
+def write_report_directory(results: Iterable[AnalysisResult], output_dir: str,
+                           workers: Optional[int] = None, force: bool = False,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    为每只股票生成一份HTML报告，写入output_dir
+
+    每份报告的结果指纹记录在目录中的清单里，指纹相同且文件仍在时跳过。
+    渲染由进程池完成，同时在途的分组不超过2 * workers个，
+    results可以是生成器，内存占用与股票数无关。
+
+    Args:
+        results: 分析结果
+        output_dir: 报告目录，不存在时自动创建
+        workers: 渲染进程数，默认CPU核数，1表示在当前进程中渲染
+        force: 为True时不比较指纹，全部重新生成
+        chunk_size: 每次交给工作进程的报告数
+
+    Returns:
+        包含rendered（已生成）、skipped（未变化而跳过）和failed（失败）数量的字典
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"渲染进程数必须大于0: {workers}")
+    if chunk_size < 1:
+        raise ValueError(f"分组大小必须大于0: {chunk_size}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    _write_assets(output_dir)
+    manifest = _load_manifest(output_dir)
+    stats = {"rendered": 0, "skipped": 0, "failed": 0}
+    # 已提交渲染的文件名 -> 结果指纹
+    pending: Dict[str, str] = {}
+
+    def _chunks() -> Iterator[List[Tuple[str, AnalysisResult]]]:
+        chunk = []
+        for result in results:
+            filename = report_filename(result)
+            fingerprint = report_fingerprint(result)
+            if filename in pending or (
+                    not force and manifest.get(filename) == fingerprint
+                    and os.path.exists(os.path.join(output_dir, filename))):
+                stats["skipped"] += 1
+                continue
+            pending[filename] = fingerprint
+            chunk.append((filename, result))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _collect(done: List[Tuple[str, Optional[str]]]) -> None:
+        for filename, error in done:
+            fingerprint = pending.pop(filename)
+            if error is None:
+                manifest[filename] = fingerprint
+                stats["rendered"] += 1
+            else:
+                logger.error(f"生成报告{filename}失败: {error}")
+                manifest.pop(filename, None)
+                stats["failed"] += 1
+
+    try:
+        if workers == 1:
+            for chunk in _chunks():
+                _collect(_render_chunk(output_dir, chunk))
+        else:
+            # 渲染以CPU为主，用进程池绕开GIL；只渲染一个进程时无需导入进程池。
+            # 结果可能来自仍在运行的分析线程，用spawn启动工作进程，避免fork时复制其他线程持有的锁
+            import multiprocessing
+            from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                in_flight = set()
+                for chunk in _chunks():
+                    in_flight.add(executor.submit(_render_chunk, output_dir, chunk))
+                    if len(in_flight) >= workers * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            _collect(future.result())
+                for future in in_flight:
+                    _collect(future.result())
+    finally:
+        _save_manifest(output_dir, manifest)
+
+    logger.info(f"报告目录{output_dir}: 生成{stats['rendered']}份，跳过{stats['skipped']}份，"
+                f"失败{stats['failed']}份")
+    return stats
@@ -0,0 +1,146 @@
+"""
+HTML报告模板 - 简化版
+单只股票报告和批量报告共用的模板、样式和格式化函数；
+样式可以内联，也可以引用多份报告共用的样式文件
+"""
+
+import hashlib
+from html import escape
+from operator import attrgetter, eq
+
+from .result_set import AnalysisResult, PERCENTILE_METRICS, PERCENTILE_WINDOWS
+
+# 所有HTML报告共用的样式
+REPORT_CSS = """
+body { font-family: Arial, sans-serif; margin: 40px; }
+.header { text-align: center; margin-bottom: 30px; }
+.section { margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; border-radius: 5px; }
+.metric { display: inline-block; margin-right: 20px; margin-bottom: 10px; }
+.score { font-size: 24px; font-weight: bold; }
+.buy { color: green; font-weight: bold; }
+.sell { color: red; font-weight: bold; }
+.hold { color: orange; font-weight: bold; }
+.reason { color: green; }
+.risk { color: red; }
+"""
+
+# 报告目录中共用样式文件的文件名
+CSS_FILENAME = "report.css"
+
+# 单只股票报告HTML结构的版本，修改render_stock_report的输出时递增
+REPORT_VERSION = 2
+
+# 报告结构和样式的摘要，任一变化时已生成的报告都需要重新渲染
+TEMPLATE_VERSION = hashlib.blake2b(f"{REPORT_VERSION}:{REPORT_CSS}".encode("utf-8"),
+                                   digest_size=8).hexdigest()
+
+INLINE_ASSETS = f"<style>{REPORT_CSS}</style>"
+SHARED_ASSETS = f'<link rel="stylesheet" href="{CSS_FILENAME}">'
+
+
+def recommendation_css(result: AnalysisResult) -> str:
+    """投资建议对应的样式类：买入类为buy，卖出类为sell，其余为hold"""
+    value = result.recommendation.value
+    if value in ("强烈买入", "买入"):
+        return "buy"
+    if value in ("强烈卖出", "卖出"):
+        return "sell"
+    return "hold"
+
+
+def format_percent(value: float) -> str:
+    """格式化历史分位，缺失（NaN）时为"-" """
+    return "-" if value != value else f"{value:.1f}%"
+
+
+# (指标名称, 读取该指标各窗口分位的函数)
+_PERCENTILE_GETTERS = tuple(
+    (label, attrgetter(*(f"{prefix}_percentile_{years}y" for years in PERCENTILE_WINDOWS)))
+    for prefix, label in PERCENTILE_METRICS
+)
+_WINDOWS_LABEL = "/".join(map(str, PERCENTILE_WINDOWS))
+
+
+def percentile_metrics(result: AnalysisResult) -> str:
+    """
+    历史估值分位的HTML片段，接在估值指标之后另起一行
+
+    没有任何分位的指标不输出，全部缺失时返回空字符串。
+    """
+    metrics = []
+    for label, getter in _PERCENTILE_GETTERS:
+        values = getter(result)
+        # NaN与自身不相等，全部缺失时跳过
+        if any(map(eq, values, values)):
+            metrics.append(f'<div class="metric">{label}分位({_WINDOWS_LABEL}年): '
+                           f'{" / ".join(map(format_percent, values))}</div>')
+    if not metrics:
+        return ""
+    return f'\n        <div>{"".join(metrics)}</div>'
+
+
+def render_stock_report(result: AnalysisResult, assets: str = INLINE_ASSETS) -> str:
+    """
+    渲染单只股票的HTML报告
+
+    Args:
+        result: 分析结果
+        assets: 放在<head>中的样式，默认内联；报告目录中使用SHARED_ASSETS引用共用样式文件
+
+    Returns:
+        HTML文本
+    """
+    name, symbol, market = escape(result.name), escape(result.symbol), escape(result.market)
+    reasons = "".join(f'<li class="reason">{escape(reason)}</li>' for reason in result.reasons)
+    risks = "".join(f'<li class="risk">{escape(risk)}</li>' for risk in result.risks)
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>价值投资分析报告 - {name} ({symbol})</title>
+    {assets}
+</head>
+<body>
+    <div class="header">
+        <h1>价值投资分析报告</h1>
+        <h2>{name} ({symbol}) - {market}股</h2>
+        <p>分析日期: {escape(result.analysis_date)}</p>
+    </div>
+
+    <div class="section">
+        <h3>投资建议</h3>
+        <p class="{recommendation_css(result)}">建议: {result.recommendation.value}</p>
+        <p class="score">总体评分: {result.overall_score}/100</p>
+    </div>
+
+    <div class="section">
+        <h3>估值指标</h3>
+        <div class="metric">PE: {result.pe:.2f}</div>
+        <div class="metric">PB: {result.pb:.2f}</div>
+        <div class="metric">PS: {result.ps:.2f}</div>
+        <div class="metric">股息率: {result.dividend_yield:.2f}%</div>
+        <div class="metric">市值: {result.market_cap:,.0f}</div>{percentile_metrics(result)}
+    </div>
+
+    <div class="section">
+        <h3>推荐理由</h3>
+        <ul>
+            {reasons}
+        </ul>
+    </div>
+
+    <div class="section">
+        <h3>风险提示</h3>
+        <ul>
+            {risks}
+        </ul>
+    </div>
+
+    <div class="section">
+        <h3>免责声明</h3>
+        <p>本报告基于模拟数据生成，仅供参考。实际使用时需要配置真实数据源。</p>
+        <p>股市有风险，投资需谨慎。</p>
+    </div>
+</body>
+</html>
+"""
@@ -0,0 +1,479 @@
+"""
+分析结果 - 简化版
+单只股票的分析结果，以及按列存储大批量结果的结果集
+"""
+
+import heapq
+import sys
+from array import array
+from dataclasses import dataclass, fields
+from itertools import repeat
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence,
+                    Union)
+
+from ..data_sources.universe import Categorical, ColumnView, Rows
+from .scoring import RECOMMENDATION_CODES, Recommendation, decode_recommendations
+
+# dataclass的slots参数需要Python 3.10，更早的版本退回普通实例字典
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+_NAN = float("nan")
+
+# 历史分位字段：(指标, 显示名称)，窗口为近3/5/10年
+PERCENTILE_METRICS = (("pe", "PE"), ("pb", "PB"), ("dividend_yield", "股息率"))
+PERCENTILE_WINDOWS = (3, 5, 10)
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class AnalysisResult:
+    """分析结果数据类，Python 3.10及以上使用__slots__存储字段"""
+    symbol: str
+    market: str
+    name: str
+    analysis_date: str
+
+    # 估值指标
+    pe: float
+    pb: float
+    ps: float
+    dividend_yield: float
+    market_cap: float
+
+    # 财务指标（简化版使用默认值）
+    roe: float = 15.0
+    roa: float = 5.0
+    gross_margin: float = 30.0
+    net_margin: float = 15.0
+    debt_ratio: float = 40.0
+    current_ratio: float = 2.0
+
+    # 成长性指标（简化版使用默认值）
+    revenue_growth: float = 10.0
+    net_income_growth: float = 15.0
+    equity_growth: float = 8.0
+
+    # 当前估值在近3/5/10年估值历史中的分位（0~100），没有足够的估值历史时为NaN
+    pe_percentile_3y: float = _NAN
+    pe_percentile_5y: float = _NAN
+    pe_percentile_10y: float = _NAN
+    pb_percentile_3y: float = _NAN
+    pb_percentile_5y: float = _NAN
+    pb_percentile_10y: float = _NAN
+    dividend_yield_percentile_3y: float = _NAN
+    dividend_yield_percentile_5y: float = _NAN
+    dividend_yield_percentile_10y: float = _NAN
+
+    # 分析结果
+    valuation_score: float = 75.0
+    financial_score: float = 80.0
+    growth_score: float = 70.0
+    overall_score: float = 75.0
+
+    recommendation: Recommendation = Recommendation.HOLD
+    reasons: List[str] = None
+    risks: List[str] = None
+
+    # 各阶段耗时（毫秒），分析器开启record_timings时填充
+    timings: Optional[Dict[str, float]] = None
+
+    def __post_init__(self):
+        """初始化后处理"""
+        if self.reasons is None:
+            self.reasons = []
+        if self.risks is None:
+            self.risks = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "symbol": self.symbol,
+            "market": self.market,
+            "name": self.name,
+            "analysis_date": self.analysis_date,
+            "valuation": {
+                "pe": self.pe,
+                "pb": self.pb,
+                "ps": self.ps,
+                "dividend_yield": self.dividend_yield,
+                "market_cap": self.market_cap
+            },
+            "financial": {
+                "roe": self.roe,
+                "roa": self.roa,
+                "gross_margin": self.gross_margin,
+                "net_margin": self.net_margin,
+                "debt_ratio": self.debt_ratio,
+                "current_ratio": self.current_ratio
+            },
+            "growth": {
+                "revenue_growth": self.revenue_growth,
+                "net_income_growth": self.net_income_growth,
+                "equity_growth": self.equity_growth
+            },
+            # NaN不是合法的JSON，缺失的分位输出为null
+            "percentiles": {
+                name: None if value != value else value
+                for name, value in self.percentiles().items()
+            },
+            "scores": {
+                "valuation_score": self.valuation_score,
+                "financial_score": self.financial_score,
+                "growth_score": self.growth_score,
+                "overall_score": self.overall_score
+            },
+            "recommendation": self.recommendation.value,
+            "reasons": self.reasons,
+            "risks": self.risks,
+            **({"timings": self.timings} if self.timings is not None else {})
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "AnalysisResult":
+        """从to_dict的结果还原分析结果"""
+        values: Dict[str, Any] = {}
+        for group in ("valuation", "financial", "growth", "scores"):
+            values.update(data.get(group, {}))
+        for name, value in data.get("percentiles", {}).items():
+            values[name] = _NAN if value is None else value
+        return cls(
+            symbol=data["symbol"],
+            market=data["market"],
+            name=data["name"],
+            analysis_date=data["analysis_date"],
+            recommendation=Recommendation(data["recommendation"]),
+            reasons=list(data.get("reasons", [])),
+            risks=list(data.get("risks", [])),
+            timings=data.get("timings"),
+            **values
+        )
+
+    def percentiles(self) -> Dict[str, float]:
+        """历史分位字段名到取值的映射"""
+        return {name: getattr(self, name) for name in PERCENTILE_FIELDS}
+
+    def _percentile_summary(self) -> str:
+        """历史分位的摘要段落，全部缺失时为空字符串"""
+        if all(value != value for value in self.percentiles().values()):
+            return ""
+        lines = ["", "", "历史估值分位（近3年 / 5年 / 10年）:"]
+        for metric, label in PERCENTILE_METRICS:
+            values = [getattr(self, f"{metric}_percentile_{years}y") for years in PERCENTILE_WINDOWS]
+            lines.append(f"  {label}: " + " / ".join(
+                "-" if value != value else f"{value:.1f}%" for value in values
+            ))
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        """生成摘要"""
+        return f"""
+股票: {self.name} ({self.symbol})
+市场: {self.market}
+分析日期: {self.analysis_date}
+
+估值指标:
+  PE: {self.pe:.2f}, PB: {self.pb:.2f}, PS: {self.ps:.2f}
+  股息率: {self.dividend_yield:.2f}%, 市值: {self.market_cap:,.0f}
+
+财务指标:
+  ROE: {self.roe:.2f}%, ROA: {self.roa:.2f}%
+  毛利率: {self.gross_margin:.2f}%, 净利率: {self.net_margin:.2f}%
+  负债率: {self.debt_ratio:.2f}%, 流动比率: {self.current_ratio:.2f}
+
+成长性指标:
+  营收增长率: {self.revenue_growth:.2f}%
+  净利润增长率: {self.net_income_growth:.2f}%
+  净资产增长率: {self.equity_growth:.2f}%{self._percentile_summary()}
+
+综合评分:
+  估值评分: {self.valuation_score:.1f}/100
+  财务评分: {self.financial_score:.1f}/100
+  成长评分: {self.growth_score:.1f}/100
+  总体评分: {self.overall_score:.1f}/100
+
+投资建议: {self.recommendation.value}
+        """.strip()
+
+
+# 结果集的列划分：文本列逐行保存；分类列和理由/风险列只保存一次取值，行内存放编码
+TEXT_FIELDS = ("symbol", "name")
+CATEGORY_FIELDS = ("market", "analysis_date")
+LIST_FIELDS = ("reasons", "risks")
+# 估值、财务、成长、历史分位和评分字段，存放在数值数组中
+NUMERIC_FIELDS = tuple(field.name for field in fields(AnalysisResult) if field.type is float)
+PERCENTILE_FIELDS = tuple(f"{metric}_percentile_{years}y"
+                          for metric, _ in PERCENTILE_METRICS for years in PERCENTILE_WINDOWS)
+
+_RECOMMENDATION_INDEX = {rec: code for code, rec in enumerate(RECOMMENDATION_CODES)}
+
+
+class _ConstantColumn:
+    """取值全部相同的数值列：只保存一个值，出现不同取值时由_ResultColumns展开为数组"""
+
+    __slots__ = ("value", "length")
+
+    def __init__(self):
+        self.value: Union[int, float, None] = None
+        self.length = 0
+
+    def accepts(self, value: Union[int, float]) -> bool:
+        if self.length == 0:
+            return True
+        if type(value) is not type(self.value):
+            return False
+        # 缺失值（NaN）彼此视为相同
+        return value == self.value or (value != value and self.value != self.value)
+
+    def append(self, value: Union[int, float]) -> None:
+        self.value = value
+        self.length += 1
+
+    def __getitem__(self, row: int) -> Union[int, float]:
+        if not -self.length <= row < self.length:
+            raise IndexError("列下标越界")
+        return self.value
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Union[int, float]]:
+        return repeat(self.value, self.length)
+
+
+def _is_int64(value: Any) -> bool:
+    return type(value) is int and -2**63 <= value < 2**63
+
+
+class _ResultColumns:
+    """结果集底层列存储，多个ResultSet视图共享"""
+
+    __slots__ = ("text", "categorical", "lists", "numeric", "recommendation", "timings")
+
+    def __init__(self):
+        self.text: Dict[str, List[str]] = {name: [] for name in TEXT_FIELDS}
+        self.categorical: Dict[str, Categorical] = {name: Categorical() for name in CATEGORY_FIELDS}
+        # 理由和风险以字符串元组为取值，相同的组合只保存一份
+        self.lists: Dict[str, Categorical] = {name: Categorical() for name in LIST_FIELDS}
+        # 数值列先按常量列保存（简化版的财务、成长和分项评分均为固定值），
+        # 出现不同取值后展开为数组：全部为整数时使用array('q')，出现小数后整列转为array('d')，
+        # 以便还原出的结果与原结果序列化一致（如整数市值）
+        self.numeric: Dict[str, Union[_ConstantColumn, array]] = {
+            name: _ConstantColumn() for name in NUMERIC_FIELDS
+        }
+        self.recommendation = array("b")
+        # 只有附加了阶段耗时的行才保存，行号 -> 耗时字典
+        self.timings: Dict[int, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.recommendation)
+
+    def append(self, result: AnalysisResult) -> None:
+        row = len(self)
+        for name, values in self.text.items():
+            values.append(getattr(result, name))
+        for name, column in self.categorical.items():
+            column.append(getattr(result, name))
+        for name, column in self.lists.items():
+            column.append(tuple(getattr(result, name)))
+        for name, column in self.numeric.items():
+            value = getattr(result, name)
+            if isinstance(column, _ConstantColumn):
+                if column.accepts(value):
+                    column.append(value)
+                    continue
+                typecode = "q" if _is_int64(column.value) and _is_int64(value) else "d"
+                column = self.numeric[name] = array(typecode, column)
+            elif column.typecode == "q" and not _is_int64(value):
+                column = self.numeric[name] = array("d", column)
+            column.append(value)
+        self.recommendation.append(_RECOMMENDATION_INDEX[result.recommendation])
+        if result.timings is not None:
+            self.timings[row] = dict(result.timings)
+
+    def column(self, name: str) -> Sequence:
+        if name in self.numeric:
+            return self.numeric[name]
+        if name in self.text:
+            return self.text[name]
+        if name in self.categorical:
+            return self.categorical[name]
+        if name == "recommendation":
+            return self.recommendation
+        raise KeyError(f"结果集没有该列: {name}")
+
+    def result(self, row: int) -> AnalysisResult:
+        values: Dict[str, Any] = {name: column[row] for name, column in self.text.items()}
+        for name, column in self.categorical.items():
+            values[name] = column[row]
+        for name, column in self.lists.items():
+            values[name] = list(column[row])
+        for name, column in self.numeric.items():
+            values[name] = column[row]
+        timings = self.timings.get(row)
+        return AnalysisResult(
+            recommendation=RECOMMENDATION_CODES[self.recommendation[row]],
+            timings=None if timings is None else dict(timings),
+            **values
+        )
+
+
+class ResultSet(Sequence):
+    """
+    列式分析结果集
+
+    数值字段存放在数组中，建议存为整数编码，理由和风险的相同组合只保存一次。
+    排序、过滤和取前K只生成新的行号选择，按位置访问时才构造AnalysisResult。
+    """
+
+    __slots__ = ("_store", "_rows")
+
+    def __init__(self, results: Iterable[AnalysisResult] = (), *,
+                 _store: Optional[_ResultColumns] = None, _rows: Optional[Rows] = None):
+        """
+        初始化结果集
+
+        Args:
+            results: 分析结果序列，逐个转为列存储，不保留原对象
+        """
+        self._store = _store if _store is not None else _ResultColumns()
+        self._rows: Rows = _rows if _rows is not None else range(len(self._store))
+        self.extend(results)
+
+    def _view(self, rows: Rows) -> "ResultSet":
+        return ResultSet(_store=self._store, _rows=rows)
+
+    def _is_full(self) -> bool:
+        rows = self._rows
+        return (isinstance(rows, range) and rows.start == 0 and rows.step == 1
+                and rows.stop == len(self._store))
+
+    # ---- 构建 ----
+
+    def append(self, result: AnalysisResult) -> None:
+        """追加一个分析结果，只能对未经排序或过滤的完整结果集调用"""
+        if not self._is_full():
+            raise ValueError("只能向完整结果集追加，排序或过滤得到的视图是只读的")
+        self._store.append(result)
+        self._rows = range(len(self._store))
+
+    def extend(self, results: Iterable[AnalysisResult]) -> None:
+        """追加多个分析结果"""
+        for result in results:
+            self.append(result)
+
+    # ---- 访问 ----
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[AnalysisResult, "ResultSet"]:
+        """
+        按位置访问
+
+        整数位置返回新构造的AnalysisResult，修改它不会影响结果集；
+        切片返回共享底层列的结果集视图。
+        """
+        if isinstance(key, slice):
+            return self._view(self._rows[key])
+        return self._store.result(self._rows[key])
+
+    def __iter__(self) -> Iterator[AnalysisResult]:
+        store = self._store
+        for row in self._rows:
+            yield store.result(row)
+
+    def __repr__(self) -> str:
+        return f"ResultSet(rows={len(self)})"
+
+    def column(self, name: str) -> Sequence:
+        """
+        获取列视图，不构造AnalysisResult
+
+        Args:
+            name: 字段名；recommendation返回建议编码，可用decode_recommendations转换
+
+        Returns:
+            完整结果集返回底层列本身，视图返回不复制数据的ColumnView
+        """
+        base = self._store.column(name)
+        if self._is_full():
+            return base
+        return ColumnView(base, self._rows)
+
+    def symbols(self) -> List[str]:
+        """股票代码列表"""
+        return list(self.column("symbol"))
+
+    def recommendations(self) -> List[Recommendation]:
+        """投资建议列表"""
+        return decode_recommendations(self.column("recommendation"))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """转换为字典列表，与逐个调用AnalysisResult.to_dict一致"""
+        return [result.to_dict() for result in self]
+
+    # ---- 排序与过滤 ----
+
+    def _key(self, by: str) -> Callable[[int], Any]:
+        column = self.column(by)
+        return column.__getitem__
+
+    def sort(self, by: str = "overall_score", reverse: bool = True) -> "ResultSet":
+        """
+        按字段排序，返回新的结果集视图
+
+        排序是稳定的，取值相同的结果保持原有顺序。
+
+        Args:
+            by: 排序字段，默认总体评分
+            reverse: 是否降序
+        """
+        order = sorted(range(len(self)), key=self._key(by), reverse=reverse)
+        rows = self._rows
+        return self._view(array("l", (rows[p] for p in order)))
+
+    def top(self, k: int, by: str = "overall_score") -> "ResultSet":
+        """
+        取字段值最大的k个结果，不对整个结果集排序
+
+        结果与sort(by)[:k]一致，取值相同时位置靠前的优先。
+
+        Args:
+            k: 数量
+            by: 比较字段，默认总体评分
+        """
+        order = heapq.nlargest(k, range(len(self)), key=self._key(by))
+        rows = self._rows
+        return self._view(array("l", (rows[p] for p in order)))
+
+    def filter(self, mask: Union[Sequence[bool], Callable[[AnalysisResult], bool]]) -> "ResultSet":
+        """
+        过滤结果
+
+        Args:
+            mask: 与结果集等长的布尔序列（可由column()计算），
+                或接收AnalysisResult返回布尔值的函数（需逐个构造结果，较慢）
+
+        Returns:
+            新的结果集视图
+        """
+        rows = self._rows
+        if callable(mask):
+            store = self._store
+            return self._view(array("l", (row for row in rows if mask(store.result(row)))))
+        if len(mask) != len(self):
+            raise ValueError(f"过滤掩码长度{len(mask)}与结果集行数{len(self)}不一致")
+        return self._view(array("l", (row for row, keep in zip(rows, mask) if keep)))
+
+    def where(self, recommendations: Iterable[Recommendation]) -> "ResultSet":
+        """
+        按投资建议过滤，只比较整数编码
+
+        Args:
+            recommendations: 要保留的投资建议
+
+        Returns:
+            新的结果集视图
+        """
+        wanted = {_RECOMMENDATION_INDEX[rec] for rec in recommendations}
+        codes = self._store.recommendation
+        return self._view(array("l", (row for row in self._rows if codes[row] in wanted)))
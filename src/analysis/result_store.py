@@ -0,0 +1,165 @@
+"""
+分析结果存储 - 无依赖版
+基于SQLite（WAL模式）持久化分析结果及其输入指纹，
+输入未变化时直接沿用上次的结果，用于增量分析
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from .result_set import AnalysisResult
+from .scoring import scoring_config
+
+logger = logging.getLogger(__name__)
+
+# 评分配置的规范化JSON，参与每个输入指纹的计算
+_SCORING_CONFIG = json.dumps(scoring_config(), sort_keys=True, separators=(",", ":"))
+
+
+def input_fingerprint(stock_info: Mapping[str, Any]) -> str:
+    """
+    计算分析输入的指纹
+
+    Args:
+        stock_info: DataManager.get_stock_info的返回值，只使用basic_info、valuation和
+            percentiles，其中的获取时间等字段不参与计算
+
+    Returns:
+        32位十六进制摘要，基本信息、估值、历史分位或评分配置任一变化时随之变化
+    """
+    payload = json.dumps(
+        [stock_info.get("basic_info", {}), stock_info.get("valuation", {}),
+         stock_info.get("percentiles", {}), _SCORING_CONFIG],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResultStore:
+    """
+    分析结果存储
+
+    每只股票保存最近一次的分析结果和输入指纹，可供多个进程同时读写。
+    """
+
+    def __init__(self, store_dir: str, filename: str = "gems_results.sqlite3",
+                 timeout: float = 5.0):
+        """
+        初始化结果存储
+
+        Args:
+            store_dir: 存储目录，不存在时自动创建
+            filename: 数据库文件名
+            timeout: 等待其他进程写锁的超时时间（秒）
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        self.path = os.path.join(store_dir, filename)
+        self.timeout = timeout
+        self._local = threading.local()
+
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " market TEXT NOT NULL,"
+                " symbol TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (market, symbol))"
+            )
+
+    @classmethod
+    def from_env(cls) -> "ResultStore":
+        """按RESULT_STORE_DIR创建，未设置时使用CACHE_DIR，两者均为空时使用.cache"""
+        store_dir = os.getenv("RESULT_STORE_DIR") or os.getenv("CACHE_DIR") or ".cache"
+        return cls(store_dir)
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接，sqlite3连接不能跨线程共享"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   isolation_level=None)
+            # WAL模式下读写互不阻塞，适合多个CLI进程并发访问
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, symbol: str, market: str, fingerprint: str) -> Optional[AnalysisResult]:
+        """
+        读取输入指纹相同的已保存结果
+
+        Args:
+            symbol: 股票代码
+            market: 市场类型
+            fingerprint: 本次输入的指纹
+
+        Returns:
+            已保存的分析结果，不存在或输入已变化时返回None
+        """
+        row = self._connect().execute(
+            "SELECT fingerprint, result FROM results WHERE market = ? AND symbol = ?",
+            (market, symbol)
+        ).fetchone()
+        hit = row is not None and row[0] == fingerprint
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not hit:
+            return None
+        return AnalysisResult.from_dict(json.loads(row[1]))
+
+    def put(self, result: AnalysisResult, fingerprint: str) -> None:
+        """
+        保存分析结果，替换该股票之前的结果
+
+        Args:
+            result: 分析结果，不保存其中的阶段耗时
+            fingerprint: 产生该结果的输入指纹
+        """
+        data = result.to_dict()
+        data.pop("timings", None)
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (market, symbol, fingerprint, result, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (result.market, result.symbol, fingerprint, payload, time.time())
+            )
+
+    def clear(self) -> None:
+        """清空全部结果"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取存储统计
+
+        Returns:
+            包含数据库路径、结果数和本进程命中情况的字典
+        """
+        size = self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "path": self.path,
+                "size": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
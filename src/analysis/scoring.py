@@ -0,0 +1,206 @@
+"""
+评分引擎 - 简化版
+单只股票评分与整列批量评分共用同一张评分档位表，保证两条路径结果一致
+"""
+
+from array import array
+from bisect import bisect_right
+from enum import Enum
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Sequence, Tuple
+
+
+class Recommendation(Enum):
+    """投资建议枚举"""
+    STRONG_BUY = "强烈买入"
+    BUY = "买入"
+    HOLD = "持有"
+    SELL = "卖出"
+    STRONG_SELL = "强烈卖出"
+
+
+# 建议编码：批量评分结果中用整数表示建议，编码即枚举定义顺序
+RECOMMENDATION_CODES: Tuple[Recommendation, ...] = tuple(Recommendation)
+_RECOMMENDATION_INDEX = {rec: code for code, rec in enumerate(RECOMMENDATION_CODES)}
+
+
+class ScoreTier(NamedTuple):
+    """评分档位"""
+    pe_max: float
+    pb_max: float
+    overall_score: float
+    recommendation: Recommendation
+    reasons: Tuple[str, ...]
+    risks: Tuple[str, ...]
+
+
+# 按顺序匹配，第一个满足 pe < pe_max 且 pb < pb_max 的档位生效
+SCORE_TIERS: Tuple[ScoreTier, ...] = (
+    ScoreTier(15, 1.5, 85.0, Recommendation.STRONG_BUY,
+              ("估值较低，具备投资价值",), ("需关注公司基本面变化",)),
+    ScoreTier(20, 2.0, 75.0, Recommendation.BUY,
+              ("估值合理，可以考虑投资",), ("注意市场波动风险",)),
+    ScoreTier(30, 3.0, 65.0, Recommendation.HOLD,
+              ("估值适中，建议持有观察",), ("估值偏高，存在回调风险",)),
+    ScoreTier(float("inf"), float("inf"), 45.0, Recommendation.SELL,
+              ("估值偏高，建议谨慎",), ("估值过高，存在较大下跌风险",)),
+)
+
+# 档位上限逐档递增时，估值所属档位 = max(pe所在区间, pb所在区间)，可按整列二分查找
+_PE_BOUNDS = [tier.pe_max for tier in SCORE_TIERS[:-1]]
+_PB_BOUNDS = [tier.pb_max for tier in SCORE_TIERS[:-1]]
+_NESTED_TIERS = _PE_BOUNDS == sorted(_PE_BOUNDS) and _PB_BOUNDS == sorted(_PB_BOUNDS)
+
+# 简化版的分项评分为固定值，与AnalysisResult的默认值一致
+VALUATION_SCORE = 75.0
+FINANCIAL_SCORE = 80.0
+GROWTH_SCORE = 70.0
+
+# 估值字段缺失时使用的默认值，与单只股票分析一致
+VALUATION_DEFAULTS: Dict[str, float] = {
+    "pe": 20.0,
+    "pb": 2.0,
+    "ps": 3.0,
+    "dividend_yield": 2.0,
+    "market_cap": 10000000000
+}
+
+# 评分逻辑版本，修改评分规则（包括分析器中的默认值处理）时递增，
+# 使已保存的增量分析结果失效
+SCORING_VERSION = 1
+
+# 批量评分接受的列
+VALUATION_COLUMNS = ("pe", "pb", "ps", "dividend_yield", "market_cap")
+FINANCIAL_COLUMNS = ("roe", "roa", "gross_margin", "net_margin", "debt_ratio", "current_ratio")
+GROWTH_COLUMNS = ("revenue_growth", "net_income_growth", "equity_growth")
+
+
+def scoring_config() -> Dict[str, Any]:
+    """
+    评分所用的全部配置
+
+    用于计算增量分析的输入指纹，配置变化后已保存的结果不再沿用。
+
+    Returns:
+        可JSON序列化的配置字典
+    """
+    return {
+        "version": SCORING_VERSION,
+        "tiers": [
+            [tier.pe_max, tier.pb_max, tier.overall_score, tier.recommendation.value,
+             list(tier.reasons), list(tier.risks)]
+            for tier in SCORE_TIERS
+        ],
+        "scores": [VALUATION_SCORE, FINANCIAL_SCORE, GROWTH_SCORE],
+        "defaults": VALUATION_DEFAULTS
+    }
+
+
+def tier_index(pe: float, pb: float) -> int:
+    """返回估值所属评分档位的下标"""
+    for i, tier in enumerate(SCORE_TIERS):
+        if pe < tier.pe_max and pb < tier.pb_max:
+            return i
+    # 含NaN时所有比较均为False，归入最后一档
+    return len(SCORE_TIERS) - 1
+
+
+def score_stock(pe: float, pb: float) -> ScoreTier:
+    """
+    单只股票评分
+
+    Args:
+        pe: 市盈率
+        pb: 市净率
+
+    Returns:
+        命中的评分档位
+    """
+    return SCORE_TIERS[tier_index(pe, pb)]
+
+
+def score_batch(columns: Mapping[str, Sequence[float]]) -> Dict[str, Any]:
+    """
+    整列批量评分
+
+    一次处理整个股票池，不构造AnalysisResult对象。档位上限逐档递增时，
+    分别在pe和pb的档位上限中二分查找，取两者中较大的档位；查找仍然逐个
+    元素进行（由map驱动bisect），只是省去了逐档比较的Python循环。
+    NaN在二分查找中不小于任何上限，与score_stock一样归入最后一档，
+    结果与逐只计算完全一致。
+
+    Args:
+        columns: 列名到数值序列的映射，必须包含pe和pb；
+            其余估值、财务和成长列可选，当前简化版评分不使用
+
+    Returns:
+        包含valuation_score、financial_score、growth_score、overall_score
+        （array('d')）、recommendation（建议编码，array('b')）
+        和tier（档位下标，array('b')）的字典
+    """
+    pe = columns["pe"]
+    pb = columns["pb"]
+    rows = len(pe)
+    if len(pb) != rows:
+        raise ValueError(f"列长度不一致: pe={rows}, pb={len(pb)}")
+
+    if _NESTED_TIERS:
+        tiers = array("b", map(max, map(bisect_right, repeat(_PE_BOUNDS), pe),
+                               map(bisect_right, repeat(_PB_BOUNDS), pb)))
+    else:
+        # 档位上限不递增时逐只按顺序匹配
+        tiers = array("b", map(tier_index, pe, pb))
+
+    tier_scores = [tier.overall_score for tier in SCORE_TIERS]
+    # 档位下标到建议编码的字节映射表，整列用bytes.translate转换
+    tier_codes = bytes(_RECOMMENDATION_INDEX[tier.recommendation] for tier in SCORE_TIERS)
+
+    return {
+        "valuation_score": array("d", [VALUATION_SCORE]) * rows,
+        "financial_score": array("d", [FINANCIAL_SCORE]) * rows,
+        "growth_score": array("d", [GROWTH_SCORE]) * rows,
+        "overall_score": array("d", map(tier_scores.__getitem__, tiers)),
+        "recommendation": array("b", tiers.tobytes().translate(tier_codes.ljust(256, b"\0"))),
+        "tier": tiers
+    }
+
+
+def columns_from_valuations(valuations: Iterable[Mapping[str, Any]]) -> Dict[str, array]:
+    """
+    把估值字典列表转换为批量评分所需的列
+
+    缺失字段使用与单只股票分析相同的默认值。
+
+    Args:
+        valuations: 估值字典序列，例如DataManager.get_valuation_indicators的返回值
+
+    Returns:
+        列名到array('d')的字典
+    """
+    columns = {name: array("d") for name in VALUATION_COLUMNS}
+    for valuation in valuations:
+        for name, column in columns.items():
+            column.append(valuation.get(name, VALUATION_DEFAULTS[name]))
+    return columns
+
+
+def fill_missing(columns: Mapping[str, Sequence[float]]) -> Dict[str, array]:
+    """
+    把估值列中的缺失值（NaN）替换为单只股票分析使用的默认值
+
+    Args:
+        columns: 列名到数值序列的映射，列名须在VALUATION_DEFAULTS中
+
+    Returns:
+        列名到array('d')的字典
+    """
+    return {
+        name: array("d", [value if value == value else VALUATION_DEFAULTS[name]
+                          for value in values])
+        for name, values in columns.items()
+    }
+
+
+def decode_recommendations(codes: Sequence[int]) -> List[Recommendation]:
+    """把建议编码转换为Recommendation枚举"""
+    return [RECOMMENDATION_CODES[code] for code in codes]
@@ -0,0 +1,229 @@
+"""
+全市场筛选 - 简化版
+解析形如 "pe<15 and pb<1.5 and dividend_yield>4" 的条件表达式，
+借助股票池的排序索引和倒排索引求出满足条件的行
+"""
+
+import re
+from typing import List, Optional, Sequence, Set, Tuple, Union
+
+from ..data_sources.universe import Universe
+
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(<=|>=|==|!=|<|>|=)|(\()|(\))|(\"[^\"]*\"|'[^']*')|([^\s()<>=!\"']+))"
+)
+
+_KEYWORDS = {"and", "or", "not"}
+
+
+class ScreenSyntaxError(ValueError):
+    """筛选表达式语法错误"""
+
+
+class Condition:
+    """单个比较条件，如 pe < 15"""
+
+    __slots__ = ("column", "op", "value", "text")
+
+    def __init__(self, column: str, op: str, value: Union[float, str],
+                 text: Optional[str] = None):
+        self.column = column
+        self.op = "==" if op == "=" else op
+        self.value = value
+        # 原始文本，用于与代码等文本列比较，避免"600519"被当作600519.0
+        self.text = str(value) if text is None else text
+
+    def rows(self, universe: Universe) -> Set[int]:
+        """返回满足条件的底层行号集合"""
+        if self.column not in universe.columns and self.column != "symbol":
+            raise ScreenSyntaxError(f"未知的筛选字段: {self.column}")
+        if self.column in universe.numeric_columns:
+            if isinstance(self.value, str):
+                raise ScreenSyntaxError(f"数值列{self.column}只能与数字比较: {self.value}")
+            return set(universe.sorted_index(self.column).select(self.op, self.value))
+
+        if self.op not in ("==", "!="):
+            raise ScreenSyntaxError(f"非数值列{self.column}只支持==和!=")
+        value = self.text
+        if self.column == "symbol":
+            position = universe.position(value)
+            matched = set() if position is None else {universe.rows[position]}
+        elif self._is_categorical(universe):
+            matched = set(universe.category_rows(self.column, value))
+        else:
+            column = universe.column(self.column)
+            matched = {row for row, v in zip(universe.rows, column) if v == value}
+
+        if self.op == "!=":
+            return set(universe.rows) - matched
+        return matched
+
+    def _is_categorical(self, universe: Universe) -> bool:
+        try:
+            universe.categories(self.column)
+            return True
+        except KeyError:
+            return False
+
+    def __repr__(self) -> str:
+        return f"{self.column}{self.op}{self.value!r}"
+
+
+class BoolOp:
+    """and / or / not 组合"""
+
+    __slots__ = ("op", "operands")
+
+    def __init__(self, op: str, operands: List["Node"]):
+        self.op = op
+        self.operands = operands
+
+    def rows(self, universe: Universe) -> Set[int]:
+        if self.op == "not":
+            return set(universe.rows) - self.operands[0].rows(universe)
+
+        if self.op == "or":
+            result: Set[int] = set()
+            for operand in self.operands:
+                result |= operand.rows(universe)
+            return result
+
+        # and：先求结果最少的条件，再依次求交集
+        sets = sorted((operand.rows(universe) for operand in self.operands), key=len)
+        result = sets[0]
+        for other in sets[1:]:
+            if not result:
+                break
+            result = result & other
+        return result
+
+    def __repr__(self) -> str:
+        if self.op == "not":
+            return f"(not {self.operands[0]!r})"
+        return f"({f' {self.op} '.join(map(repr, self.operands))})"
+
+
+Node = Union[Condition, BoolOp]
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ScreenSyntaxError(f"无法解析的表达式: {expression[pos:]}")
+        op, lparen, rparen, quoted, word = match.groups()
+        if op:
+            tokens.append(("op", op))
+        elif lparen:
+            tokens.append(("(", lparen))
+        elif rparen:
+            tokens.append((")", rparen))
+        elif quoted:
+            tokens.append(("str", quoted[1:-1]))
+        elif word.lower() in _KEYWORDS:
+            tokens.append((word.lower(), word))
+        else:
+            tokens.append(("word", word))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """递归下降解析：or优先级最低，其次and，再次not"""
+
+    def __init__(self, tokens: Sequence[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else ""
+
+    def take(self, kind: str) -> str:
+        if self.peek() != kind:
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "表达式结尾"
+            raise ScreenSyntaxError(f"表达式语法错误: 期望{kind}，实际为{found}")
+        value = self.tokens[self.pos][1]
+        self.pos += 1
+        return value
+
+    def parse(self) -> Node:
+        node = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise ScreenSyntaxError(f"表达式语法错误: 多余的内容{self.tokens[self.pos][1]}")
+        return node
+
+    def parse_or(self) -> Node:
+        operands = [self.parse_and()]
+        while self.peek() == "or":
+            self.take("or")
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else BoolOp("or", operands)
+
+    def parse_and(self) -> Node:
+        operands = [self.parse_not()]
+        while self.peek() == "and":
+            self.take("and")
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else BoolOp("and", operands)
+
+    def parse_not(self) -> Node:
+        if self.peek() == "not":
+            self.take("not")
+            return BoolOp("not", [self.parse_not()])
+        if self.peek() == "(":
+            self.take("(")
+            node = self.parse_or()
+            self.take(")")
+            return node
+        return self.parse_condition()
+
+    def parse_condition(self) -> Condition:
+        column = self.take("word")
+        op = self.take("op")
+        if self.peek() == "str":
+            return Condition(column, op, self.take("str"))
+        raw = self.take("word")
+        try:
+            return Condition(column, op, float(raw), raw)
+        except ValueError:
+            return Condition(column, op, raw)
+
+
+def parse_screen(expression: str) -> Node:
+    """
+    解析筛选表达式
+
+    支持数值比较（<、<=、>、>=、==、!=）、分类列相等判断（如industry==银行）、
+    and / or / not 以及括号。
+
+    Args:
+        expression: 筛选表达式
+
+    Returns:
+        表达式树
+
+    Raises:
+        ScreenSyntaxError: 表达式无法解析
+    """
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise ScreenSyntaxError("筛选表达式为空")
+    return _Parser(tokens).parse()
+
+
+def screen_universe(universe: Universe, expression: str) -> Universe:
+    """
+    在股票池中筛选满足表达式的股票
+
+    Args:
+        universe: 含估值列的股票池
+        expression: 筛选表达式
+
+    Returns:
+        满足条件的股票池视图
+    """
+    return universe.select_rows(parse_screen(expression).rows(universe))
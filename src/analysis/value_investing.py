@@ -4,152 +4,63 @@
 """
 
 import os
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Sequence, Set, TextIO, Tuple, Union
 import logging
 from datetime import datetime
-from dataclasses import dataclass
-from enum import Enum
-
-from ..data_sources import DataManager
+from collections import deque
+from itertools import chain, islice
+
+from ..data_sources.data_manager import (DataManager, MARKETS, SymbolEntry, VALUATION_FIELDS,
+                                         iter_market_pairs)
+from ..data_sources.universe import BASIC_INFO_COLUMNS, Universe
+from .scoring import Recommendation, fill_missing, score_stock, score_batch
+from .result_set import AnalysisResult, PERCENTILE_FIELDS, ResultSet
+from .leaderboard import Leaderboard, LeaderboardSnapshot
+from ..utils.timing import StageTimer, TimingStats
+from ..utils.metrics import MetricsServer, MetricsWriter
 
 logger = logging.getLogger(__name__)
 
 
-class Recommendation(Enum):
-    """投资建议枚举"""
-    STRONG_BUY = "强烈买入"
-    BUY = "买入"
-    HOLD = "持有"
-    SELL = "卖出"
-    STRONG_SELL = "强烈卖出"
-
-
-@dataclass
-class AnalysisResult:
-    """分析结果数据类"""
-    symbol: str
-    market: str
-    name: str
-    analysis_date: str
-
-    # 估值指标
-    pe: float
-    pb: float
-    ps: float
-    dividend_yield: float
-    market_cap: float
-
-    # 财务指标（简化版使用默认值）
-    roe: float = 15.0
-    roa: float = 5.0
-    gross_margin: float = 30.0
-    net_margin: float = 15.0
-    debt_ratio: float = 40.0
-    current_ratio: float = 2.0
-
-    # 成长性指标（简化版使用默认值）
-    revenue_growth: float = 10.0
-    net_income_growth: float = 15.0
-    equity_growth: float = 8.0
-
-    # 分析结果
-    valuation_score: float = 75.0
-    financial_score: float = 80.0
-    growth_score: float = 70.0
-    overall_score: float = 75.0
-
-    recommendation: Recommendation = Recommendation.HOLD
-    reasons: List[str] = None
-    risks: List[str] = None
-
-    def __post_init__(self):
-        """初始化后处理"""
-        if self.reasons is None:
-            self.reasons = []
-        if self.risks is None:
-            self.risks = []
-
-    def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return {
-            "symbol": self.symbol,
-            "market": self.market,
-            "name": self.name,
-            "analysis_date": self.analysis_date,
-            "valuation": {
-                "pe": self.pe,
-                "pb": self.pb,
-                "ps": self.ps,
-                "dividend_yield": self.dividend_yield,
-                "market_cap": self.market_cap
-            },
-            "financial": {
-                "roe": self.roe,
-                "roa": self.roa,
-                "gross_margin": self.gross_margin,
-                "net_margin": self.net_margin,
-                "debt_ratio": self.debt_ratio,
-                "current_ratio": self.current_ratio
-            },
-            "growth": {
-                "revenue_growth": self.revenue_growth,
-                "net_income_growth": self.net_income_growth,
-                "equity_growth": self.equity_growth
-            },
-            "scores": {
-                "valuation_score": self.valuation_score,
-                "financial_score": self.financial_score,
-                "growth_score": self.growth_score,
-                "overall_score": self.overall_score
-            },
-            "recommendation": self.recommendation.value,
-            "reasons": self.reasons,
-            "risks": self.risks
-        }
-
-    def summary(self) -> str:
-        """生成摘要"""
-        return f"""
-股票: {self.name} ({self.symbol})
-市场: {self.market}
-分析日期: {self.analysis_date}
-
-估值指标:
-  PE: {self.pe:.2f}, PB: {self.pb:.2f}, PS: {self.ps:.2f}
-  股息率: {self.dividend_yield:.2f}%, 市值: {self.market_cap:,.0f}
-
-财务指标:
-  ROE: {self.roe:.2f}%, ROA: {self.roa:.2f}%
-  毛利率: {self.gross_margin:.2f}%, 净利率: {self.net_margin:.2f}%
-  负债率: {self.debt_ratio:.2f}%, 流动比率: {self.current_ratio:.2f}
-
-成长性指标:
-  营收增长率: {self.revenue_growth:.2f}%
-  净利润增长率: {self.net_income_growth:.2f}%
-  净资产增长率: {self.equity_growth:.2f}%
-
-综合评分:
-  估值评分: {self.valuation_score:.1f}/100
-  财务评分: {self.financial_score:.1f}/100
-  成长评分: {self.growth_score:.1f}/100
-  总体评分: {self.overall_score:.1f}/100
-
-投资建议: {self.recommendation.value}
-        """.strip()
-
-
 class ValueInvestingAnalyzer:
     """价值投资分析器 - 简化版"""
 
-    def __init__(self, tushare_token: Optional[str] = None):
+    def __init__(self, tushare_token: Optional[str] = None, record_timings: bool = False,
+                 incremental: bool = False):
         """
         初始化价值投资分析器
 
         Args:
             tushare_token: tushare token
+            record_timings: 是否将各阶段耗时附加到分析结果的timings字段
+            incremental: 是否启用增量分析：保存每只股票的结果及其输入指纹，
+                输入未变化时沿用上次的结果（包括analysis_date），不再重新评分
         """
         self.data_manager = DataManager(tushare_token)
 
+        # 增量分析的结果存储（ResultStore），打开失败时退化为每次重新评分；
+        # sqlite3和hashlib只在启用增量分析时导入
+        self.result_store = None
+        if incremental:
+            try:
+                from .result_store import ResultStore
+                self.result_store = ResultStore.from_env()
+            except Exception as e:
+                logger.warning(f"结果存储不可用，不使用增量分析: {e}")
+        # 本进程中最近一次分析沿用了已保存结果的股票（市场, 代码）
+        self._reused: Set[Tuple[str, str]] = set()
+        self._reused_lock = threading.Lock()
+
+        # 各阶段耗时始终汇总到stats()，record_timings只控制是否附加到单个结果
+        self.record_timings = record_timings
+        self._timing_stats = TimingStats()
+        # 数据获取或评分失败、改用默认结果的次数
+        self.fallbacks = 0
+        self._fallback_lock = threading.Lock()
+
         logger.info("价值投资分析器初始化完成（简化版）")
 
     def analyze_stock(self, symbol: str, market: str = "A") -> AnalysisResult:
@@ -163,129 +74,589 @@ class ValueInvestingAnalyzer:
         Returns:
             分析结果
         """
+        timer = StageTimer()
+        start = time.perf_counter()
         try:
             logger.info(f"开始分析股票: {symbol} ({market}) - 简化版")
 
             # 获取股票信息
-            stock_info = self.data_manager.get_stock_info(symbol, market)
-            if not stock_info:
-                # 如果获取失败，使用默认值
-                stock_info = {
-                    "basic_info": {
-                        "name": f"股票{symbol}",
-                        "industry": "未知",
-                        "area": "中国" if market == "A" else "香港",
-                        "market": market,
-                        "list_date": "20000101"
-                    },
-                    "valuation": {
-                        "pe": 20.0 if market == "A" else 25.0,
-                        "pb": 2.0 if market == "A" else 3.0,
-                        "ps": 3.0 if market == "A" else 4.0,
-                        "dividend_yield": 2.5 if market == "A" else 1.5,
-                        "market_cap": 10000000000 if market == "A" else 50000000000
-                    }
-                }
-
-            # 获取基本信息
-            basic_info = stock_info.get("basic_info", {})
-            valuation = stock_info.get("valuation", {})
-
-            # 计算评分（简化版使用固定逻辑）
-            pe = valuation.get("pe", 20.0)
-            pb = valuation.get("pb", 2.0)
-
-            # 简化评分逻辑
-            if pe < 15 and pb < 1.5:
-                overall_score = 85.0
-                recommendation = Recommendation.STRONG_BUY
-                reasons = ["估值较低，具备投资价值"]
-                risks = ["需关注公司基本面变化"]
-            elif pe < 20 and pb < 2.0:
-                overall_score = 75.0
-                recommendation = Recommendation.BUY
-                reasons = ["估值合理，可以考虑投资"]
-                risks = ["注意市场波动风险"]
-            elif pe < 30 and pb < 3.0:
-                overall_score = 65.0
-                recommendation = Recommendation.HOLD
-                reasons = ["估值适中，建议持有观察"]
-                risks = ["估值偏高，存在回调风险"]
-            else:
-                overall_score = 45.0
-                recommendation = Recommendation.SELL
-                reasons = ["估值偏高，建议谨慎"]
-                risks = ["估值过高，存在较大下跌风险"]
-
-            # 创建分析结果
-            result = AnalysisResult(
-                symbol=symbol,
-                market=market,
-                name=basic_info.get("name", f"股票{symbol}"),
-                analysis_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-
-                # 估值指标
-                pe=pe,
-                pb=pb,
-                ps=valuation.get("ps", 3.0),
-                dividend_yield=valuation.get("dividend_yield", 2.0),
-                market_cap=valuation.get("market_cap", 10000000000),
-
-                # 评分和建议
-                overall_score=overall_score,
-                recommendation=recommendation,
-                reasons=reasons,
-                risks=risks
-            )
-
-            logger.info(f"股票{symbol}分析完成，总体评分: {overall_score:.1f}")
-            return result
+            stock_info = self.data_manager.get_stock_info(symbol, market, timer)
+            result = self._build_result(symbol, market, stock_info, timer)
 
         except Exception as e:
             logger.error(f"分析股票{symbol}失败: {e}")
-            # 返回默认结果
-            return AnalysisResult(
-                symbol=symbol,
-                market=market,
-                name=f"股票{symbol}",
-                analysis_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                pe=20.0,
-                pb=2.0,
-                ps=3.0,
-                dividend_yield=2.0,
-                market_cap=10000000000,
-                overall_score=50.0,
-                recommendation=Recommendation.HOLD,
-                reasons=["数据获取失败，使用默认分析"],
-                risks=["数据源不可用，分析结果仅供参考"]
-            )
-
-    def batch_analyze(self, symbols: List[str], market: str = "A") -> List[AnalysisResult]:
+            result = self._fallback_result(symbol, market)
+
+        timer.add("total", time.perf_counter() - start)
+        return self._finish_timing(result, timer)
+
+    async def analyze_stock_async(self, symbol: str, market: str = "A") -> AnalysisResult:
         """
-        批量分析股票 - 简化版
+        分析单只股票 - 异步版
 
         Args:
-            symbols: 股票代码列表
+            symbol: 股票代码
             market: 市场类型，A表示A股，HK表示港股
 
         Returns:
-            分析结果列表
+            分析结果
         """
-        results = []
-        for symbol in symbols:
+        timer = StageTimer()
+        start = time.perf_counter()
+        try:
+            logger.info(f"开始异步分析股票: {symbol} ({market})")
+
+            stock_info = await self.data_manager.get_stock_info_async(symbol, market, timer)
+            result = self._build_result(symbol, market, stock_info, timer)
+
+        except Exception as e:
+            # asyncio.CancelledError不是Exception子类，取消会继续向上传播
+            logger.error(f"分析股票{symbol}失败: {e}")
+            result = self._fallback_result(symbol, market)
+
+        timer.add("total", time.perf_counter() - start)
+        return self._finish_timing(result, timer)
+
+    def _finish_timing(self, result: AnalysisResult, timer: StageTimer) -> AnalysisResult:
+        """汇总本次分析的阶段耗时，按需附加到结果"""
+        self._timing_stats.record(timer.timings)
+        if self.record_timings:
+            result.timings = timer.as_ms()
+        return result
+
+    @contextmanager
+    def timed_stage(self, stage: str, result: Optional[AnalysisResult] = None) -> Iterator[None]:
+        """
+        计时分析之外的阶段（如render、serialize），计入stats()
+
+        Args:
+            stage: 阶段名称
+            result: 对应的分析结果，已附加timings时同时写入该结果
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._timing_stats.add(stage, elapsed)
+            if result is not None and result.timings is not None:
+                result.timings[stage] = round(result.timings.get(stage, 0.0) + elapsed * 1000, 3)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各阶段耗时统计
+
+        阶段包括fetch_basic、fetch_valuation、fetch_history、score、render、serialize和total（单只分析总耗时）。
+
+        Returns:
+            阶段名 -> {count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms}
+        """
+        return self._timing_stats.summary()
+
+    def reset_stats(self) -> None:
+        """清空阶段耗时统计"""
+        self._timing_stats.reset()
+
+    def metrics(self) -> str:
+        """
+        获取Prometheus文本格式的指标快照
+
+        包括各数据源的请求、重试、限流次数，缓存命中/未命中/淘汰，
+        请求合并，默认结果兜底次数，以及各阶段耗时直方图。
+
+        Returns:
+            Prometheus文本（0.0.4格式）
+        """
+        writer = MetricsWriter()
+        self.data_manager.collect_metrics(writer)
+        writer.counter("analysis_fallbacks_total", self.fallbacks,
+                       "分析失败后返回默认结果的次数")
+        if self.result_store is not None:
+            store = self.result_store.stats()
+            writer.counter("result_store_hits_total", store["hits"],
+                           "增量分析中输入未变化、沿用已保存结果的次数")
+            writer.counter("result_store_misses_total", store["misses"],
+                           "增量分析中输入变化或没有已保存结果、重新评分的次数")
+            writer.gauge("result_store_entries", store["size"], "已保存的分析结果数")
+        for stage, (buckets, total, count) in self._timing_stats.histograms().items():
+            writer.histogram("stage_duration_seconds", buckets, total, count,
+                             "各阶段耗时（秒）", {"stage": stage})
+        return writer.render()
+
+    def serve_metrics(self, host: str = "127.0.0.1", port: int = 9464) -> MetricsServer:
+        """
+        在后台线程中启动本地指标端点，GET /metrics 返回metrics()的内容
+
+        Args:
+            host: 监听地址，默认只监听本机
+            port: 监听端口，0表示自动分配
+
+        Returns:
+            已启动的指标端点，调用stop()停止
+        """
+        return MetricsServer(self.metrics, host, port).start()
+
+    def _build_result(self, symbol: str, market: str, stock_info: Dict[str, Any],
+                      timer: Optional[StageTimer] = None) -> AnalysisResult:
+        """根据股票综合信息计算评分并生成分析结果"""
+        if timer is None:
+            timer = StageTimer()
+        with timer.stage("score"):
+            # 获取失败时使用默认值评分，这类结果不保存
+            if self.result_store is None or not stock_info:
+                if self.result_store is not None:
+                    self._mark_reused(market, symbol, False)
+                return self._score_result(symbol, market, stock_info)
+
+            from .result_store import input_fingerprint
+            fingerprint = input_fingerprint(stock_info)
+            try:
+                result = self.result_store.get(symbol, market, fingerprint)
+            except Exception as e:
+                logger.warning(f"读取已保存的分析结果失败: {e}")
+                result = None
+            if result is not None:
+                logger.info(f"股票{symbol}输入未变化，沿用上次的分析结果")
+                self._mark_reused(market, symbol, True)
+                return result
+
+            self._mark_reused(market, symbol, False)
+            result = self._score_result(symbol, market, stock_info)
             try:
-                result = self.analyze_stock(symbol, market)
-                results.append(result)
-                logger.info(f"股票{symbol}分析完成，评分: {result.overall_score:.1f}")
+                self.result_store.put(result, fingerprint)
             except Exception as e:
-                logger.error(f"分析股票{symbol}失败: {e}")
-                continue
+                logger.warning(f"保存分析结果失败: {e}")
+            return result
+
+    def _mark_reused(self, market: str, symbol: str, reused: bool) -> None:
+        with self._reused_lock:
+            if reused:
+                self._reused.add((market, symbol))
+            else:
+                self._reused.discard((market, symbol))
+
+    def is_reused(self, result: AnalysisResult) -> bool:
+        """
+        判断结果是否为增量分析中沿用的已保存结果
+
+        Returns:
+            本进程中该股票最近一次分析的输入未变化、未重新评分时返回True
+        """
+        return (result.market, result.symbol) in self._reused
+
+    def _score_result(self, symbol: str, market: str,
+                      stock_info: Dict[str, Any]) -> AnalysisResult:
+        """评分并构造分析结果，不含计时"""
+        if not stock_info:
+            # 如果获取失败，使用默认值
+            stock_info = {
+                "basic_info": {
+                    "name": f"股票{symbol}",
+                    "industry": "未知",
+                    "area": "中国" if market == "A" else "香港",
+                    "market": market,
+                    "list_date": "20000101"
+                },
+                "valuation": {
+                    "pe": 20.0 if market == "A" else 25.0,
+                    "pb": 2.0 if market == "A" else 3.0,
+                    "ps": 3.0 if market == "A" else 4.0,
+                    "dividend_yield": 2.5 if market == "A" else 1.5,
+                    "market_cap": 10000000000 if market == "A" else 50000000000
+                }
+            }
+
+        # 获取基本信息
+        basic_info = stock_info.get("basic_info", {})
+        valuation = stock_info.get("valuation", {})
+        percentiles = {
+            name: value for name, value in stock_info.get("percentiles", {}).items()
+            if name in PERCENTILE_FIELDS
+        }
+
+        # 计算评分（简化版使用固定逻辑）
+        pe = valuation.get("pe", 20.0)
+        pb = valuation.get("pb", 2.0)
+
+        # 简化评分逻辑，档位定义见scoring.SCORE_TIERS
+        tier = score_stock(pe, pb)
+        overall_score = tier.overall_score
+        recommendation = tier.recommendation
+        reasons = list(tier.reasons)
+        risks = list(tier.risks)
+
+        # 创建分析结果
+        result = AnalysisResult(
+            symbol=symbol,
+            market=market,
+            name=basic_info.get("name", f"股票{symbol}"),
+            analysis_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+
+            # 估值指标
+            pe=pe,
+            pb=pb,
+            ps=valuation.get("ps", 3.0),
+            dividend_yield=valuation.get("dividend_yield", 2.0),
+            market_cap=valuation.get("market_cap", 10000000000),
+
+            # 历史估值分位
+            **percentiles,
+
+            # 评分和建议
+            overall_score=overall_score,
+            recommendation=recommendation,
+            reasons=reasons,
+            risks=risks
+        )
+
+        logger.info(f"股票{symbol}分析完成，总体评分: {overall_score:.1f}")
+        return result
+
+    def _fallback_result(self, symbol: str, market: str) -> AnalysisResult:
+        """分析失败时返回的默认结果"""
+        with self._fallback_lock:
+            self.fallbacks += 1
+        self._mark_reused(market, symbol, False)
+        return AnalysisResult(
+            symbol=symbol,
+            market=market,
+            name=f"股票{symbol}",
+            analysis_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            pe=20.0,
+            pb=2.0,
+            ps=3.0,
+            dividend_yield=2.0,
+            market_cap=10000000000,
+            overall_score=50.0,
+            recommendation=Recommendation.HOLD,
+            reasons=["数据获取失败，使用默认分析"],
+            risks=["数据源不可用，分析结果仅供参考"]
+        )
+
+    def batch_analyze(self, symbols: List[SymbolEntry], market: str = "A",
+                      max_workers: int = 1, columnar: bool = False,
+                      top: Optional[int] = None,
+                      tie_breaks: Union[str, Sequence[str]] = ()) -> Union[List[AnalysisResult], ResultSet]:
+        """
+        批量分析股票 - 简化版
+
+        Args:
+            symbols: 股票代码或(股票代码, 市场)的列表，可混合A股和港股
+            market: 单独给出代码时的市场，A表示A股，HK表示港股，auto表示按代码格式识别
+            max_workers: 并发线程数，1表示逐只顺序分析
+            columnar: 为True时返回列式ResultSet，每个结果产出后即转为列存储，
+                适合上万只的大批次
+            top: 只保留总体评分最高的top只，分析过程中即丢弃其余结果
+            tie_breaks: 总体评分相同时依次比较的字段，如 "pe:asc,dividend_yield"，
+                仅在指定top时使用
+
+        Returns:
+            按总体评分排序的分析结果列表，或ResultSet
+        """
+        if top is not None:
+            results = self.leaderboard(symbols, market, top, max_workers=max_workers,
+                                       tie_breaks=tie_breaks)
+            return ResultSet(results) if columnar else results
+
+        # 按输入顺序收集，排序相同评分时与顺序分析结果一致
+        results = self.iter_analyze(symbols, market, max_workers=max_workers, ordered=True)
+        if columnar:
+            return ResultSet(results).sort("overall_score")
+        results = list(results)
+
+        # 按总体评分排序
+        results.sort(key=lambda x: x.overall_score, reverse=True)
+
+        return results
+
+    def leaderboard(self, symbols: Iterable[SymbolEntry], market: str = "A", top: int = 10,
+                    max_workers: int = 1,
+                    tie_breaks: Union[str, Sequence[str]] = ()) -> List[AnalysisResult]:
+        """
+        批量分析并只保留总体评分最高的top只
+
+        Args:
+            symbols: 股票代码或(股票代码, 市场)的序列，可以是文件等惰性迭代器
+            market: 单独给出代码时的市场，A表示A股，HK表示港股，auto表示按代码格式识别
+            top: 排行榜大小
+            max_workers: 并发线程数，1表示逐只顺序分析
+            tie_breaks: 总体评分相同时依次比较的字段，格式见leaderboard.parse_sort_fields
+
+        Returns:
+            排行榜，排名靠前的在前
+        """
+        snapshot = None
+        for snapshot in self.iter_leaderboard(symbols, market, top, max_workers=max_workers,
+                                              tie_breaks=tie_breaks):
+            pass
+        return snapshot.results
+
+    def iter_leaderboard(self, symbols: Iterable[SymbolEntry], market: str = "A", top: int = 10,
+                         max_workers: int = 1,
+                         tie_breaks: Union[str, Sequence[str]] = (),
+                         every: Optional[int] = None) -> Iterator[LeaderboardSnapshot]:
+        """
+        逐步产出排行榜快照的生成器
+
+        只保留当前最好的top个结果，内存占用为O(top)，与批次大小无关。
+        相同排序值按输入顺序排列，最终排行榜与batch_analyze排序后取前top只一致。
+
+        Args:
+            symbols: 股票代码或(股票代码, 市场)的序列，可以是文件等惰性迭代器
+            market: 单独给出代码时的市场，A表示A股，HK表示港股，auto表示按代码格式识别
+            top: 排行榜大小
+            max_workers: 并发线程数，1表示逐只顺序分析
+            tie_breaks: 总体评分相同时依次比较的字段，格式见leaderboard.parse_sort_fields
+            every: 每分析every只产出一次中间快照，None表示只产出最终排行榜
+
+        Yields:
+            排行榜快照，最后一个的final为True
+        """
+        if every is not None and every < 1:
+            raise ValueError(f"快照间隔必须大于0: {every}")
+        # 先创建排行榜，参数错误时不必开始分析
+        board = Leaderboard(top, tie_breaks=tie_breaks)
+        for result in self.iter_analyze(symbols, market, max_workers=max_workers, ordered=True):
+            board.push(result)
+            if every is not None and board.seen % every == 0:
+                yield board.snapshot()
+        yield board.snapshot(final=True)
+
+    def iter_analyze(self, symbols: Iterable[SymbolEntry], market: str = "A",
+                     max_workers: int = 1, ordered: bool = False) -> Iterator[AnalysisResult]:
+        """
+        逐只产出分析结果的生成器
+
+        代码按需从symbols中读取，同时在途的分析不超过2 * max_workers只，
+        内存占用与批次大小无关。分析失败的股票会被跳过。
+        混合A股和港股时先按市场分组预取，每个数据源只经历一轮批量或并发请求。
+
+        Args:
+            symbols: 股票代码或(股票代码, 市场)的序列，可以是文件等惰性迭代器
+            market: 单独给出代码时的市场，A表示A股，HK表示港股，auto表示按代码格式识别
+            max_workers: 并发线程数，1表示逐只顺序分析
+            ordered: 为True时按输入顺序产出，否则按完成顺序产出
+
+        Yields:
+            分析结果
+        """
+        # 先读取一部分代码（列表输入则为全部）按市场分组预取，
+        # 批次足够大的市场用全市场快照代替逐只请求
+        pairs = iter_market_pairs(symbols, market)
+        if isinstance(symbols, (list, tuple)):
+            head = list(pairs)
+        else:
+            head = list(islice(pairs, self.data_manager.bulk_fetch_threshold * len(MARKETS)))
+        self._prefetch_groups(head, market)
+        pairs = chain(head, pairs)
+
+        if max_workers <= 1:
+            for symbol, symbol_market in pairs:
+                result = self._analyze_isolated(symbol, symbol_market)
+                if result is not None:
+                    yield result
+            return
+
+        # 数据获取以I/O为主，用线程池重叠各只股票的请求；顺序分析时无需导入线程池
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        window = max_workers * 2
+        with ThreadPoolExecutor(max_workers=max_workers,
+                                thread_name_prefix="gems-batch") as executor:
+            def _submit():
+                entry = next(pairs, None)
+                if entry is None:
+                    return None
+                return executor.submit(self._analyze_isolated, *entry)
+
+            if ordered:
+                queue = deque()
+                try:
+                    while len(queue) < window:
+                        future = _submit()
+                        if future is None:
+                            break
+                        queue.append(future)
+                    while queue:
+                        result = queue.popleft().result()
+                        future = _submit()
+                        if future is not None:
+                            queue.append(future)
+                        if result is not None:
+                            yield result
+                finally:
+                    for future in queue:
+                        future.cancel()
+            else:
+                pending = set()
+                try:
+                    while len(pending) < window:
+                        future = _submit()
+                        if future is None:
+                            break
+                        pending.add(future)
+                    while pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for _ in done:
+                            future = _submit()
+                            if future is not None:
+                                pending.add(future)
+                        for future in done:
+                            result = future.result()
+                            if result is not None:
+                                yield result
+                finally:
+                    for future in pending:
+                        future.cancel()
+
+    def _prefetch_groups(self, pairs: Sequence[Tuple[str, str]],
+                         market: str = "A") -> Dict[str, List[str]]:
+        """
+        按市场（即数据源）分组预取
+
+        每个市场构建一次股票池，并按该市场的批次规模决定是否改取全市场快照，
+        使每个数据源只经历一轮批量或并发请求。
+
+        Args:
+            pairs: (股票代码, 市场)序列
+            market: 没有代码时仍预先构建股票池的市场，auto表示不构建
+
+        Returns:
+            市场 -> 股票代码列表
+        """
+        groups: Dict[str, List[str]] = {}
+        for symbol, symbol_market in pairs:
+            groups.setdefault(symbol_market, []).append(symbol)
+        if not groups and market in MARKETS:
+            groups[market] = []
+
+        for group_market, group_symbols in groups.items():
+            # 整批共享同一份股票列表
+            self.data_manager.get_universe(group_market)
+            self.data_manager.prefetch_valuations(group_symbols, group_market)
+            self.data_manager.prefetch_percentiles(group_symbols, group_market)
+        if len(groups) > 1:
+            logger.info("按市场分组: " + ", ".join(f"{m} {len(v)}只" for m, v in groups.items()))
+        return groups
+
+    def _analyze_isolated(self, symbol: str, market: str) -> Optional[AnalysisResult]:
+        """分析单只股票，失败时返回None，不影响批次中的其他股票"""
+        try:
+            result = self.analyze_stock(symbol, market)
+            logger.info(f"股票{symbol}分析完成，评分: {result.overall_score:.1f}")
+            return result
+        except Exception as e:
+            logger.error(f"分析股票{symbol}失败: {e}")
+            return None
+
+    async def batch_analyze_async(self, symbols: List[SymbolEntry], market: str = "A",
+                                  max_concurrency: int = 64,
+                                  columnar: bool = False) -> Union[List[AnalysisResult], ResultSet]:
+        """
+        批量分析股票 - 异步版
+
+        所有请求共享同一个事件循环，由信号量限制同时在途的请求数。
+        取消本协程会同时取消所有未完成的分析。
+
+        Args:
+            symbols: 股票代码或(股票代码, 市场)的列表，可混合A股和港股
+            market: 单独给出代码时的市场，A表示A股，HK表示港股，auto表示按代码格式识别
+            max_concurrency: 最大并发请求数
+            columnar: 为True时返回列式ResultSet
+
+        Returns:
+            按总体评分排序的分析结果列表，或ResultSet
+        """
+        import asyncio
+
+        if max_concurrency < 1:
+            raise ValueError(f"最大并发数必须大于0: {max_concurrency}")
+
+        # 每个市场的股票池只需构建一次，放到线程中执行以免阻塞事件循环
+        pairs = list(iter_market_pairs(symbols, market))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._prefetch_groups, pairs, market)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _analyze(symbol: str, symbol_market: str) -> Optional[AnalysisResult]:
+            async with semaphore:
+                try:
+                    result = await self.analyze_stock_async(symbol, symbol_market)
+                    logger.info(f"股票{symbol}分析完成，评分: {result.overall_score:.1f}")
+                    return result
+                except Exception as e:
+                    logger.error(f"分析股票{symbol}失败: {e}")
+                    return None
+
+        outcomes = await asyncio.gather(*(_analyze(*pair) for pair in pairs))
+        results = [result for result in outcomes if result is not None]
+        if columnar:
+            return ResultSet(results).sort("overall_score")
 
         # 按总体评分排序
         results.sort(key=lambda x: x.overall_score, reverse=True)
 
         return results
 
+    def score_universe(self, columns: Union[Universe, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        批量评分整个股票池
+
+        Args:
+            columns: 含pe和pb数值列的股票池，或列名到数值序列的映射
+
+        Returns:
+            各项评分列与建议编码列，详见scoring.score_batch
+        """
+        if isinstance(columns, Universe):
+            columns = columns.as_columns()
+        return score_batch(columns)
+
+    def screen(self, expression: str, market: str = "A",
+               limit: Optional[int] = None) -> List[AnalysisResult]:
+        """
+        全市场筛选
+
+        Args:
+            expression: 筛选表达式，如 "pe<15 and pb<1.5 and dividend_yield>4"
+            market: 市场类型，A表示A股，HK表示港股
+            limit: 最多返回的股票数，None表示全部
+
+        Returns:
+            按总体评分排序的分析结果列表
+
+        Raises:
+            ScreenSyntaxError: 表达式无法解析
+        """
+        logger.info(f"全市场筛选: {expression} ({market})")
+
+        # 先解析表达式，语法错误时不必加载股票池
+        from .screener import parse_screen
+        condition = parse_screen(expression)
+        universe = self.data_manager.get_valuation_universe(market)
+        matched = universe.select_rows(condition.rows(universe))
+
+        # 批量评分后排序，只为最终返回的股票构建AnalysisResult；
+        # 缺失的估值（NaN）与analyze_stock一样按默认值评分
+        scores = score_batch(fill_missing(matched.as_columns(("pe", "pb"))))["overall_score"]
+        order = sorted(range(len(matched)), key=lambda p: scores[p], reverse=True)
+        if limit is not None:
+            order = order[:limit]
+
+        results = []
+        for position in order:
+            record = matched.record(position)
+            stock_info = {
+                "basic_info": {name: record[name] for name in BASIC_INFO_COLUMNS},
+                "valuation": {name: record[name] for name in VALUATION_FIELDS
+                              if record[name] == record[name]}
+            }
+            results.append(self._build_result(record["symbol"], market, stock_info))
+
+        logger.info(f"筛选完成，{len(matched)}只股票满足条件")
+        return results
+
     def generate_report(self, result: AnalysisResult, format: str = "text") -> str:
         """
         生成分析报告 - 简化版
@@ -297,74 +668,53 @@ class ValueInvestingAnalyzer:
         Returns:
             报告内容
         """
-        if format == "text":
-            return result.summary()
-        elif format == "html":
-            return self._generate_html_report(result)
-        else:
+        if format not in ("text", "html"):
             raise ValueError(f"不支持的报告格式: {format}")
 
+        with self.timed_stage("render", result):
+            if format == "text":
+                return result.summary()
+            return self._generate_html_report(result)
+
+    def write_batch_report(self, results: Iterable[AnalysisResult], file: TextIO,
+                           title: str = "价值投资批量分析报告") -> int:
+        """
+        将一批分析结果写成一个HTML报告（汇总表 + 每只股票的详情）
+
+        逐只写入file，不在内存中拼接整个页面，适合上万只股票的批次。
+
+        Args:
+            results: 分析结果，可以是ResultSet或iter_analyze的生成器
+            file: 输出文件（文本模式）
+            title: 报告标题
+
+        Returns:
+            写出的股票数
+        """
+        from .batch_report import write_batch_report
+        return write_batch_report(results, file, title,
+                                  timed=lambda result: self.timed_stage("render", result))
+
+    def write_reports(self, results: Iterable[AnalysisResult], output_dir: str,
+                      workers: Optional[int] = None, force: bool = False) -> Dict[str, int]:
+        """
+        为每只股票生成一份HTML报告，写入同一目录
+
+        渲染分布到多个进程，报告共用一份样式文件；结果未变化且报告仍在的股票跳过。
+
+        Args:
+            results: 分析结果，可以是ResultSet或iter_analyze的生成器
+            output_dir: 报告目录
+            workers: 渲染进程数，默认CPU核数
+            force: 为True时全部重新生成
+
+        Returns:
+            包含rendered、skipped和failed数量的字典
+        """
+        from .report_directory import write_report_directory
+        return write_report_directory(results, output_dir, workers=workers, force=force)
+
     def _generate_html_report(self, result: AnalysisResult) -> str:
         """生成HTML报告 - 简化版"""
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>价值投资分析报告 - {result.name} ({result.symbol})</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 40px; }}
-        .header {{ text-align: center; margin-bottom: 30px; }}
-        .section {{ margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; border-radius: 5px; }}
-        .metric {{ display: inline-block; margin-right: 20px; margin-bottom: 10px; }}
-        .score {{ font-size: 24px; font-weight: bold; }}
-        .recommendation {{ color: {'green' if result.recommendation.value in ['强烈买入', '买入'] else 'red' if result.recommendation.value in ['强烈卖出', '卖出'] else 'orange'}; font-weight: bold; }}
-        .reason {{ color: green; }}
-        .risk {{ color: red; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>价值投资分析报告</h1>
-        <h2>{result.name} ({result.symbol}) - {result.market}股</h2>
-        <p>分析日期: {result.analysis_date}</p>
-    </div>
-
-    <div class="section">
-        <h3>投资建议</h3>
-        <p class="recommendation">建议: {result.recommendation.value}</p>
-        <p class="score">总体评分: {result.overall_score}/100</p>
-    </div>
-
-    <div class="section">
-        <h3>估值指标</h3>
-        <div class="metric">PE: {result.pe:.2f}</div>
-        <div class="metric">PB: {result.pb:.2f}</div>
-        <div class="metric">PS: {result.ps:.2f}</div>
-        <div class="metric">股息率: {result.dividend_yield:.2f}%</div>
-        <div class="metric">市值: {result.market_cap:,.0f}</div>
-    </div>
-
-    <div class="section">
-        <h3>推荐理由</h3>
-        <ul>
-            {''.join(f'<li class="reason">{reason}</li>' for reason in result.reasons)}
-        </ul>
-    </div>
-
-    <div class="section">
-        <h3>风险提示</h3>
-        <ul>
-            {''.join(f'<li class="risk">{risk}</li>' for risk in result.risks)}
-        </ul>
-    </div>
-
-    <div class="section">
-        <h3>免责声明</h3>
-        <p>本报告基于模拟数据生成，仅供参考。实际使用时需要配置真实数据源。</p>
-        <p>股市有风险，投资需谨慎。</p>
-    </div>
-</body>
-</html>
-        """
-        return html
\ No newline at end of file
+        from .report_template import render_stock_report
+        return render_stock_report(result)
\ No newline at end of file
@@ -5,11 +5,16 @@
 import argparse
 import sys
 import os
-from typing import List
+from typing import Iterator, List, Sequence, TextIO, Tuple, Union
 import json
+import textwrap
 
 from .utils.logger import setup_logger
+from .utils.timing import format_timings
+from .utils.metrics import MetricsServer
 from .analysis.value_investing import ValueInvestingAnalyzer
+from .analysis.leaderboard import Leaderboard, parse_sort_fields
+from .analysis.result_set import AnalysisResult
 
 logger = setup_logger()
 
@@ -23,7 +28,18 @@ def main():
 示例:
   %(prog)s analyze 000001 --market A
   %(prog)s batch-analyze 000001 000002 600519 --market A
+  %(prog)s batch-analyze 000001 000002 600519 --market A --workers 8
+  %(prog)s batch-analyze 600519 00700.HK 000001,A 09988,HK --market auto
+  %(prog)s batch-analyze --symbols-file symbols.txt --stream --workers 8
+  %(prog)s batch-analyze --symbols-file symbols.txt --workers 8 --timings
+  %(prog)s batch-analyze --symbols-file symbols.txt --top 20 --tie-break pe:asc --snapshot-every 1000
+  %(prog)s batch-analyze --symbols-file symbols.txt --incremental --output changed.json
+  %(prog)s history --backfill --market A --years 10
+  %(prog)s history --record --market A
+  %(prog)s history 600519 --start 20150101 --fields pe,pb
+  %(prog)s screen "pe<15 and pb<1.5 and dividend_yield>4" --market A --limit 20
   %(prog)s report 000001 --market A --output report.html
+  %(prog)s metrics 000001 600519 --serve --port 9464
         """
     )
 
@@ -40,12 +56,44 @@ def main():
 
     # batch-analyze命令
     batch_parser = subparsers.add_parser("batch-analyze", help="批量分析股票")
-    batch_parser.add_argument("symbols", nargs="+", help="股票代码列表")
-    batch_parser.add_argument("--market", choices=["A", "HK"], default="A",
-                             help="市场类型")
+    batch_parser.add_argument("symbols", nargs="*",
+                             help="股票代码列表，可写作 代码,市场 指定市场，如 00700,HK")
+    batch_parser.add_argument("--symbols-file",
+                             help="从文件逐行读取股票代码（可为 代码,市场），- 表示标准输入")
+    batch_parser.add_argument("--market", choices=["A", "HK", "auto"], default="A",
+                             help="未指定市场的代码所属市场，auto表示按代码格式识别"
+                                  "（6位为A股，5位或.HK后缀为港股）")
     batch_parser.add_argument("--output", help="输出文件路径")
-    batch_parser.add_argument("--format", choices=["json", "text"], default="json",
-                             help="输出格式")
+    batch_parser.add_argument("--format", choices=["json", "text", "ndjson", "html"], default="json",
+                             help="输出格式，ndjson每完成一只股票输出一行，"
+                                  "html为可排序、分页的单页报告（逐只写入文件）")
+    batch_parser.add_argument("--stream", action="store_true",
+                             help="流式输出，等同于 --format ndjson")
+    batch_parser.add_argument("--workers", type=int, default=1,
+                             help="并发线程数，默认1（顺序分析）")
+    batch_parser.add_argument("--timings", action="store_true",
+                             help="结束时输出各阶段耗时统计（写入标准错误）")
+    batch_parser.add_argument("--top", type=int,
+                             help="只保留总体评分最高的N只，分析过程中即丢弃其余结果；"
+                                  "ndjson格式仍逐只输出，摘要列出前N名")
+    batch_parser.add_argument("--tie-break", default="",
+                             help="评分相同时依次比较的字段，逗号分隔，如 pe:asc,dividend_yield:desc")
+    batch_parser.add_argument("--snapshot-every", type=int,
+                             help="每分析N只将当前排行榜写入标准错误")
+    batch_parser.add_argument("--incremental", action="store_true",
+                             help="增量分析：输入未变化的股票沿用上次保存的结果，"
+                                  "只输出有变化的股票（--top时仍为全部股票的排行榜）")
+
+    # screen命令
+    screen_parser = subparsers.add_parser("screen", help="全市场筛选")
+    screen_parser.add_argument("expression",
+                              help="筛选表达式，如 \"pe<15 and pb<1.5 and dividend_yield>4\"")
+    screen_parser.add_argument("--market", choices=["A", "HK"], default="A",
+                              help="市场类型")
+    screen_parser.add_argument("--limit", type=int, help="最多输出的股票数")
+    screen_parser.add_argument("--output", help="输出文件路径")
+    screen_parser.add_argument("--format", choices=["json", "text"], default="text",
+                              help="输出格式")
 
     # report命令
     report_parser = subparsers.add_parser("report", help="生成分析报告")
@@ -56,6 +104,57 @@ def main():
     report_parser.add_argument("--format", choices=["html"], default="html",
                               help="报告格式")
 
+    # report-batch命令
+    report_batch_parser = subparsers.add_parser("report-batch",
+                                                help="为多只股票各生成一份HTML报告，写入同一目录")
+    report_batch_parser.add_argument("symbols", nargs="*",
+                                     help="股票代码列表，可写作 代码,市场 指定市场")
+    report_batch_parser.add_argument("--symbols-file",
+                                     help="从文件逐行读取股票代码（可为 代码,市场），- 表示标准输入")
+    report_batch_parser.add_argument("--market", choices=["A", "HK", "auto"], default="A",
+                                     help="未指定市场的代码所属市场，auto表示按代码格式识别")
+    report_batch_parser.add_argument("--output-dir", required=True, help="报告目录")
+    report_batch_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                                     help="渲染进程数（同时作为分析线程数），默认CPU核数")
+    report_batch_parser.add_argument("--force", action="store_true",
+                                     help="忽略上次的记录，全部重新生成")
+    report_batch_parser.add_argument("--incremental", action="store_true",
+                                     help="输入未变化的股票沿用上次保存的分析结果，不再重新评分")
+
+    # history命令
+    history_parser = subparsers.add_parser("history", help="估值历史存储：追加、初始化和查询")
+    history_parser.add_argument("symbols", nargs="*", help="查询或初始化的股票代码")
+    history_parser.add_argument("--market", choices=["A", "HK"], default="A",
+                               help="市场类型")
+    history_parser.add_argument("--record", action="store_true",
+                               help="获取全市场估值快照并追加为 --date 当天（默认今天）的历史")
+    history_parser.add_argument("--backfill", action="store_true",
+                               help="从数据源获取多年估值历史写入存储，未指定代码时为全市场")
+    history_parser.add_argument("--years", type=int, default=10, help="--backfill 获取的年数")
+    history_parser.add_argument("--date", help="交易日（YYYYMMDD）；未指定代码时输出该日全部股票的估值")
+    history_parser.add_argument("--start", help="查询起始日期（YYYYMMDD，含）")
+    history_parser.add_argument("--end", help="查询结束日期（YYYYMMDD，含）")
+    history_parser.add_argument("--fields", default="",
+                               help="查询的字段，逗号分隔，默认 pe,pb,dividend_yield")
+    history_parser.add_argument("--format", choices=["json", "text"], default="text",
+                               help="输出格式")
+    history_parser.add_argument("--output", help="输出文件路径")
+
+    # metrics命令
+    metrics_parser = subparsers.add_parser("metrics", help="输出Prometheus格式指标")
+    metrics_parser.add_argument("symbols", nargs="*", help="输出前先分析的股票代码（可选）")
+    metrics_parser.add_argument("--symbols-file",
+                               help="股票代码文件，每行一个代码，'-'表示标准输入")
+    metrics_parser.add_argument("--market", choices=["A", "HK", "auto"], default="A",
+                               help="未指定市场的代码所属市场，auto表示按代码格式识别")
+    metrics_parser.add_argument("--workers", type=int, default=1,
+                               help="并发线程数，默认1（顺序分析）")
+    metrics_parser.add_argument("--output", help="输出文件路径")
+    metrics_parser.add_argument("--serve", action="store_true",
+                               help="分析完成后启动本地HTTP端点（GET /metrics），直到中断")
+    metrics_parser.add_argument("--host", default="127.0.0.1", help="端点监听地址")
+    metrics_parser.add_argument("--port", type=int, default=9464, help="端点监听端口")
+
     args = parser.parse_args()
 
     if not args.command:
@@ -65,14 +164,24 @@ def main():
     try:
         # 初始化分析器
         tushare_token = os.getenv("TUSHARE_TOKEN")
-        analyzer = ValueInvestingAnalyzer(tushare_token)
+        analyzer = ValueInvestingAnalyzer(
+            tushare_token, incremental=getattr(args, "incremental", False)
+        )
 
         if args.command == "analyze":
             analyze_stock(analyzer, args)
         elif args.command == "batch-analyze":
             batch_analyze(analyzer, args)
+        elif args.command == "screen":
+            screen_stocks(analyzer, args)
         elif args.command == "report":
             generate_report(analyzer, args)
+        elif args.command == "report-batch":
+            generate_reports(analyzer, args)
+        elif args.command == "metrics":
+            dump_metrics(analyzer, args)
+        elif args.command == "history":
+            valuation_history(analyzer, args)
         else:
             parser.print_help()
 
@@ -109,12 +218,216 @@ def analyze_stock(analyzer: ValueInvestingAnalyzer, args):
         raise
 
 
+def parse_symbol_entry(text: str) -> Union[str, Tuple[str, str]]:
+    """解析一项代码：单独的代码原样返回，"代码,市场"或"代码 市场"返回二元组"""
+    parts = text.replace(",", " ").split()
+    if len(parts) == 2:
+        market = parts[1].upper()
+        return parts[0], "auto" if market == "AUTO" else market
+    if len(parts) != 1:
+        raise ValueError(f"无法解析股票代码: {text}")
+    return parts[0]
+
+
+def iter_symbols(args) -> Iterator[Union[str, Tuple[str, str]]]:
+    """依次产出命令行参数和代码文件中的股票代码，文件按行惰性读取"""
+    for symbol in args.symbols:
+        yield parse_symbol_entry(symbol)
+
+    if not args.symbols_file:
+        return
+
+    if args.symbols_file == "-":
+        stream = sys.stdin
+    else:
+        stream = open(args.symbols_file, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            symbol = line.strip()
+            # 跳过空行和注释
+            if symbol and not symbol.startswith("#"):
+                yield parse_symbol_entry(symbol)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
 def batch_analyze(analyzer: ValueInvestingAnalyzer, args):
     """批量分析股票"""
-    logger.info(f"批量分析 {len(args.symbols)} 只股票")
+    if not args.symbols and not args.symbols_file:
+        raise ValueError("请提供股票代码或 --symbols-file")
+    if args.workers < 1:
+        raise ValueError(f"并发线程数必须大于0: {args.workers}")
+    if args.top is not None and args.top < 1:
+        raise ValueError(f"--top必须大于0: {args.top}")
+    if args.snapshot_every is not None and args.snapshot_every < 1:
+        raise ValueError(f"--snapshot-every必须大于0: {args.snapshot_every}")
+    # 先校验排序字段，避免分析结束后才报错
+    parse_sort_fields(args.tie_break)
+    if args.stream and args.format not in ("json", "ndjson"):
+        raise ValueError(f"--stream只支持ndjson格式: {args.format}")
+    if args.stream or args.format == "ndjson":
+        stream_batch_analyze(analyzer, args)
+        return
+
+    if args.snapshot_every is not None and args.top is None:
+        raise ValueError("--snapshot-every需要与 --top 或 --format ndjson 一起使用")
+
+    try:
+        if args.top is not None:
+            # 排行榜模式：逐只读取代码，只保留前N名
+            logger.info(f"批量分析，保留前 {args.top} 名")
+            for snapshot in analyzer.iter_leaderboard(
+                    iter_symbols(args), args.market, args.top,
+                    max_workers=args.workers, tie_breaks=args.tie_break,
+                    every=args.snapshot_every):
+                if snapshot.final:
+                    results, count = snapshot.results, snapshot.analyzed
+                    ranked = results
+                else:
+                    print_leaderboard(snapshot.results, snapshot.analyzed, sys.stderr)
+        else:
+            symbols = list(iter_symbols(args))
+            logger.info(f"批量分析 {len(symbols)} 只股票")
+            # 列式结果集，输出时逐个构造结果，大批次占用的内存更少
+            results = analyzer.batch_analyze(symbols, args.market,
+                                             max_workers=args.workers, columnar=True)
+            count = len(results)
+            ranked = results
+            if analyzer.result_store is not None:
+                # 增量模式只输出有变化的股票，摘要仍基于全部结果
+                results = results.filter(lambda result: not analyzer.is_reused(result))
+                logger.info(f"{len(results)} 只股票有变化，{count - len(results)} 只沿用上次结果")
+
+        if args.format == "html":
+            # 逐只写入文件，不在内存中拼接整个页面
+            out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+            try:
+                analyzer.write_batch_report(results, out)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            if args.output:
+                logger.info(f"HTML报告已保存到: {args.output}")
+        elif args.format == "json":
+            # 逐只序列化以便计时，拼接结果与整体json.dumps(indent=2)一致
+            pieces = []
+            for result in results:
+                with analyzer.timed_stage("serialize", result):
+                    pieces.append(json.dumps(result.to_dict(), indent=2, ensure_ascii=False))
+            if pieces:
+                output = "[\n" + ",\n".join(textwrap.indent(piece, "  ") for piece in pieces) + "\n]"
+            else:
+                output = "[]"
+        elif args.format == "text":
+            output = ""
+            for i, result in enumerate(results, 1):
+                with analyzer.timed_stage("render", result):
+                    output += f"{i}. {result.name} ({result.symbol}): {result.overall_score:.1f}分 - {result.recommendation.value}\n"
+                    output += f"   PE: {result.pe:.1f}, PB: {result.pb:.1f}, 股息率: {result.dividend_yield:.1f}%\n\n"
+        else:
+            raise ValueError(f"不支持的格式: {args.format}")
+
+        if args.format != "html":
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    f.write(output)
+                logger.info(f"结果已保存到: {args.output}")
+            else:
+                print(output)
+
+        # 打印摘要
+        print(f"\n分析完成，共分析 {count} 只股票")
+        if analyzer.result_store is not None:
+            print_incremental_summary(analyzer)
+        print("Top 3 推荐股票:")
+        for i, result in enumerate(ranked[:3], 1):
+            print(f"{i}. {result.name} ({result.symbol}): {result.overall_score:.1f}分 - {result.recommendation.value}")
+
+        if args.timings:
+            print_timings(analyzer)
+
+    except Exception as e:
+        logger.error(f"批量分析失败: {e}")
+        raise
+
+
+def stream_batch_analyze(analyzer: ValueInvestingAnalyzer, args):
+    """流式批量分析：每完成一只股票写出一行紧凑JSON（NDJSON），增量模式只写出有变化的股票"""
+    logger.info("流式批量分析")
 
     try:
-        results = analyzer.batch_analyze(args.symbols, args.market)
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        # 只保留前N名用于摘要，内存占用与批次大小无关
+        board = Leaderboard(args.top or 3, tie_breaks=args.tie_break)
+        try:
+            for result in analyzer.iter_analyze(iter_symbols(args), args.market,
+                                                max_workers=args.workers):
+                board.push(result)
+                if args.snapshot_every and board.seen % args.snapshot_every == 0:
+                    print_leaderboard(board.results(), board.seen, sys.stderr)
+                if analyzer.is_reused(result):
+                    continue
+
+                with analyzer.timed_stage("serialize", result):
+                    line = json.dumps(result.to_dict(), ensure_ascii=False,
+                                      separators=(",", ":"))
+                out.write(line)
+                out.write("\n")
+                out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if args.output:
+            logger.info(f"结果已保存到: {args.output}")
+
+        # 输出到标准输出时摘要写入标准错误，保持标准输出为纯NDJSON
+        summary = sys.stdout if args.output else sys.stderr
+        print(f"\n分析完成，共分析 {board.seen} 只股票", file=summary)
+        if analyzer.result_store is not None:
+            print_incremental_summary(analyzer, summary)
+        print(f"Top {board.size} 推荐股票:", file=summary)
+        for i, result in enumerate(board.results(), 1):
+            print(f"{i}. {result.name} ({result.symbol}): {result.overall_score:.1f}分 - {result.recommendation.value}",
+                  file=summary)
+
+        if args.timings:
+            print_timings(analyzer)
+
+    except Exception as e:
+        logger.error(f"批量分析失败: {e}")
+        raise
+
+
+def print_incremental_summary(analyzer: ValueInvestingAnalyzer, file: TextIO = sys.stdout):
+    """输出增量分析的重新评分和沿用情况"""
+    stats = analyzer.result_store.stats()
+    print(f"重新评分 {stats['misses']} 只，沿用上次结果 {stats['hits']} 只"
+          f"（结果存储: {stats['path']}）", file=file)
+
+
+def print_leaderboard(results: Sequence[AnalysisResult], analyzed: int, file: TextIO):
+    """输出排行榜中间快照"""
+    print(f"\n[已分析 {analyzed} 只] 当前前 {len(results)} 名:", file=file)
+    for i, result in enumerate(results, 1):
+        print(f"  {i}. {result.name} ({result.symbol}): {result.overall_score:.1f}分 - {result.recommendation.value}",
+              file=file)
+    file.flush()
+
+
+def print_timings(analyzer: ValueInvestingAnalyzer):
+    """将各阶段耗时统计写入标准错误，不影响标准输出中的结果"""
+    print("\n各阶段耗时:", file=sys.stderr)
+    print(format_timings(analyzer.stats()), file=sys.stderr)
+
+
+def screen_stocks(analyzer: ValueInvestingAnalyzer, args):
+    """全市场筛选"""
+    logger.info(f"全市场筛选: {args.expression} ({args.market})")
+
+    try:
+        results = analyzer.screen(args.expression, args.market, limit=args.limit)
 
         if args.format == "json":
             output = json.dumps(
@@ -126,7 +439,7 @@ def batch_analyze(analyzer: ValueInvestingAnalyzer, args):
             output = ""
             for i, result in enumerate(results, 1):
                 output += f"{i}. {result.name} ({result.symbol}): {result.overall_score:.1f}分 - {result.recommendation.value}\n"
-                output += f"   PE: {result.pe:.1f}, PB: {result.pb:.1f}, 股息率: {result.dividend_yield:.1f}%\n\n"
+                output += f"   PE: {result.pe:.1f}, PB: {result.pb:.1f}, 股息率: {result.dividend_yield:.1f}%\n"
         else:
             raise ValueError(f"不支持的格式: {args.format}")
 
@@ -137,14 +450,33 @@ def batch_analyze(analyzer: ValueInvestingAnalyzer, args):
         else:
             print(output)
 
-        # 打印摘要
-        print(f"\n分析完成，共分析 {len(results)} 只股票")
-        print("Top 3 推荐股票:")
-        for i, result in enumerate(results[:3], 1):
-            print(f"{i}. {result.name} ({result.symbol}): {result.overall_score:.1f}分 - {result.recommendation.value}")
+        print(f"\n筛选完成，共 {len(results)} 只股票满足条件")
 
     except Exception as e:
-        logger.error(f"批量分析失败: {e}")
+        logger.error(f"全市场筛选失败: {e}")
+        raise
+
+
+def generate_reports(analyzer: ValueInvestingAnalyzer, args):
+    """为多只股票各生成一份HTML报告，结果未变化的股票跳过"""
+    if not args.symbols and not args.symbols_file:
+        raise ValueError("请提供股票代码或 --symbols-file")
+    if args.workers < 1:
+        raise ValueError(f"进程数必须大于0: {args.workers}")
+    logger.info(f"批量生成报告到: {args.output_dir}")
+
+    try:
+        # 分析结果逐只交给渲染进程，不在内存中保留整批结果
+        results = analyzer.iter_analyze(iter_symbols(args), args.market, max_workers=args.workers)
+        stats = analyzer.write_reports(results, args.output_dir, workers=args.workers,
+                                       force=args.force)
+        print(f"报告已写入 {args.output_dir}: 生成 {stats['rendered']} 份，"
+              f"未变化跳过 {stats['skipped']} 份，失败 {stats['failed']} 份")
+        if analyzer.result_store is not None:
+            print_incremental_summary(analyzer)
+
+    except Exception as e:
+        logger.error(f"批量生成报告失败: {e}")
         raise
 
 
@@ -168,5 +500,85 @@ def generate_report(analyzer: ValueInvestingAnalyzer, args):
         raise
 
 
+def valuation_history(analyzer: ValueInvestingAnalyzer, args):
+    """估值历史：追加当日快照、从数据源初始化，或查询区间和某日全市场数据"""
+    data_manager = analyzer.data_manager
+    store = data_manager.history_store
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] or None
+
+    try:
+        if args.record:
+            count = data_manager.record_valuation_snapshot(args.market, args.date)
+            print(f"已追加 {count} 只股票的估值（{args.market}）")
+            return
+        if args.backfill:
+            symbols = args.symbols or data_manager.get_universe(args.market).column("symbol")
+            count = data_manager.backfill_valuation_history(symbols, args.market, args.years)
+            print(f"已写入 {count} 只股票的估值历史（{args.market}）")
+            return
+
+        if args.symbols:
+            data = {symbol: store.get_history(symbol, args.market, args.start, args.end, fields)
+                    for symbol in args.symbols}
+        elif args.date:
+            data = store.get_snapshot(args.market, args.date, fields)
+        else:
+            data = store.stats()
+
+        if args.format == "json" or not (args.symbols or args.date):
+            output = json.dumps(data, indent=2, ensure_ascii=False)
+        elif args.symbols:
+            output = ""
+            for symbol, history in data.items():
+                output += f"{symbol}: {len(history.get('trade_date', []))} 个交易日\n"
+                names = [name for name in history if name != "trade_date"]
+                for i, trade_date in enumerate(history.get("trade_date", [])):
+                    values = ", ".join(f"{name}={history[name][i]:.2f}" for name in names)
+                    output += f"  {trade_date}  {values}\n"
+        else:
+            output = f"{args.date}: {len(data)} 只股票\n"
+            for symbol, valuation in data.items():
+                values = ", ".join(f"{name}={value:.2f}" for name, value in valuation.items())
+                output += f"  {symbol}  {values}\n"
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output)
+            logger.info(f"结果已保存到: {args.output}")
+        else:
+            print(output)
+
+    except Exception as e:
+        logger.error(f"估值历史操作失败: {e}")
+        raise
+
+
+def dump_metrics(analyzer: ValueInvestingAnalyzer, args):
+    """输出指标快照，可先分析一批股票，或启动HTTP端点持续提供指标"""
+    try:
+        if args.symbols or args.symbols_file:
+            # 只为产生指标，逐只消费结果，不保留在内存中
+            for _ in analyzer.iter_analyze(iter_symbols(args), args.market,
+                                           max_workers=args.workers):
+                pass
+
+        output = analyzer.metrics()
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output)
+            logger.info(f"指标已保存到: {args.output}")
+        elif not args.serve:
+            sys.stdout.write(output)
+
+        if args.serve:
+            MetricsServer(analyzer.metrics, args.host, args.port).serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error(f"输出指标失败: {e}")
+        raise
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,8 +3,21 @@
 提供A股和港股数据获取功能
 """
 
-from .tushare_source import TushareSource
-from .akshare_source import AkshareSource
-from .data_manager import DataManager
+from ..utils.lazy import lazy_module_attrs
 
-__all__ = ["TushareSource", "AkshareSource", "DataManager"]
\ No newline at end of file
+# 导出名 -> 所在模块，数据源在首次访问时才导入
+_LAZY = {
+    "TushareSource": ".tushare_source",
+    "AkshareSource": ".akshare_source",
+    "SyntheticSource": ".synthetic_source",
+    "HttpSource": ".http_source",
+    "DataManager": ".data_manager",
+    "Universe": ".universe",
+    "ValuationHistoryStore": ".history_store",
+    "resolve_market": ".data_manager"
+}
+
+__all__ = ["TushareSource", "AkshareSource", "SyntheticSource", "HttpSource",
+           "DataManager", "Universe", "ValuationHistoryStore", "resolve_market"]
+
+__getattr__, __dir__ = lazy_module_attrs(__name__, _LAZY)
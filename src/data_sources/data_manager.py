@@ -4,15 +4,106 @@
 """
 
 import os
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Sequence, Tuple, Union
 import logging
 from datetime import datetime
 
-from .tushare_source import TushareSource
-from .akshare_source import AkshareSource
+from .universe import SCHEMAS, Universe
+from ..utils.cache import TTLCache
+from ..utils.singleflight import SingleFlight
+from ..utils.timing import StageTimer
+from ..utils.metrics import MetricsWriter
 
 logger = logging.getLogger(__name__)
 
+# 股票池估值列，与get_valuation_indicators返回的字段一致
+VALUATION_FIELDS = ("pe", "pb", "ps", "dividend_yield", "market_cap")
+
+# 计算历史分位用到的估值字段，与history_store.HISTORY_FIELDS一致（该模块在首次使用时才导入）
+PERCENTILE_INPUTS = ("pe", "pb", "dividend_yield")
+
+# 支持的市场，A表示A股，HK表示港股
+MARKETS = tuple(SCHEMAS)
+
+# 批量接口中的一项：股票代码，或(股票代码, 市场)
+SymbolEntry = Union[str, Tuple[str, str]]
+
+
+def resolve_market(symbol: str) -> Tuple[str, str]:
+    """
+    根据代码格式识别市场
+
+    支持 600000、600000.SH、sh600000（A股）和 00700、700、0700.HK、hk00700（港股），
+    6位数字为A股，不超过5位数字为港股。
+
+    Args:
+        symbol: 股票代码
+
+    Returns:
+        (规范化后的代码, 市场)，A股为6位代码，港股为5位代码
+
+    Raises:
+        ValueError: 无法识别代码格式
+    """
+    code = symbol.strip().upper()
+    market = None
+    if code.endswith(".HK"):
+        code, market = code[:-3], "HK"
+    elif code.endswith((".SH", ".SZ", ".BJ")):
+        code, market = code[:-3], "A"
+    elif code.startswith("HK"):
+        code, market = code[2:], "HK"
+    elif code.startswith(("SH", "SZ", "BJ")):
+        code, market = code[2:], "A"
+
+    if code.isdigit():
+        if market is None:
+            market = "A" if len(code) == 6 else "HK" if len(code) <= 5 else None
+        if market == "A" and len(code) == 6:
+            return code, "A"
+        if market == "HK" and len(code) <= 5:
+            return code.zfill(5), "HK"
+    raise ValueError(f"无法识别股票代码的市场: {symbol}")
+
+
+def iter_market_pairs(symbols: Iterable[SymbolEntry],
+                      market: str = "A") -> Iterator[Tuple[str, str]]:
+    """
+    将批量接口的输入转换为(股票代码, 市场)
+
+    Args:
+        symbols: 股票代码或(股票代码, 市场)的序列
+        market: 单独给出代码时使用的市场，auto表示按代码格式识别；
+            二元组中的市场为auto或空时同样按代码格式识别
+
+    Yields:
+        (股票代码, 市场)，无法识别市场的代码记录错误后跳过，不影响批次中的其他股票
+    """
+    for entry in symbols:
+        if isinstance(entry, str):
+            symbol, entry_market = entry, market
+        else:
+            symbol, entry_market = entry
+        if not entry_market or entry_market == "auto":
+            try:
+                yield resolve_market(symbol)
+            except ValueError as e:
+                logger.error(str(e))
+        elif entry_market in MARKETS:
+            yield symbol, entry_market
+        else:
+            logger.error(f"不支持的市场类型: {symbol} ({entry_market})")
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """读取布尔型环境变量"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 
 class DataManager:
     """数据管理器类 - 无依赖版"""
@@ -24,11 +115,131 @@ class DataManager:
         Args:
             tushare_token: tushare token
         """
-        self.tushare_source = TushareSource(tushare_token)
-        self.akshare_source = AkshareSource()
+        # DATA_SOURCE选择数据源：mock（默认模拟数据）、synthetic（合成大规模股票池）、
+        # http（tushare协议接口，如本地替身服务）；后两者同时提供A股和港股数据。
+        # 数据源在首次用到对应市场时才导入和创建，只查询港股时不会初始化tushare
+        self.source_kind = os.getenv("DATA_SOURCE", "mock").strip().lower()
+        self._tushare_token = tushare_token
+        self._sources: Dict[str, Any] = {}
+        self._sources_lock = threading.Lock()
+
+        # 不同数据源的磁盘缓存和估值历史分开存放，避免合成数据混入真实数据
+        cache_filename = "gems_cache.sqlite3"
+        self._history_dirname = "history"
+        if self.source_kind == "synthetic":
+            self._synthetic_size = int(os.getenv("SYNTHETIC_SIZE", "10000"))
+            self._synthetic_seed = int(os.getenv("SYNTHETIC_SEED", "42"))
+            cache_filename = (
+                f"gems_cache_synthetic_{self._synthetic_size}_{self._synthetic_seed}.sqlite3"
+            )
+            self._history_dirname = (
+                f"history_synthetic_{self._synthetic_size}_{self._synthetic_seed}"
+            )
+        elif self.source_kind == "http":
+            cache_filename = "gems_cache_http.sqlite3"
+            self._history_dirname = "history_http"
+
+        # 内存缓存，读取CACHE_ENABLED / CACHE_TTL / CACHE_MAX_SIZE
+        self.cache_enabled = _env_flag("CACHE_ENABLED", True)
+        self.cache: Optional[TTLCache] = None
+        if self.cache_enabled:
+            self.cache = TTLCache(
+                maxsize=int(os.getenv("CACHE_MAX_SIZE", "16384")),
+                ttl=float(os.getenv("CACHE_TTL", "3600"))
+            )
+
+        # 磁盘缓存（DiskCache）位于CACHE_DIR，多个进程共享；打开失败时退化为仅内存缓存。
+        # 未配置磁盘缓存时不导入sqlite3
+        self.disk_cache = None
+        cache_dir = os.getenv("CACHE_DIR", ".cache")
+        if self.cache_enabled and cache_dir:
+            try:
+                from ..utils.disk_cache import DiskCache
+                self.disk_cache = DiskCache(cache_dir, ttl=self.cache.ttl,
+                                            filename=cache_filename)
+            except Exception as e:
+                logger.warning(f"磁盘缓存不可用，仅使用内存缓存: {e}")
+
+        # 相同(数据类型, 市场, 代码)的并发请求只向数据源发起一次
+        self._flight = SingleFlight()
+
+        # 批次规模达到该阈值时改用全市场估值快照，一次请求代替逐只请求
+        self.bulk_fetch_threshold = int(os.getenv("BULK_FETCH_THRESHOLD", "50"))
+        self._snapshot_loaded_at: Dict[str, float] = {}
+
+        # 列式股票池：market -> Universe，每个数据版本只构建一次
+        self._universes: Dict[str, Universe] = {}
+        self._universe_built_at: Dict[str, float] = {}
+        # 附加了估值列的股票池：market -> (数据版本, 构建时间, Universe)
+        self._valuation_universes: Dict[str, tuple] = {}
+        self._universe_version = 0
+        self._universe_lock = threading.Lock()
+
+        # 估值历史存储，首次用到时创建
+        self._history_store = None
 
         logger.info("数据管理器初始化完成（无依赖版）")
 
+    @property
+    def tushare_source(self):
+        """A股数据源，首次访问时创建"""
+        return self._source("A")
+
+    @tushare_source.setter
+    def tushare_source(self, source) -> None:
+        self._sources["A"] = source
+
+    @property
+    def akshare_source(self):
+        """港股数据源，首次访问时创建"""
+        return self._source("HK")
+
+    @akshare_source.setter
+    def akshare_source(self, source) -> None:
+        self._sources["HK"] = source
+
+    def _source(self, market: str):
+        source = self._sources.get(market)
+        if source is None:
+            with self._sources_lock:
+                source = self._sources.get(market)
+                if source is None:
+                    source = self._create_source(market)
+        return source
+
+    @property
+    def history_store(self):
+        """估值历史存储，首次访问时创建"""
+        if self._history_store is None:
+            with self._sources_lock:
+                if self._history_store is None:
+                    from .history_store import ValuationHistoryStore
+                    self._history_store = ValuationHistoryStore.from_env(self._history_dirname)
+        return self._history_store
+
+    @history_store.setter
+    def history_store(self, store) -> None:
+        self._history_store = store
+
+    def _create_source(self, market: str):
+        """导入并创建数据源，调用方需持有_sources_lock"""
+        if self.source_kind == "synthetic":
+            from .synthetic_source import SyntheticSource
+            source = SyntheticSource(size=self._synthetic_size, seed=self._synthetic_seed)
+            self._sources["A"] = self._sources["HK"] = source
+        elif self.source_kind == "http":
+            from .http_source import HttpSource
+            source = HttpSource(os.getenv("DATA_SOURCE_URL", "http://127.0.0.1:8765"),
+                                self._tushare_token)
+            self._sources["A"] = self._sources["HK"] = source
+        elif market == "A":
+            from .tushare_source import TushareSource
+            source = self._sources["A"] = TushareSource(self._tushare_token)
+        else:
+            from .akshare_source import AkshareSource
+            source = self._sources["HK"] = AkshareSource()
+        return source
+
     def get_stock_basic(self, market: str = "A") -> list:
         """
         获取股票基本信息
@@ -37,15 +248,10 @@ class DataManager:
             market: 市场类型，A表示A股，HK表示港股
 
         Returns:
-            包含股票基本信息的列表
+            包含股票基本信息的列表，字段与数据源原始格式一致
         """
         try:
-            if market == "A":
-                return self.tushare_source.get_stock_basic(market)
-            elif market == "HK":
-                return self.akshare_source.get_hk_stock_basic()
-            else:
-                raise ValueError(f"不支持的市场类型: {market}")
+            return self.get_universe(market).to_records(source_keys=True)
         except Exception as e:
             logger.error(f"获取股票基本信息失败: {e}")
             return []
@@ -61,36 +267,460 @@ class DataManager:
         Returns:
             包含估值指标的字典
         """
+        key = ("valuation", market, symbol)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return dict(cached)
+
+        def _fetch() -> Dict[str, Any]:
+            # 上一个合并窗口可能刚在检查缓存之后写入，成为新的leader时再查一次
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+            if market == "A":
+                data = self.tushare_source.get_valuation_indicators(symbol)
+            elif market == "HK":
+                data = self.akshare_source.get_hk_valuation_indicators(symbol)
+            else:
+                raise ValueError(f"不支持的市场类型: {market}")
+            # 在合并窗口内写缓存，窗口结束后到达的请求可直接命中缓存
+            if data:
+                self._cache_set(key, dict(data))
+            return data
+
         try:
+            data = self._flight.do(key, _fetch)
+        except Exception as e:
+            logger.error(f"获取估值指标失败: {e}")
+            return {}
+
+        # 合并的请求共享同一个结果对象，各自返回副本
+        return dict(data)
+
+    async def get_valuation_indicators_async(self, symbol: str, market: str) -> Dict[str, Any]:
+        """
+        获取估值指标 - 异步版
+
+        Args:
+            symbol: 股票代码
+            market: 市场类型，A表示A股，HK表示港股
+
+        Returns:
+            包含估值指标的字典
+        """
+        key = ("valuation", market, symbol)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return dict(cached)
+
+        async def _fetch() -> Dict[str, Any]:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
             if market == "A":
-                return self.tushare_source.get_valuation_indicators(symbol)
+                data = await self.tushare_source.get_valuation_indicators_async(symbol)
             elif market == "HK":
-                return self.akshare_source.get_hk_valuation_indicators(symbol)
+                data = await self.akshare_source.get_hk_valuation_indicators_async(symbol)
             else:
                 raise ValueError(f"不支持的市场类型: {market}")
+            if data:
+                self._cache_set(key, dict(data))
+            return data
+
+        try:
+            data = await self._flight.do_async(key, _fetch)
         except Exception as e:
             logger.error(f"获取估值指标失败: {e}")
             return {}
 
-    def get_stock_info(self, symbol: str, market: str) -> Dict[str, Any]:
+        return dict(data)
+
+    def get_valuation_snapshot(self, market: str,
+                               trade_date: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        获取全市场估值快照，并写入逐只估值缓存
+
+        Args:
+            market: 市场类型，A表示A股，HK表示港股
+            trade_date: 交易日，格式YYYYMMDD，仅A股有效，默认当天
+
+        Returns:
+            股票代码到估值指标字典的映射
+        """
+        def _fetch() -> Dict[str, Dict[str, Any]]:
+            if market == "A":
+                return self.tushare_source.get_valuation_snapshot(trade_date)
+            elif market == "HK":
+                return self.akshare_source.get_hk_valuation_snapshot()
+            raise ValueError(f"不支持的市场类型: {market}")
+
+        try:
+            snapshot = self._flight.do(("snapshot", market, trade_date), _fetch)
+        except Exception as e:
+            logger.error(f"获取全市场估值快照失败: {e}")
+            return {}
+
+        if snapshot and self.cache is not None:
+            for symbol, valuation in snapshot.items():
+                self.cache.set(("valuation", market, symbol), dict(valuation))
+            if self.disk_cache is not None:
+                try:
+                    self.disk_cache.set_many(
+                        (f"valuation:{market}:{symbol}", valuation)
+                        for symbol, valuation in snapshot.items()
+                    )
+                except Exception as e:
+                    logger.warning(f"写入磁盘缓存失败: {e}")
+        if snapshot:
+            self._snapshot_loaded_at[market] = time.monotonic()
+
+        logger.info(f"{market}全市场估值快照获取完成，共{len(snapshot)}只股票")
+        return snapshot
+
+    def record_valuation_snapshot(self, market: str,
+                                  trade_date: Optional[str] = None) -> int:
+        """
+        获取全市场估值快照并追加到估值历史，每个交易日调用一次
+
+        Args:
+            market: 市场类型，A表示A股，HK表示港股
+            trade_date: 交易日，格式YYYYMMDD，默认当天
+
+        Returns:
+            写入的股票数，获取快照失败或该交易日已保存时为0
+        """
+        trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+        snapshot = self.get_valuation_snapshot(market, trade_date if market == "A" else None)
+        if not snapshot:
+            return 0
+        try:
+            written = self.history_store.append(market, trade_date, snapshot)
+        except Exception as e:
+            logger.error(f"追加估值历史失败: {e}")
+            return 0
+        if written:
+            self._invalidate_percentiles(market)
+        return written
+
+    def backfill_valuation_history(self, symbols: Iterable[str], market: str,
+                                   years: int = 10) -> int:
+        """
+        从数据源获取多年估值历史并写入估值历史存储，用于初始化
+
+        Args:
+            symbols: 股票代码，逐只获取和写入
+            market: 市场类型，A表示A股，HK表示港股
+            years: 年数
+
+        Returns:
+            写入的股票数，数据源不提供估值历史时为0
+        """
+        fetch = getattr(self._source(market), "get_valuation_history", None)
+        if fetch is None:
+            logger.warning(f"{self.source_kind}数据源不提供估值历史")
+            return 0
+        written = self.history_store.backfill(
+            market, ((symbol, fetch(symbol, market, years)) for symbol in symbols)
+        )
+        if written:
+            self._invalidate_percentiles(market)
+        return written
+
+    def get_valuation_percentiles(self, symbols: Sequence[str],
+                                  market: str) -> Dict[str, Dict[str, float]]:
+        """
+        获取当前估值在估值历史中的3/5/10年分位
+
+        未缓存的股票在一次批量计算中完成，结果与估值一样按CACHE_TTL缓存在内存中。
+
+        Args:
+            symbols: 股票代码
+            market: 市场类型，A表示A股，HK表示港股
+
+        Returns:
+            股票代码到 {pe_percentile_3y: 分位, ...} 的映射，没有估值历史的股票为空字典
+        """
+        current = {symbol: self.get_valuation_indicators(symbol, market) for symbol in symbols}
+        return self._valuation_percentiles(current, market)
+
+    def _valuation_percentiles(self, current: Dict[str, Dict[str, Any]],
+                               market: str) -> Dict[str, Dict[str, float]]:
+        """按给定的当前估值计算分位，已缓存的直接返回"""
+        result: Dict[str, Dict[str, float]] = {}
+        missing = {}
+        keys = {}
+        for symbol, valuation in current.items():
+            # 分位取决于当前估值，估值刷新后不能沿用按旧估值算出的分位
+            key = keys[symbol] = ("percentiles", market, symbol,
+                                  *(valuation.get(field) for field in PERCENTILE_INPUTS))
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                result[symbol] = cached
+            elif valuation:
+                missing[symbol] = valuation
+        if not missing:
+            return result
+
+        try:
+            computed = self.history_store.percentiles(market, missing)
+        except Exception as e:
+            logger.error(f"计算估值历史分位失败: {e}")
+            return result
+
+        for symbol in missing:
+            percentiles = result[symbol] = computed.get(symbol, {})
+            if self.cache is not None:
+                self.cache.set(keys[symbol], percentiles)
+        return result
+
+    def _invalidate_percentiles(self, market: str) -> None:
+        """估值历史写入后清除该市场已缓存的分位，包括之前没有估值历史时缓存的空结果"""
+        if self.cache is not None:
+            self.cache.invalidate_where(lambda key: key[0] == "percentiles" and key[1] == market)
+
+    def prefetch_percentiles(self, symbols: Sequence[str], market: str) -> bool:
+        """
+        批次较大时一次算出整批的估值历史分位并写入缓存，之后逐只分析直接命中
+
+        Args:
+            symbols: 本批次的股票代码
+            market: 市场类型，A表示A股，HK表示港股
+
+        Returns:
+            是否进行了批量计算
+        """
+        if self.cache is None or len(symbols) < self.bulk_fetch_threshold:
+            return False
+        self.get_valuation_percentiles(symbols, market)
+        return True
+
+    def prefetch_valuations(self, symbols: Sequence[str], market: str) -> bool:
+        """
+        批次较大时预取全市场估值快照
+
+        symbols达到bulk_fetch_threshold只、且本进程在CACHE_TTL内未取过快照时，
+        用一次快照请求填充逐只估值缓存，之后get_valuation_indicators直接命中缓存。
+        快照中没有的代码仍按原方式逐只获取。
+
+        Args:
+            symbols: 本批次的股票代码，惰性批次可只传入已读取的部分
+            market: 市场类型，A表示A股，HK表示港股
+
+        Returns:
+            是否获取了快照
+        """
+        if self.cache is None or len(symbols) < self.bulk_fetch_threshold:
+            return False
+
+        loaded_at = self._snapshot_loaded_at.get(market)
+        if loaded_at is not None and time.monotonic() - loaded_at < self.cache.ttl:
+            return False
+
+        logger.info(f"批次规模达到{self.bulk_fetch_threshold}只，改用全市场估值快照")
+        return bool(self.get_valuation_snapshot(market))
+
+    def _cache_get(self, key: tuple) -> Any:
+        """依次查询内存缓存和磁盘缓存，磁盘命中时回填内存"""
+        if self.cache is None:
+            return None
+
+        value = self.cache.get(key)
+        if value is not None or self.disk_cache is None:
+            return value
+
+        try:
+            value = self.disk_cache.get(":".join(key))
+        except Exception as e:
+            logger.warning(f"读取磁盘缓存失败: {e}")
+            return None
+        if value is not None:
+            self.cache.set(key, value)
+        return value
+
+    def _cache_set(self, key: tuple, value: Any) -> None:
+        """同时写入内存缓存和磁盘缓存"""
+        if self.cache is None:
+            return
+
+        self.cache.set(key, value)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(":".join(key), value)
+            except Exception as e:
+                logger.warning(f"写入磁盘缓存失败: {e}")
+
+    def invalidate_cache(self, symbol: Optional[str] = None,
+                         market: Optional[str] = None) -> int:
+        """
+        使缓存失效
+
+        Args:
+            symbol: 股票代码，None表示不按代码过滤
+            market: 市场类型，None表示不按市场过滤
+
+        Returns:
+            删除的缓存条目数
+        """
+        removed = 0
+        if self.cache is not None:
+            if symbol is None and market is None:
+                removed = len(self.cache)
+                self.cache.clear()
+            else:
+                def _match(key) -> bool:
+                    if market is not None and key[1] != market:
+                        return False
+                    if symbol is not None:
+                        return key[0] in ("valuation", "percentiles") and key[2] == symbol
+                    return True
+
+                removed = self.cache.invalidate_where(_match)
+
+        if self.disk_cache is not None:
+            try:
+                if symbol is None and market is None:
+                    self.disk_cache.clear()
+                elif symbol is None:
+                    self.disk_cache.delete(f"universe:{market}")
+                    self.disk_cache.delete_prefix(f"valuation:{market}:")
+                elif market is None:
+                    self.disk_cache.delete(f"valuation:A:{symbol}")
+                    self.disk_cache.delete(f"valuation:HK:{symbol}")
+                else:
+                    self.disk_cache.delete(f"valuation:{market}:{symbol}")
+            except Exception as e:
+                logger.warning(f"清理磁盘缓存失败: {e}")
+
+        # 股票列表变化后股票池也需重建；单只股票的估值变化只需重建估值列
+        if symbol is None:
+            self.refresh_universe(market)
+        elif market is None:
+            self._valuation_universes.clear()
+        else:
+            self._valuation_universes.pop(market, None)
+
+        logger.info(f"缓存已失效: {symbol or '全部代码'} ({market or '全部市场'})，删除{removed}条")
+        return removed
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            缓存统计字典，未启用缓存时只包含enabled字段
+        """
+        if self.cache is None:
+            return {"enabled": False}
+        stats = {"enabled": True, **self.cache.stats()}
+        if self.disk_cache is not None:
+            try:
+                stats["disk"] = self.disk_cache.stats()
+            except Exception as e:
+                logger.warning(f"读取磁盘缓存统计失败: {e}")
+        return stats
+
+    def singleflight_stats(self) -> Dict[str, int]:
+        """
+        获取请求合并统计
+
+        Returns:
+            executed为实际发往数据源的请求数，shared为复用进行中请求的次数
+        """
+        return self._flight.stats()
+
+    def source_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各数据源的限流和重试统计
+
+        Returns:
+            以数据源名称为键的统计字典，只包含已创建的数据源，
+            A股和港股共用同一数据源时只有一项
+        """
+        sources = {source.name: source for source in list(self._sources.values())}
+        return {name: source.request_stats() for name, source in sources.items()}
+
+    def collect_metrics(self, writer: MetricsWriter) -> None:
+        """
+        将数据源、缓存和请求合并统计写入指标
+
+        Args:
+            writer: 指标生成器
+        """
+        for name, stats in self.source_stats().items():
+            labels = {"source": name}
+            retry = stats["retry"]
+            writer.counter("upstream_requests_total", retry["attempts"],
+                           "发往数据源的请求数（含重试）", labels)
+            writer.counter("upstream_retries_total", retry["retries"],
+                           "数据源请求的重试次数", labels)
+            writer.counter("upstream_errors_total", retry["errors"],
+                           "数据源请求失败次数", labels)
+            writer.counter("upstream_throttled_total", retry["throttled"],
+                           "被数据源限流的请求数", labels)
+            calls = stats.get("calls")
+            if calls is not None:
+                writer.counter("upstream_timeouts_total", calls["timeouts"],
+                               "同步请求超时后放弃等待的次数", labels)
+                writer.gauge("upstream_abandoned_calls", calls["abandoned"],
+                             "超时后仍在运行、占用并发名额的请求数", labels)
+            limiter = stats["rate_limiter"]
+            if limiter is not None:
+                writer.gauge("rate_limit_per_second", limiter["rate"],
+                             "本地限流速率（次/秒）", labels)
+                writer.counter("rate_limiter_acquired_total", limiter["acquired"],
+                               "从本地限流器获取的令牌数", labels)
+                writer.counter("rate_limiter_wait_seconds_total", limiter["waited_seconds"],
+                               "等待本地限流器的累计时间（秒）", labels)
+
+        cache = self.cache_stats()
+        writer.gauge("cache_enabled", cache["enabled"], "是否启用缓存")
+        if cache["enabled"]:
+            tiers = [("memory", cache)]
+            if "disk" in cache:
+                tiers.append(("disk", cache["disk"]))
+            for tier, stats in tiers:
+                labels = {"tier": tier}
+                writer.counter("cache_hits_total", stats["hits"], "缓存命中次数", labels)
+                writer.counter("cache_misses_total", stats["misses"], "缓存未命中次数", labels)
+                writer.gauge("cache_entries", stats["size"], "缓存条目数", labels)
+            writer.counter("cache_evictions_total", cache["evictions"],
+                           "因容量不足被淘汰的内存缓存条目数", {"tier": "memory"})
+
+        flight = self.singleflight_stats()
+        writer.counter("singleflight_executed_total", flight["executed"], "实际执行的数据请求数")
+        writer.counter("singleflight_shared_total", flight["shared"], "复用进行中请求结果的次数")
+        writer.gauge("singleflight_in_flight", flight["in_flight"], "进行中的数据请求数")
+        writer.gauge("universe_version", self._universe_version, "股票池数据版本")
+
+    def get_stock_info(self, symbol: str, market: str,
+                       timer: Optional[StageTimer] = None) -> Dict[str, Any]:
         """
         获取股票综合信息 - 无依赖版
 
         Args:
             symbol: 股票代码
             market: 市场类型，A表示A股，HK表示港股
+            timer: 阶段计时器，传入时记录fetch_basic、fetch_valuation和fetch_history耗时
 
         Returns:
-            包含股票综合信息的字典
+            包含股票综合信息的字典，percentiles为当前估值的历史分位（没有估值历史时为空字典）
         """
+        if timer is None:
+            timer = StageTimer()
         try:
             logger.info(f"获取股票综合信息: {symbol} ({market}) - 无依赖版")
 
             # 获取基本信息
-            basic_info = self._get_basic_info(symbol, market)
+            with timer.stage("fetch_basic"):
+                basic_info = self._get_basic_info(symbol, market)
 
             # 获取估值指标
-            valuation = self.get_valuation_indicators(symbol, market)
+            with timer.stage("fetch_valuation"):
+                valuation = self.get_valuation_indicators(symbol, market)
+
+            # 当前估值在估值历史中的分位
+            with timer.stage("fetch_history"):
+                percentiles = self._valuation_percentiles({symbol: valuation}, market)
 
             # 组合所有信息
             stock_info = {
@@ -98,6 +728,7 @@ class DataManager:
                 "market": market,
                 "basic_info": basic_info,
                 "valuation": valuation,
+                "percentiles": percentiles.get(symbol, {}),
                 "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
 
@@ -106,13 +737,186 @@ class DataManager:
             logger.error(f"获取股票综合信息失败: {e}")
             return {}
 
+    async def get_stock_info_async(self, symbol: str, market: str,
+                                   timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+        """
+        获取股票综合信息 - 异步版
+
+        Args:
+            symbol: 股票代码
+            market: 市场类型，A表示A股，HK表示港股
+            timer: 阶段计时器，传入时记录fetch_basic、fetch_valuation和fetch_history耗时
+
+        Returns:
+            包含股票综合信息的字典
+        """
+        if timer is None:
+            timer = StageTimer()
+        try:
+            logger.info(f"异步获取股票综合信息: {symbol} ({market})")
+
+            with timer.stage("fetch_basic"):
+                # 股票池未就绪时在线程中构建，避免阻塞事件循环
+                if market not in self._universes or self._universe_expired(market):
+                    import asyncio
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self.get_universe, market
+                    )
+                basic_info = self._get_basic_info(symbol, market)
+
+            # 异步版的耗时包含等待事件循环调度的时间
+            with timer.stage("fetch_valuation"):
+                valuation = await self.get_valuation_indicators_async(symbol, market)
+
+            # 分位读取内存映射的本地文件，直接在事件循环中计算
+            with timer.stage("fetch_history"):
+                percentiles = self._valuation_percentiles({symbol: valuation}, market)
+
+            return {
+                "symbol": symbol,
+                "market": market,
+                "basic_info": basic_info,
+                "valuation": valuation,
+                "percentiles": percentiles.get(symbol, {}),
+                "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+        except Exception as e:
+            logger.error(f"获取股票综合信息失败: {e}")
+            return {}
+
+    @property
+    def universe_version(self) -> int:
+        """当前股票池数据版本，每次刷新后递增"""
+        return self._universe_version
+
+    def refresh_universe(self, market: Optional[str] = None) -> None:
+        """
+        丢弃股票池，下次查询时重新获取
+
+        Args:
+            market: 市场类型，None表示全部市场
+        """
+        with self._universe_lock:
+            if market is None:
+                self._universes.clear()
+                self._valuation_universes.clear()
+            else:
+                self._universes.pop(market, None)
+                self._valuation_universes.pop(market, None)
+            self._universe_version += 1
+        logger.info(f"股票池已失效: {market or '全部市场'}")
+
+    def get_universe(self, market: str) -> Universe:
+        """
+        获取列式股票池，同一数据版本内只拉取一次股票列表
+
+        A股可用不带后缀的symbol或ts_code查找，港股以代码查找。
+
+        Args:
+            market: 市场类型，A表示A股，HK表示港股
+
+        Returns:
+            股票池，获取失败时为空股票池
+        """
+        universe = self._universes.get(market)
+        if universe is not None and not self._universe_expired(market):
+            return universe
+
+        with self._universe_lock:
+            universe = self._universes.get(market)
+            if universe is None or self._universe_expired(market):
+                universe = self._load_universe(market)
+                # 获取失败时不保留，避免一次失败导致整个版本内查不到数据
+                if len(universe):
+                    if market in self._universes:
+                        self._universe_version += 1
+                    self._universes[market] = universe
+                    self._universe_built_at[market] = time.monotonic()
+        return universe
+
+    def get_valuation_universe(self, market: str) -> Universe:
+        """
+        获取附加了估值列（pe、pb、ps、dividend_yield、market_cap）的股票池
+
+        结果在同一数据版本和CACHE_TTL内复用，排序索引也随之保留，
+        全市场筛选只在首次调用时获取估值。
+
+        Args:
+            market: 市场类型，A表示A股，HK表示港股
+
+        Returns:
+            股票池，缺失的估值为NaN
+        """
+        universe = self.get_universe(market)
+        entry = self._valuation_universes.get(market)
+        if entry is not None:
+            version, built_at, cached = entry
+            fresh = self.cache is None or time.monotonic() - built_at < self.cache.ttl
+            if version == self._universe_version and fresh:
+                return cached
+
+        # 股票池较大时先取全市场快照，避免逐只请求
+        snapshot = {}
+        if len(universe) >= self.bulk_fetch_threshold:
+            snapshot = self.get_valuation_snapshot(market)
+
+        columns = {name: [] for name in VALUATION_FIELDS}
+        for symbol in universe.column("symbol"):
+            valuation = snapshot.get(symbol) or self.get_valuation_indicators(symbol, market)
+            for name, values in columns.items():
+                value = valuation.get(name)
+                values.append(float("nan") if value is None else float(value))
+
+        valued = universe.with_columns(columns)
+        self._valuation_universes[market] = (self._universe_version, time.monotonic(), valued)
+        logger.info(f"{market}估值股票池构建完成，共{len(valued)}只股票")
+        return valued
+
+    def _universe_expired(self, market: str) -> bool:
+        """启用缓存时，股票池按CACHE_TTL过期"""
+        if self.cache is None:
+            return False
+        built_at = self._universe_built_at.get(market, 0.0)
+        return time.monotonic() - built_at >= self.cache.ttl
+
+    def _load_universe(self, market: str) -> Universe:
+        """优先从磁盘缓存读取股票池，未命中时从数据源获取并写回"""
+        if market not in ("A", "HK"):
+            raise ValueError(f"不支持的市场类型: {market}")
+
+        key = f"universe:{market}"
+        if self.disk_cache is not None:
+            try:
+                payload = self.disk_cache.get(key)
+                if payload is not None:
+                    return Universe.from_payload(payload)
+            except Exception as e:
+                logger.warning(f"读取磁盘缓存失败: {e}")
+
+        try:
+            if market == "A":
+                universe = self.tushare_source.get_stock_universe("A")
+            else:
+                universe = self.akshare_source.get_hk_stock_universe()
+        except Exception as e:
+            logger.error(f"获取股票池失败: {e}")
+            return Universe.from_records([], market)
+
+        if len(universe) and self.disk_cache is not None:
+            try:
+                self.disk_cache.set(key, universe.to_payload())
+            except Exception as e:
+                logger.warning(f"写入磁盘缓存失败: {e}")
+
+        logger.info(f"{market}股票池构建完成，共{len(universe)}只股票")
+        return universe
+
     def _get_basic_info(self, symbol: str, market: str) -> Dict[str, Any]:
         """获取基本信息 - 无依赖版"""
         try:
             if market == "A":
-                # 获取A股基本信息
-                basic_data = self.tushare_source.get_stock_basic("A")
-                if not basic_data:
+                universe = self.get_universe("A")
+                if not len(universe):
                     return {}
 
                 # 查找指定股票
@@ -124,15 +928,9 @@ class DataManager:
                     else:
                         search_symbol = f"{symbol}.SZ"
 
-                for item in basic_data:
-                    if item.get("ts_code") == search_symbol:
-                        return {
-                            "name": item.get("name", f"股票{symbol}"),
-                            "industry": item.get("industry", "未知"),
-                            "area": item.get("area", "中国"),
-                            "market": item.get("market", "A"),
-                            "list_date": item.get("list_date", "20000101")
-                        }
+                info = universe.basic_info(search_symbol) or universe.basic_info(symbol)
+                if info is not None:
+                    return info
 
                 # 如果没有找到，返回默认信息
                 return {
@@ -143,21 +941,13 @@ class DataManager:
                     "list_date": "20000101"
                 }
             elif market == "HK":
-                # 获取港股基本信息
-                basic_data = self.akshare_source.get_hk_stock_basic()
-                if not basic_data:
+                universe = self.get_universe("HK")
+                if not len(universe):
                     return {}
 
-                # 查找指定股票
-                for item in basic_data:
-                    if item.get("代码") == symbol:
-                        return {
-                            "name": item.get("名称", f"港股{symbol}"),
-                            "industry": "未知",
-                            "area": "香港",
-                            "market": "HK",
-                            "list_date": ""
-                        }
+                info = universe.basic_info(symbol)
+                if info is not None:
+                    return info
 
                 # 如果没有找到，返回默认信息
                 return {
@@ -171,4 +961,4 @@ class DataManager:
                 return {}
         except Exception as e:
             logger.error(f"获取基本信息失败: {e}")
-            return {}
\ No newline at end of file
+            return {}
@@ -0,0 +1,741 @@
+"""
+估值历史存储 - 无依赖版
+按市场和年份分区保存逐日估值快照，二进制列式布局，读取时内存映射，
+支持每日追加和按股票、按日期的快速区间查询
+"""
+
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import compress, repeat
+from operator import eq, lt
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 保存的估值字段，与估值快照和数据源get_valuation_history的列一致
+HISTORY_FIELDS = ("pe", "pb", "dividend_yield")
+
+# 分区文件头：魔数、格式版本、字段数、年份、日期轴长度、最后写入的日期序号、字节序
+_HEADER = struct.Struct("<4sHHHHi1s15x")
+_MAGIC = b"GVH1"
+_VERSION = 1
+_BYTEORDER = b"L" if sys.byteorder == "little" else b"B"
+
+# 历史分位的回溯年数
+PERCENTILE_WINDOWS = (3, 5, 10)
+# 窗口内的有效数据少于工作日数的该比例时分位记为NaN，避免用过短的历史代表长期水平
+MIN_PERCENTILE_COVERAGE = 0.5
+
+_NAN = float("nan")
+
+DateLike = Union[str, int, date]
+
+
+@lru_cache(maxsize=64)
+def _weekdays(year: int) -> Tuple[int, ...]:
+    """一年中的全部工作日（YYYYMMDD整数），作为分区的日期轴，节假日对应位置留空"""
+    day = date(year, 1, 1)
+    days = []
+    while day.year == year:
+        if day.weekday() < 5:
+            days.append(day.year * 10000 + day.month * 100 + day.day)
+        day += timedelta(days=1)
+    return tuple(days)
+
+
+def _to_day(value: DateLike) -> int:
+    """将YYYYMMDD、YYYY-MM-DD或date转换为YYYYMMDD整数"""
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+    text = str(value).replace("-", "")
+    if len(text) != 8 or not text.isdigit():
+        raise ValueError(f"无法识别的日期: {value}，应为YYYYMMDD")
+    return int(text)
+
+
+def percentile_key(field: str, years: int) -> str:
+    """历史分位的字段名，如 pe_percentile_5y"""
+    return f"{field}_percentile_{years}y"
+
+
+def _years_before(day: int, years: int) -> int:
+    """day之前years年的同一天，2月29日退到2月28日"""
+    month_day = day % 10000
+    if month_day == 229:
+        month_day = 228
+    return (day // 10000 - years) * 10000 + month_day
+
+
+def _to_days(dates: Sequence[DateLike]) -> List[int]:
+    """批量转换日期，常见的YYYYMMDD字符串直接按整数解析"""
+    try:
+        return list(map(int, dates))
+    except (TypeError, ValueError):
+        return list(map(_to_day, dates))
+
+
+def _to_float(value: Any) -> float:
+    if value is None:
+        return _NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _to_floats(values: Sequence[Any]) -> array:
+    try:
+        return array("d", values)
+    except TypeError:
+        return array("d", map(_to_float, values))
+
+
+def _present(columns: Sequence[Sequence[float]]) -> List[int]:
+    """各列中至少有一列不为空值（NaN）的位置，升序"""
+    if len(columns) == 1:
+        column = columns[0]
+        return list(compress(range(len(column)), map(eq, column, column)))
+    present = set()
+    for column in columns:
+        present.update(compress(range(len(column)), map(eq, column, column)))
+    return sorted(present)
+
+
+class _Symbols:
+    """
+    市场内的股票代码字典
+
+    代码按首次出现的顺序编号，编号保存在分区的每一行中；
+    文件只追加，已分配的编号不会改变，读取方按文件增长增量加载新代码。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        # 已加载到的文件位置（字节），只含完整的行
+        self._offset = 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        """加载文件中新追加的代码（例如其他进程写入的新股票）"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size <= self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            content = f.read(size - self._offset)
+        # 最后一行没有换行符说明写入未完成，留到下次加载
+        end = content.rfind(b"\n") + 1
+        for name in content[:end].decode("utf-8").split("\n")[:-1]:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        self._offset += end
+
+    def add(self, symbols: Iterable[str]) -> None:
+        """为新出现的代码分配编号并写入文件"""
+        self.refresh()
+        new = []
+        for symbol in symbols:
+            if symbol not in self.ids:
+                self.ids[symbol] = len(self.names)
+                self.names.append(symbol)
+                new.append(symbol)
+        if new:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            data = "".join(f"{symbol}\n" for symbol in new).encode("utf-8")
+            with open(self.path, "ab") as f:
+                # 丢弃写入中断留下的不完整行，否则会与新代码拼成一行
+                f.truncate(self._offset)
+                f.write(data)
+            self._offset += len(data)
+
+
+class _Partition:
+    """
+    一个市场一年的估值历史
+
+    文件头之后是定长的行，每只股票一行，全部为float64（本机字节序）：
+    [代码编号, 第1个工作日的各字段, 第2个工作日的各字段, ...]。
+    同一只股票的序列和同一天的全部股票都可以通过内存视图的步长切片直接取得。
+    """
+
+    def __init__(self, path: str, year: int, field_count: int):
+        self.path = path
+        self.year = year
+        self.days = _weekdays(year)
+        self.day_index = {day: i for i, day in enumerate(self.days)}
+        self.field_count = field_count
+        # 每行的float64个数
+        self.width = 1 + field_count * len(self.days)
+        self.row_bytes = self.width * 8
+
+        self.rows: Dict[int, int] = {}
+        self.row_ids: List[int] = []
+        self._size = -1
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+
+    def _header(self, data) -> int:
+        """校验文件头，返回最后写入的日期序号"""
+        magic, version, field_count, year, span, last_day, byteorder = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"无法识别的估值历史文件: {self.path}")
+        if (field_count, year, span, byteorder) != (self.field_count, self.year,
+                                                    len(self.days), _BYTEORDER):
+            raise ValueError(f"估值历史文件与当前格式不一致: {self.path}")
+        return last_day
+
+    def refresh(self) -> bool:
+        """
+        按需重新映射文件，只有新增行时才重建映射
+
+        Returns:
+            分区中是否有数据
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size == self._size:
+            return self._view is not None
+        self.close()
+        self._size = size
+
+        count = max(0, (size - _HEADER.size) // self.row_bytes)
+        if count == 0:
+            return False
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._header(self._mmap)
+        # 末尾不完整的行（写入中断）不映射
+        end = _HEADER.size + count * self.row_bytes
+        self._view = memoryview(self._mmap)[_HEADER.size:end].cast("d")
+        self.row_ids = [int(symbol_id) for symbol_id in self._view[0::self.width].tolist()]
+        self.rows = {symbol_id: row for row, symbol_id in enumerate(self.row_ids)}
+        return True
+
+    def last_day(self) -> int:
+        """最后写入的日期序号，没有数据时为-1"""
+        return _HEADER.unpack_from(self._mmap, 0)[5] if self._mmap is not None else -1
+
+    def series(self, row: int, field: int, lo: int, hi: int) -> List[float]:
+        """一只股票某字段在日期序号[lo, hi)内的序列"""
+        base = row * self.width + 1
+        return self._view[base + lo * self.field_count + field:
+                          base + hi * self.field_count:self.field_count].tolist()
+
+    def column(self, field: int, day: int) -> List[float]:
+        """某一天全部股票某字段的值，按行排列"""
+        return self._view[1 + day * self.field_count + field::self.width].tolist()
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._size = -1
+        self.rows = {}
+        self.row_ids = []
+
+
+class _PartitionWriter:
+    """分区写入器，新股票追加为新行，已有的行原地写入"""
+
+    def __init__(self, partition: _Partition):
+        self.partition = partition
+        partition.refresh()
+        self.rows = dict(partition.rows)
+        self.last_day = partition.last_day()
+        # 写入前释放只读映射
+        partition.close()
+
+        if not os.path.exists(partition.path):
+            os.makedirs(os.path.dirname(partition.path), exist_ok=True)
+            with open(partition.path, "wb") as f:
+                f.write(self._header_bytes(-1))
+        self.file = open(partition.path, "r+b")
+
+    def _header_bytes(self, last_day: int) -> bytes:
+        part = self.partition
+        return _HEADER.pack(_MAGIC, _VERSION, part.field_count, part.year,
+                            len(part.days), last_day, _BYTEORDER)
+
+    def _offset(self, row: int, index: int = 0) -> int:
+        return _HEADER.size + (row * self.partition.width + index) * 8
+
+    def row(self, symbol_id: int) -> Tuple[int, bool]:
+        """
+        获取股票所在的行，不存在时追加一个空行
+
+        Returns:
+            (行号, 是否为新行)
+        """
+        row = self.rows.get(symbol_id)
+        if row is not None:
+            return row, False
+        row = len(self.rows)
+        values = array("d", [_NAN]) * self.partition.width
+        values[0] = symbol_id
+        # 从最后一个完整行之后写入，覆盖可能残留的不完整行
+        self.file.seek(self._offset(row))
+        self.file.write(values.tobytes())
+        self.rows[symbol_id] = row
+        return row, True
+
+    def read_row(self, row: int) -> array:
+        values = array("d")
+        self.file.seek(self._offset(row))
+        values.frombytes(self.file.read(self.partition.row_bytes))
+        return values
+
+    def write(self, row: int, index: int, values: array) -> None:
+        """从行内第index个float64开始写入"""
+        self.file.seek(self._offset(row, index))
+        self.file.write(values.tobytes())
+
+    def close(self, last_day: int) -> None:
+        """更新文件头中的最后写入日期并关闭"""
+        self.file.seek(0)
+        self.file.write(self._header_bytes(max(self.last_day, last_day)))
+        self.file.close()
+
+
+class ValuationHistoryStore:
+    """
+    估值历史存储
+
+    目录结构为 <根目录>/<市场>/<年份>.bin，另有 symbols.txt 保存代码编号。
+    每年一个分区，日期轴为全年工作日，因此任意一天的位置可直接计算，
+    每日追加只需为每只股票原地写入一小段；按股票读取多年区间时每年只切片一次。
+    只支持单个写入进程，读取可与写入并发进行。
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        初始化估值历史存储
+
+        Args:
+            root_dir: 根目录，首次写入时创建，只读取时不创建任何目录
+        """
+        self.root_dir = root_dir
+        self.fields = HISTORY_FIELDS
+        self._field_index = {field: i for i, field in enumerate(self.fields)}
+        self._symbols: Dict[str, _Symbols] = {}
+        self._partitions: Dict[Tuple[str, int], _Partition] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls, dirname: str = "history") -> "ValuationHistoryStore":
+        """
+        按HISTORY_STORE_DIR创建
+
+        Args:
+            dirname: 未设置HISTORY_STORE_DIR时使用CACHE_DIR（为空时为.cache）下的该目录
+        """
+        root_dir = os.getenv("HISTORY_STORE_DIR") or os.path.join(
+            os.getenv("CACHE_DIR") or ".cache", dirname
+        )
+        return cls(root_dir)
+
+    # ---- 内部工具 ----
+
+    def _market_dir(self, market: str) -> str:
+        return os.path.join(self.root_dir, market)
+
+    def _symbols_of(self, market: str) -> _Symbols:
+        """市场的代码字典，每次取用时加载写入进程新增的代码"""
+        symbols = self._symbols.get(market)
+        if symbols is None:
+            symbols = _Symbols(os.path.join(self._market_dir(market), "symbols.txt"))
+            self._symbols[market] = symbols
+        else:
+            symbols.refresh()
+        return symbols
+
+    def _partition(self, market: str, year: int) -> _Partition:
+        partition = self._partitions.get((market, year))
+        if partition is None:
+            path = os.path.join(self._market_dir(market), f"{year}.bin")
+            partition = _Partition(path, year, len(self.fields))
+            self._partitions[(market, year)] = partition
+        return partition
+
+    def _years(self, market: str) -> List[int]:
+        """已有分区的年份，升序"""
+        market_dir = self._market_dir(market)
+        if not os.path.isdir(market_dir):
+            return []
+        return sorted(
+            int(name[:-4]) for name in os.listdir(market_dir)
+            if name.endswith(".bin") and name[:-4].isdigit()
+        )
+
+    def _field_indexes(self, fields: Optional[Sequence[str]]) -> List[Tuple[str, int]]:
+        fields = fields or self.fields
+        unknown = [field for field in fields if field not in self._field_index]
+        if unknown:
+            raise ValueError(f"不支持的估值历史字段: {', '.join(unknown)}，可选: {', '.join(self.fields)}")
+        return [(field, self._field_index[field]) for field in fields]
+
+    # ---- 写入 ----
+
+    def latest_date(self, market: str) -> Optional[str]:
+        """
+        获取已保存的最新交易日
+
+        Returns:
+            YYYYMMDD格式的日期，没有数据时返回None
+        """
+        with self._lock:
+            for year in reversed(self._years(market)):
+                partition = self._partition(market, year)
+                if partition.refresh() and partition.last_day() >= 0:
+                    return str(partition.days[partition.last_day()])
+            return None
+
+    def append(self, market: str, trade_date: DateLike,
+               snapshot: Mapping[str, Mapping[str, Any]]) -> int:
+        """
+        追加一个交易日的全市场估值
+
+        Args:
+            market: 市场类型
+            trade_date: 交易日，必须晚于已保存的最新交易日
+            snapshot: 股票代码到估值指标字典的映射，如DataManager.get_valuation_snapshot的返回值，
+                缺少的字段保存为空值
+
+        Returns:
+            写入的股票数
+
+        Raises:
+            ValueError: 交易日不是工作日或不晚于已保存的最新交易日
+        """
+        day = _to_day(trade_date)
+        with self._lock:
+            latest = self.latest_date(market)
+            if latest is not None and day <= int(latest):
+                raise ValueError(f"{market}估值历史只能追加，{day}不晚于已保存的{latest}")
+
+            partition = self._partition(market, day // 10000)
+            index = partition.day_index.get(day)
+            if index is None:
+                raise ValueError(f"{day}不是工作日")
+
+            symbols = self._symbols_of(market)
+            symbols.add(snapshot)
+            writer = _PartitionWriter(partition)
+            try:
+                for symbol, valuation in snapshot.items():
+                    row, _ = writer.row(symbols.ids[symbol])
+                    values = array("d", (_to_float(valuation.get(field)) for field in self.fields))
+                    writer.write(row, 1 + index * len(self.fields), values)
+            finally:
+                writer.close(index)
+
+        logger.info(f"{market}估值历史已追加{day}，共{len(snapshot)}只股票")
+        return len(snapshot)
+
+    def backfill(self, market: str,
+                 histories: Iterable[Tuple[str, Mapping[str, Sequence[Any]]]]) -> int:
+        """
+        写入多只股票的历史估值，用于初始化历史或补齐新上市股票
+
+        逐只处理，内存占用与股票数无关；同一日期已有的值被覆盖，
+        历史中没有的日期保持不变。
+
+        Args:
+            market: 市场类型
+            histories: (股票代码, 列式历史) 序列，列式历史的格式与数据源
+                get_valuation_history的返回值一致（trade_date及各字段的列表）
+
+        Returns:
+            写入的股票数
+        """
+        written = 0
+        with self._lock:
+            symbols = self._symbols_of(market)
+            writers: Dict[int, _PartitionWriter] = {}
+            last_days: Dict[int, int] = {}
+            try:
+                for symbol, history in histories:
+                    if not history or not history.get("trade_date"):
+                        continue
+                    try:
+                        days = _to_days(history["trade_date"])
+                        if days != sorted(days):
+                            raise ValueError("日期未按升序排列")
+                    except ValueError as e:
+                        logger.error(f"股票{symbol}的估值历史无法写入: {e}")
+                        continue
+                    symbols.add([symbol])
+                    self._backfill_symbol(market, symbols.ids[symbol], history, days,
+                                          writers, last_days)
+                    written += 1
+            finally:
+                for year, writer in writers.items():
+                    writer.close(last_days.get(year, -1))
+
+        logger.info(f"{market}估值历史已写入{written}只股票")
+        return written
+
+    def _backfill_symbol(self, market: str, symbol_id: int, history: Mapping[str, Sequence[Any]],
+                         days: List[int], writers: Dict[int, _PartitionWriter],
+                         last_days: Dict[int, int]) -> None:
+        columns = [(field, history.get(name)) for field, name in enumerate(self.fields)]
+        columns = [(field, column) for field, column in columns if column is not None]
+        field_count = len(self.fields)
+        # 按年分组后整行读改写
+        start = 0
+        while start < len(days):
+            year = days[start] // 10000
+            end = bisect_left(days, (year + 1) * 10000, start)
+
+            writer = writers.get(year)
+            if writer is None:
+                writer = writers[year] = _PartitionWriter(self._partition(market, year))
+            partition = writer.partition
+            row, new = writer.row(symbol_id)
+            values = array("d", [_NAN]) * partition.width if new else writer.read_row(row)
+            values[0] = symbol_id
+
+            indexes = list(map(partition.day_index.get, days[start:end]))
+            if None not in indexes and indexes[-1] - indexes[0] == end - start - 1:
+                # 日期连续（历史数据的常见情况），每个字段一次步长切片赋值
+                lo, hi = indexes[0], indexes[-1] + 1
+                for field, column in columns:
+                    values[1 + lo * field_count + field:1 + hi * field_count:field_count] = \
+                        _to_floats(column[start:end])
+            else:
+                for position, index in zip(range(start, end), indexes):
+                    if index is None:
+                        continue
+                    base = 1 + index * field_count
+                    for field, column in columns:
+                        values[base + field] = _to_float(column[position])
+            last_index = max((index for index in indexes if index is not None), default=-1)
+            last_days[year] = max(last_days.get(year, -1), last_index)
+            writer.write(row, 0, values)
+            start = end
+
+    # ---- 读取 ----
+
+    def get_history(self, symbol: str, market: str, start: Optional[DateLike] = None,
+                    end: Optional[DateLike] = None,
+                    fields: Optional[Sequence[str]] = None) -> Dict[str, List[Any]]:
+        """
+        获取一只股票的估值历史
+
+        Args:
+            symbol: 股票代码
+            market: 市场类型
+            start: 起始日期（含），默认最早
+            end: 结束日期（含），默认最新
+            fields: 返回的字段，默认全部
+
+        Returns:
+            列式历史数据：trade_date（YYYYMMDD字符串）及各字段，按日期升序，
+            各字段均为空的日期（节假日）不返回；没有该股票时为空字典
+
+        Raises:
+            ValueError: 字段或日期无法识别
+        """
+        field_indexes = self._field_indexes(fields)
+        start_day = _to_day(start) if start is not None else 0
+        end_day = _to_day(end) if end is not None else 99991231
+
+        with self._lock:
+            symbol_id = self._symbols_of(market).ids.get(symbol)
+            if symbol_id is None:
+                return {}
+
+            dates: List[str] = []
+            columns: Dict[str, List[float]] = {field: [] for field, _ in field_indexes}
+            for year in self._years(market):
+                if not start_day // 10000 <= year <= end_day // 10000:
+                    continue
+                partition = self._partition(market, year)
+                if not partition.refresh():
+                    continue
+                row = partition.rows.get(symbol_id)
+                if row is None:
+                    continue
+
+                days = partition.days
+                lo = bisect_left(days, start_day)
+                hi = min(bisect_right(days, end_day), partition.last_day() + 1)
+                if lo >= hi:
+                    continue
+                series = [partition.series(row, index, lo, hi) for _, index in field_indexes]
+                present = _present(series)
+                if len(present) == hi - lo:
+                    dates.extend(map(str, days[lo:hi]))
+                    for (field, _), values in zip(field_indexes, series):
+                        columns[field].extend(values)
+                else:
+                    dates.extend(str(days[lo + offset]) for offset in present)
+                    for (field, _), values in zip(field_indexes, series):
+                        columns[field].extend(values[offset] for offset in present)
+
+        if not dates:
+            return {}
+        return {"trade_date": dates, **columns}
+
+    def get_snapshot(self, market: str, trade_date: DateLike,
+                     fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        获取某一交易日全部股票的估值
+
+        Args:
+            market: 市场类型
+            trade_date: 交易日
+            fields: 返回的字段，默认全部
+
+        Returns:
+            股票代码到估值字典的映射，各字段均为空的股票不返回，格式与
+            DataManager.get_valuation_snapshot一致
+        """
+        field_indexes = self._field_indexes(fields)
+        day = _to_day(trade_date)
+
+        with self._lock:
+            partition = self._partition(market, day // 10000)
+            index = partition.day_index.get(day)
+            if index is None or not partition.refresh() or index > partition.last_day():
+                return {}
+            # 写入时先登记代码再写分区，分区刷新之后加载的代码字典包含其中全部编号
+            names = self._symbols_of(market).names
+            columns = [partition.column(field_index, index) for _, field_index in field_indexes]
+            row_ids = partition.row_ids
+            return {
+                names[row_ids[row]]: {
+                    field: column[row] for (field, _), column in zip(field_indexes, columns)
+                }
+                for row in _present(columns)
+            }
+
+    def percentiles(self, market: str, current: Mapping[str, Mapping[str, Any]],
+                    as_of: Optional[DateLike] = None,
+                    windows: Sequence[int] = PERCENTILE_WINDOWS,
+                    fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        批量计算当前估值在各自历史中的分位
+
+        分位为窗口内低于当前值的交易日占有效交易日的百分比（0~100），PE为负等
+        原始值照常参与比较。窗口由短到长嵌套，计数逐段累加：先统计最近一段，
+        再向前延伸到下一个窗口的起点，每只股票的每个字段只扫描一遍最长窗口。
+        序列按分区切片后由map/sum在C层比较和计数，Python层的循环次数只与
+        股票数、窗口数和分区数有关，与交易日数无关。
+
+        Args:
+            market: 市场类型
+            current: 股票代码到当前估值字典的映射
+            as_of: 窗口的终点（含），默认已保存的最新交易日
+            windows: 回溯年数
+            fields: 计算的字段，默认全部
+
+        Returns:
+            股票代码到 {percentile_key(字段, 年数): 分位} 的映射，历史中没有的股票不返回；
+            当前值缺失或窗口内有效数据不足时分位为NaN
+        """
+        field_indexes = self._field_indexes(fields)
+        windows = sorted(windows)
+
+        with self._lock:
+            if as_of is None:
+                as_of = self.latest_date(market)
+                if as_of is None:
+                    return {}
+            end_day = _to_day(as_of)
+
+            ids = self._symbols_of(market).ids
+            targets = [(symbol, ids[symbol]) for symbol in current if symbol in ids]
+            if not targets:
+                return {}
+
+            # 每个窗口比上一个窗口多出的一段：[(分区, lo, hi)]，以及截至该窗口的工作日数
+            segments: List[List[Tuple[_Partition, int, int]]] = []
+            spans: List[int] = []
+            span = 0
+            segment_end = end_day
+            for years in windows:
+                segment_start = _years_before(end_day, years)
+                slices = []
+                for year in range(segment_start // 10000, segment_end // 10000 + 1):
+                    days = _weekdays(year)
+                    lo, hi = bisect_right(days, segment_start), bisect_right(days, segment_end)
+                    span += hi - lo
+                    partition = self._partition(market, year)
+                    if partition.refresh():
+                        hi = min(hi, partition.last_day() + 1)
+                        if lo < hi:
+                            slices.append((partition, lo, hi))
+                segments.append(slices)
+                spans.append(span)
+                segment_end = segment_start
+
+            result: Dict[str, Dict[str, float]] = {}
+            for symbol, symbol_id in targets:
+                valuation = current[symbol]
+                percentiles = result[symbol] = {}
+                for field, field_index in field_indexes:
+                    value = _to_float(valuation.get(field))
+                    below = count = 0
+                    for years, span, slices in zip(windows, spans, segments):
+                        if value == value:
+                            for partition, lo, hi in slices:
+                                row = partition.rows.get(symbol_id)
+                                if row is None:
+                                    continue
+                                series = partition.series(row, field_index, lo, hi)
+                                below += sum(map(lt, series, repeat(value)))
+                                count += sum(map(eq, series, series))
+                        enough = count and count >= span * MIN_PERCENTILE_COVERAGE
+                        percentiles[percentile_key(field, years)] = (
+                            below / count * 100 if enough else _NAN
+                        )
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取存储统计
+
+        Returns:
+            包含根目录、各市场的股票数、年份范围、最新交易日和文件大小的字典
+        """
+        with self._lock:
+            markets = {}
+            names = os.listdir(self.root_dir) if os.path.isdir(self.root_dir) else []
+            for market in sorted(names):
+                if not os.path.isdir(os.path.join(self.root_dir, market)):
+                    continue
+                years = self._years(market)
+                markets[market] = {
+                    "symbols": len(self._symbols_of(market).names),
+                    "years": [years[0], years[-1]] if years else [],
+                    "latest_date": self.latest_date(market),
+                    "bytes": sum(os.path.getsize(self._partition(market, year).path)
+                                 for year in years)
+                }
+            return {"path": self.root_dir, "markets": markets}
+
+    def close(self) -> None:
+        """释放全部内存映射"""
+        with self._lock:
+            for partition in self._partitions.values():
+                partition.close()
+            self._partitions.clear()
+
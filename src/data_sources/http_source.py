@@ -0,0 +1,244 @@
+"""
+HTTP数据源 - 无依赖版
+通过tushare协议的HTTP接口获取数据，分页拉取列表，
+限流响应和网络错误经共享限流器和重试策略处理；
+可对接本地替身服务（stand_in_server）进行离线压测
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+import logging
+
+from .universe import Universe
+from ..utils.rate_limiter import ThrottleError, rate_limiter_from_env, retry_policy_from_env
+
+logger = logging.getLogger(__name__)
+
+# tushare超过每分钟调用次数时返回的错误码
+THROTTLE_CODE = 40203
+
+
+class HttpSource:
+    """
+    tushare协议HTTP数据源
+
+    提供与TushareSource（A股）和AkshareSource（港股）相同的接口，
+    可同时替换两者供DataManager使用。
+    """
+
+    # 数据源名称，用于统计和指标标签
+    name = "http"
+
+    def __init__(self, url: str, token: Optional[str] = None, page_size: int = 5000):
+        """
+        初始化HTTP数据源
+
+        Args:
+            url: 接口地址，如 http://127.0.0.1:8765
+            token: 接口token，默认读取TUSHARE_TOKEN
+            page_size: 列表接口每页请求的行数
+        """
+        self.url = url
+        self.token = token or os.getenv("TUSHARE_TOKEN") or ""
+        self.page_size = page_size
+        self.timeout = float(os.getenv("DATA_SOURCE_TIMEOUT", "30"))
+        self.rate_limiter = rate_limiter_from_env("tushare", default_burst=10)
+        self.retry_policy = retry_policy_from_env()
+
+        logger.info(f"HTTP数据源初始化完成: {url}")
+
+    def request_stats(self) -> Dict[str, Any]:
+        """获取限流和重试统计"""
+        return {
+            "rate_limiter": self.rate_limiter.stats() if self.rate_limiter else None,
+            "retry": self.retry_policy.stats()
+        }
+
+    # ---- 请求 ----
+
+    def _post(self, api_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """发送一次请求，限流和网络错误转换为可重试的异常"""
+        # urllib会连带导入ssl、http.client等模块，只在实际请求时导入
+        import socket
+        import urllib.error
+        import urllib.request
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        body = json.dumps({"api_name": api_name, "token": self.token, "params": params})
+        request = urllib.request.Request(
+            self.url, data=body.encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise ThrottleError(f"{api_name}: HTTP 429")
+            if e.code >= 500:
+                raise ConnectionError(f"{api_name}: HTTP {e.code}")
+            raise
+        except socket.timeout as e:
+            raise TimeoutError(f"{api_name}: 请求超时") from e
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, socket.timeout):
+                raise TimeoutError(f"{api_name}: 请求超时") from e
+            raise ConnectionError(f"{api_name}: {e.reason}") from e
+
+        code = payload.get("code", 0)
+        if code == THROTTLE_CODE:
+            raise ThrottleError(payload.get("msg", ""))
+        if code != 0:
+            raise ValueError(f"{api_name}接口返回错误{code}: {payload.get('msg', '')}")
+        return payload["data"]
+
+    def _query(self, api_name: str, **params) -> List[Dict[str, Any]]:
+        """
+        调用接口并按offset/limit拉取全部分页
+
+        Returns:
+            以字段名为键的记录列表
+        """
+        records: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            page_params = dict(params, offset=offset, limit=self.page_size)
+            data = self.retry_policy.call(self._post, api_name, page_params)
+            fields = data["fields"]
+            records.extend(dict(zip(fields, item)) for item in data["items"])
+            if not data.get("has_more") or not data["items"]:
+                return records
+            offset += len(data["items"])
+
+    # ---- A股 ----
+
+    def get_stock_basic(self, market: str = "A") -> list:
+        """获取A股股票列表，字段与TushareSource.get_stock_basic一致"""
+        if market != "A":
+            return []
+        try:
+            return self._query("stock_basic")
+        except Exception as e:
+            logger.error(f"获取股票基本信息失败: {e}")
+            return []
+
+    def get_stock_universe(self, market: str = "A") -> Universe:
+        """获取A股列式股票池"""
+        return Universe.from_records(self.get_stock_basic(market), market)
+
+    @staticmethod
+    def _from_daily_basic(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "pe": row["pe_ttm"],
+            "pb": row["pb"],
+            "ps": row["ps_ttm"],
+            "dividend_yield": row["dv_ratio"],
+            # tushare的总市值单位为万元
+            "market_cap": row["total_mv"] * 10000
+        }
+
+    @staticmethod
+    def _ts_code(symbol: str) -> str:
+        if symbol.endswith((".SH", ".SZ")):
+            return symbol
+        return f"{symbol}.SH" if symbol.startswith("6") else f"{symbol}.SZ"
+
+    def get_valuation_indicators(self, symbol: str) -> Dict[str, Any]:
+        """获取A股估值指标，失败时返回空字典"""
+        try:
+            rows = self._query("daily_basic", ts_code=self._ts_code(symbol))
+            return self._from_daily_basic(rows[0]) if rows else {}
+        except Exception as e:
+            logger.error(f"获取估值指标失败: {e}")
+            return {}
+
+    async def get_valuation_indicators_async(self, symbol: str) -> Dict[str, Any]:
+        """获取A股估值指标 - 异步版，阻塞的HTTP请求在线程池中执行"""
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.get_valuation_indicators, symbol
+        )
+
+    def get_valuation_snapshot(self, trade_date: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """获取A股全市场估值快照"""
+        params = {"trade_date": trade_date} if trade_date else {}
+        try:
+            return {
+                row["ts_code"].split(".")[0]: self._from_daily_basic(row)
+                for row in self._query("daily_basic", **params)
+            }
+        except Exception as e:
+            logger.error(f"获取全市场估值快照失败: {e}")
+            return {}
+
+    # ---- 港股 ----
+
+    def get_hk_stock_basic(self) -> list:
+        """获取港股股票列表，字段与AkshareSource.get_hk_stock_basic一致"""
+        try:
+            return self._query("hk_basic")
+        except Exception as e:
+            logger.error(f"获取港股基本信息失败: {e}")
+            return []
+
+    def get_hk_stock_universe(self) -> Universe:
+        """获取港股列式股票池"""
+        return Universe.from_records(self.get_hk_stock_basic(), "HK")
+
+    def get_hk_valuation_indicators(self, symbol: str) -> Dict[str, Any]:
+        """获取港股估值指标，失败时返回空字典"""
+        try:
+            rows = self._query("hk_daily_basic", symbol=symbol)
+            if not rows:
+                return {}
+            row = rows[0]
+            row.pop("symbol", None)
+            return row
+        except Exception as e:
+            logger.error(f"获取港股估值指标失败: {e}")
+            return {}
+
+    async def get_hk_valuation_indicators_async(self, symbol: str) -> Dict[str, Any]:
+        """获取港股估值指标 - 异步版"""
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.get_hk_valuation_indicators, symbol
+        )
+
+    def get_hk_valuation_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取港股全市场估值快照"""
+        try:
+            return {row.pop("symbol"): row for row in self._query("hk_daily_basic")}
+        except Exception as e:
+            logger.error(f"获取港股全市场估值快照失败: {e}")
+            return {}
+
+    # ---- 财务指标与历史 ----
+
+    def get_financial_indicators(self, symbol: str, market: str = "A") -> Dict[str, Any]:
+        """获取财务指标，失败时返回空字典"""
+        ts_code = self._ts_code(symbol) if market == "A" else symbol
+        try:
+            rows = self._query("fina_indicator", ts_code=ts_code, market=market)
+            return rows[0] if rows else {}
+        except Exception as e:
+            logger.error(f"获取财务指标失败: {e}")
+            return {}
+
+    def get_valuation_history(self, symbol: str, market: str = "A",
+                              years: int = 10) -> Dict[str, List[Any]]:
+        """获取逐日估值历史，返回列式数据，失败时返回空字典"""
+        ts_code = self._ts_code(symbol) if market == "A" else symbol
+        try:
+            rows = self._query("valuation_history", ts_code=ts_code, market=market, years=years)
+        except Exception as e:
+            logger.error(f"获取估值历史失败: {e}")
+            return {}
+        if not rows:
+            return {}
+        return {field: [row[field] for row in rows] for field in rows[0]}
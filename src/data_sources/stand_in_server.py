@@ -0,0 +1,305 @@
+"""
+本地数据接口替身 - 无依赖版
+以tushare的HTTP协议提供合成数据，模拟网络延迟、分页和限流响应，
+用于离线压测并发、缓存和批量获取
+
+运行: python -m src.data_sources.stand_in_server --size 50000 --latency 0.05 --rate-limit 200
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from .http_source import THROTTLE_CODE
+from .synthetic_source import SyntheticSource
+from ..utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DAILY_BASIC_FIELDS = ["ts_code", "trade_date", "pe_ttm", "pb", "ps_ttm", "dv_ratio", "total_mv"]
+HK_DAILY_BASIC_FIELDS = ["symbol", "pe", "pb", "ps", "dividend_yield", "market_cap"]
+FINA_FIELDS = ["roe", "roa", "gross_margin", "net_margin", "debt_ratio",
+               "current_ratio", "revenue_growth", "profit_growth"]
+
+
+class StandInServer:
+    """
+    tushare协议的本地替身服务
+
+    请求为POST JSON: {"api_name", "token", "params", "fields"}，
+    响应为 {"code", "msg", "data": {"fields", "items", "has_more"}}。
+    列表类接口按params中的offset/limit分页，单页不超过page_size行。
+    """
+
+    def __init__(self, source: Optional[SyntheticSource] = None,
+                 host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.05, jitter: float = 0.02,
+                 page_size: int = 5000, rate_limit: float = 0,
+                 error_rate: float = 0.0, seed: int = 42):
+        """
+        初始化替身服务
+
+        Args:
+            source: 合成数据源，默认1万只股票
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            latency: 每个请求的固定延迟（秒）
+            jitter: 在固定延迟上叠加的随机延迟上限（秒）
+            page_size: 列表接口单页最大行数
+            rate_limit: 每个token每个接口每分钟的调用上限，0表示不限流
+            error_rate: 随机返回HTTP 503的概率
+            seed: 延迟和错误注入的随机种子
+        """
+        self.source = source or SyntheticSource(seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.requests = 0
+        self.throttled = 0
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """服务地址"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"数据接口替身已启动: {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def serve_forever(self) -> None:
+        """在当前线程中运行服务，直到被中断"""
+        logger.info(f"数据接口替身已启动: {self.url}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    # ---- 请求处理 ----
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send(400, {"code": 40001, "msg": "请求不是合法的JSON"})
+                    return
+                status, body = server.handle(request)
+                self._send(status, body)
+
+            def _send(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def _bucket(self, token: str, api_name: str) -> TokenBucket:
+        key = (token, api_name)
+        with self._buckets_lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                # 桶容量等于每分钟配额，与tushare按分钟计数的行为接近
+                bucket = TokenBucket(self.rate_limit / 60.0, max(1, int(self.rate_limit)))
+                self._buckets[key] = bucket
+            return bucket
+
+    def handle(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        处理一个接口请求
+
+        Args:
+            request: 解析后的请求体
+
+        Returns:
+            (HTTP状态码, 响应体)
+        """
+        api_name = request.get("api_name", "")
+        params = request.get("params") or {}
+        token = request.get("token") or ""
+
+        with self._rng_lock:
+            self.requests += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failed = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+
+        if failed:
+            return 503, {"code": 50300, "msg": "服务暂时不可用"}
+
+        if self.rate_limit > 0 and not self._bucket(token, api_name).acquire(timeout=0):
+            with self._rng_lock:
+                self.throttled += 1
+            return 200, {
+                "code": THROTTLE_CODE,
+                "msg": f"抱歉，您每分钟最多访问该接口{int(self.rate_limit)}次",
+                "data": None
+            }
+
+        handler = getattr(self, f"_api_{api_name}", None)
+        if handler is None:
+            return 200, {"code": 40101, "msg": f"接口名称错误: {api_name}", "data": None}
+
+        try:
+            fields, items = handler(params)
+        except (TypeError, ValueError) as e:
+            return 200, {"code": 40002, "msg": f"参数错误: {e}", "data": None}
+
+        offset = int(params.get("offset", 0))
+        limit = min(int(params.get("limit", self.page_size)), self.page_size)
+        page = items[offset:offset + limit]
+        return 200, {
+            "request_id": uuid.uuid4().hex,
+            "code": 0,
+            "msg": "",
+            "data": {
+                "fields": fields,
+                "items": page,
+                "has_more": offset + len(page) < len(items)
+            }
+        }
+
+    # ---- 接口实现，返回 (字段, 行) ----
+
+    @staticmethod
+    def _rows(records: List[Dict[str, Any]]) -> Tuple[List[str], List[List[Any]]]:
+        if not records:
+            return [], []
+        fields = list(records[0])
+        return fields, [[record[field] for field in fields] for record in records]
+
+    def _api_stock_basic(self, params):
+        return self._rows(self.source.get_stock_basic("A"))
+
+    def _api_hk_basic(self, params):
+        return self._rows(self.source.get_hk_stock_basic())
+
+    def _api_daily_basic(self, params):
+        ts_code = params.get("ts_code")
+        trade_date = params.get("trade_date") or time.strftime("%Y%m%d")
+        if ts_code:
+            symbol = ts_code.split(".")[0]
+            snapshot = {symbol: self.source.get_valuation_indicators(symbol)}
+        else:
+            snapshot = self.source.get_valuation_snapshot(trade_date)
+
+        items = []
+        for symbol, valuation in snapshot.items():
+            if not valuation:
+                continue
+            suffix = "SH" if symbol.startswith("6") else "SZ"
+            items.append([
+                f"{symbol}.{suffix}", trade_date, valuation["pe"], valuation["pb"],
+                valuation["ps"], valuation["dividend_yield"],
+                # tushare的总市值单位为万元
+                valuation["market_cap"] / 10000
+            ])
+        return DAILY_BASIC_FIELDS, items
+
+    def _api_hk_daily_basic(self, params):
+        symbol = params.get("symbol")
+        if symbol:
+            snapshot = {symbol: self.source.get_hk_valuation_indicators(symbol)}
+        else:
+            snapshot = self.source.get_hk_valuation_snapshot()
+        items = [
+            [code] + [valuation[field] for field in HK_DAILY_BASIC_FIELDS[1:]]
+            for code, valuation in snapshot.items() if valuation
+        ]
+        return HK_DAILY_BASIC_FIELDS, items
+
+    def _api_fina_indicator(self, params):
+        symbol = params["ts_code"].split(".")[0]
+        indicators = self.source.get_financial_indicators(symbol, params.get("market", "A"))
+        if not indicators:
+            return FINA_FIELDS, []
+        return FINA_FIELDS, [[indicators[field] for field in FINA_FIELDS]]
+
+    def _api_valuation_history(self, params):
+        symbol = params["ts_code"].split(".")[0]
+        history = self.source.get_valuation_history(
+            symbol, params.get("market", "A"), int(params.get("years", 10))
+        )
+        if not history:
+            return [], []
+        fields = list(history)
+        return fields, [list(row) for row in zip(*(history[field] for field in fields))]
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="Gems 本地数据接口替身（合成数据）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--size", type=int, default=10000, help="每个市场的股票数量")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--latency", type=float, default=0.05, help="固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="随机延迟上限（秒）")
+    parser.add_argument("--page-size", type=int, default=5000, help="列表接口单页最大行数")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="每个接口每分钟调用上限，0表示不限流")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回503的概率")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = StandInServer(
+        SyntheticSource(args.size, args.seed), args.host, args.port,
+        latency=args.latency, jitter=args.jitter, page_size=args.page_size,
+        rate_limit=args.rate_limit, error_rate=args.error_rate, seed=args.seed
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+合成数据源 - 无依赖版
+按随机种子生成可复现的大规模股票池（1万~10万只），
+包含基本信息、估值、财务指标和多年估值历史，用于离线压测
+"""
+
+import math
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+
+from .universe import Universe
+
+logger = logging.getLogger(__name__)
+
+_INDUSTRIES = (
+    "银行", "保险", "证券", "房地产", "白酒", "食品饮料", "医药", "医疗器械",
+    "半导体", "软件服务", "通信设备", "电力", "煤炭", "钢铁", "有色金属",
+    "化工", "汽车", "家电", "建筑", "交通运输", "传媒", "零售", "农业", "机械"
+)
+
+# 各行业估值中枢 (PE, PB, 股息率%)，个股在中枢附近按对数正态分布波动
+_INDUSTRY_PROFILES = {
+    "银行": (6.0, 0.7, 5.0), "保险": (10.0, 1.2, 3.5), "证券": (20.0, 1.5, 1.8),
+    "房地产": (9.0, 0.9, 3.0), "白酒": (30.0, 8.0, 1.5), "食品饮料": (28.0, 5.0, 1.6),
+    "医药": (35.0, 4.0, 0.8), "医疗器械": (40.0, 5.0, 0.6), "半导体": (60.0, 6.0, 0.3),
+    "软件服务": (55.0, 5.0, 0.4), "通信设备": (30.0, 3.0, 1.0), "电力": (15.0, 1.6, 3.0),
+    "煤炭": (7.0, 1.1, 6.5), "钢铁": (10.0, 0.9, 4.0), "有色金属": (18.0, 2.2, 1.5),
+    "化工": (20.0, 2.0, 1.8), "汽车": (22.0, 2.2, 1.5), "家电": (14.0, 3.0, 3.5),
+    "建筑": (8.0, 0.8, 3.0), "交通运输": (16.0, 1.5, 2.5), "传媒": (35.0, 2.5, 0.8),
+    "零售": (25.0, 2.0, 1.5), "农业": (30.0, 2.5, 0.8), "机械": (24.0, 2.2, 1.2)
+}
+
+_A_AREAS = (
+    "北京", "上海", "深圳", "广东", "浙江", "江苏", "山东", "福建", "四川",
+    "湖北", "湖南", "安徽", "河南", "河北", "重庆", "天津", "陕西", "辽宁"
+)
+
+_NAME_HEADS = (
+    "华", "中", "东", "新", "国", "长", "金", "海", "天", "恒", "宏", "兴",
+    "光", "永", "泰", "盛", "鼎", "瑞", "安", "广", "信", "通", "联", "创"
+)
+
+_NAME_TAILS = (
+    "科技", "股份", "控股", "集团", "实业", "电子", "能源", "材料", "智能", "发展"
+)
+
+# 估值历史的交易日以该日期为终点向前推算，保证同一种子的结果不随运行日期变化
+HISTORY_END = date(2024, 12, 31)
+
+
+class SyntheticSource:
+    """
+    合成数据源
+
+    同时提供TushareSource（A股）和AkshareSource（港股）的接口，
+    可直接替换两者供DataManager使用。每只股票的数据只由(种子, 市场, 序号)
+    决定，单只查询无需生成整个股票池。
+    """
+
+    # 数据源名称，用于统计和指标标签
+    name = "synthetic"
+
+    def __init__(self, size: int = 10000, seed: int = 42):
+        """
+        初始化合成数据源
+
+        Args:
+            size: 每个市场的股票数量
+            seed: 随机种子，相同种子生成完全相同的数据
+        """
+        if size < 1:
+            raise ValueError(f"股票数量必须大于0: {size}")
+
+        self.size = size
+        self.seed = seed
+        # 整个市场的股票列表和估值快照生成一次后复用
+        self._basic: Dict[str, List[Dict[str, Any]]] = {}
+        self._snapshots: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        # 与其他数据源保持相同的统计接口，合成数据不限流也不重试
+        self.calls = 0
+
+        logger.info(f"合成数据源初始化完成，每个市场{size}只股票，种子{seed}")
+
+    def request_stats(self) -> Dict[str, Any]:
+        """获取调用统计"""
+        return {
+            "rate_limiter": None,
+            "retry": {"attempts": self.calls, "retries": 0, "errors": 0, "throttled": 0}
+        }
+
+    # ---- 代码与序号的映射 ----
+
+    @staticmethod
+    def a_symbol(index: int) -> str:
+        """第index只A股的代码：偶数序号为沪市6开头，奇数序号为深市0开头"""
+        if index % 2 == 0:
+            return f"{600000 + index // 2:06d}"
+        return f"{1 + index // 2:06d}"
+
+    @staticmethod
+    def hk_symbol(index: int) -> str:
+        """第index只港股的代码"""
+        return f"{index + 1:05d}"
+
+    def _index(self, symbol: str, market: str) -> Optional[int]:
+        """代码对应的序号，不在股票池中时返回None"""
+        code = symbol.split(".")[0]
+        if not code.isdigit():
+            return None
+        number = int(code)
+        if market == "A":
+            if code.startswith("6"):
+                index = (number - 600000) * 2
+            else:
+                index = (number - 1) * 2 + 1
+        else:
+            index = number - 1
+        if 0 <= index < self.size:
+            return index
+        return None
+
+    def _rng(self, market: str, index: int, kind: str) -> random.Random:
+        """每只股票、每类数据独立的随机数生成器，保证结果与调用顺序无关"""
+        return random.Random(f"{self.seed}:{market}:{index}:{kind}")
+
+    # ---- 基本信息 ----
+
+    def _profile(self, market: str, index: int) -> Dict[str, Any]:
+        rng = self._rng(market, index, "basic")
+        industry = rng.choice(_INDUSTRIES)
+        name = rng.choice(_NAME_HEADS) + rng.choice(_NAME_HEADS) + rng.choice(_NAME_TAILS)
+        if industry in ("银行", "保险", "证券"):
+            name = name[:2] + industry
+        list_year = rng.randint(1991, 2023)
+        return {
+            "industry": industry,
+            "name": name,
+            "area": rng.choice(_A_AREAS),
+            "list_date": f"{list_year}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+        }
+
+    def _a_basic(self, index: int) -> Dict[str, Any]:
+        symbol = self.a_symbol(index)
+        profile = self._profile("A", index)
+        if symbol.startswith("6"):
+            ts_code, board = f"{symbol}.SH", "主板"
+        else:
+            ts_code, board = f"{symbol}.SZ", "主板" if symbol < "002000" else "中小板"
+        return {
+            "ts_code": ts_code,
+            "symbol": symbol,
+            "name": profile["name"],
+            "area": profile["area"],
+            "industry": profile["industry"],
+            "market": board,
+            "list_date": profile["list_date"]
+        }
+
+    def _hk_basic(self, index: int) -> Dict[str, Any]:
+        valuation = self._valuation("HK", index)
+        rng = self._rng("HK", index, "quote")
+        price = round(math.exp(rng.gauss(2.0, 1.2)), 2)
+        prev_close = round(price / (1 + rng.gauss(0, 0.02)), 2)
+        volume = int(math.exp(rng.gauss(14, 1.5)))
+        return {
+            "代码": self.hk_symbol(index),
+            "名称": self._profile("HK", index)["name"],
+            "最新价": price,
+            "涨跌额": round(price - prev_close, 2),
+            "涨跌幅": round((price / prev_close - 1) * 100, 2) if prev_close else 0.0,
+            "成交量": volume,
+            "成交额": round(volume * price, 2),
+            "振幅": round(abs(rng.gauss(2.0, 1.0)), 2),
+            "最高": round(price * (1 + abs(rng.gauss(0, 0.01))), 2),
+            "最低": round(price * (1 - abs(rng.gauss(0, 0.01))), 2),
+            "今开": round(prev_close * (1 + rng.gauss(0, 0.005)), 2),
+            "昨收": prev_close,
+            "市盈率-动态": valuation["pe"],
+            "市净率": valuation["pb"],
+            "总市值": valuation["market_cap"],
+            "流通市值": round(valuation["market_cap"] * rng.uniform(0.4, 1.0))
+        }
+
+    def _stock_basic(self, market: str) -> List[Dict[str, Any]]:
+        """生成并缓存整个市场的股票列表"""
+        data = self._basic.get(market)
+        if data is None:
+            build = self._a_basic if market == "A" else self._hk_basic
+            data = [build(index) for index in range(self.size)]
+            self._basic[market] = data
+        return data
+
+    def get_stock_basic(self, market: str = "A") -> list:
+        """
+        获取A股股票列表
+
+        Args:
+            market: 市场类型，仅支持A
+
+        Returns:
+            字段与TushareSource.get_stock_basic一致的列表
+        """
+        if market != "A":
+            return []
+        self.calls += 1
+        return [dict(item) for item in self._stock_basic("A")]
+
+    def get_stock_universe(self, market: str = "A") -> Universe:
+        """获取A股列式股票池"""
+        return Universe.from_records(self.get_stock_basic(market), market)
+
+    def get_hk_stock_basic(self) -> list:
+        """获取港股股票列表，字段与AkshareSource.get_hk_stock_basic一致"""
+        self.calls += 1
+        return [dict(item) for item in self._stock_basic("HK")]
+
+    def get_hk_stock_universe(self) -> Universe:
+        """获取港股列式股票池"""
+        return Universe.from_records(self.get_hk_stock_basic(), "HK")
+
+    # ---- 估值 ----
+
+    def _valuation(self, market: str, index: int) -> Dict[str, Any]:
+        pe_center, pb_center, dividend_center = _INDUSTRY_PROFILES[
+            self._profile(market, index)["industry"]
+        ]
+        rng = self._rng(market, index, "valuation")
+        pe = pe_center * math.exp(rng.gauss(0, 0.5))
+        pb = pb_center * math.exp(rng.gauss(0, 0.45))
+        # 约两成公司不分红
+        dividend_yield = 0.0 if rng.random() < 0.2 else dividend_center * math.exp(rng.gauss(0, 0.5))
+        return {
+            "pe": round(pe, 2),
+            "pb": round(pb, 2),
+            "ps": round(pe * rng.uniform(0.05, 0.4), 2),
+            "dividend_yield": round(dividend_yield, 2),
+            "market_cap": round(math.exp(rng.gauss(23.0, 1.3)))
+        }
+
+    def _snapshot(self, market: str) -> Dict[str, Dict[str, Any]]:
+        """生成并缓存整个市场的估值，返回副本"""
+        snapshot = self._snapshots.get(market)
+        if snapshot is None:
+            name = self.a_symbol if market == "A" else self.hk_symbol
+            snapshot = {name(index): self._valuation(market, index) for index in range(self.size)}
+            self._snapshots[market] = snapshot
+        return {symbol: dict(valuation) for symbol, valuation in snapshot.items()}
+
+    def get_valuation_indicators(self, symbol: str) -> Dict[str, Any]:
+        """
+        获取A股估值指标
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            包含估值指标的字典，代码不在股票池中时为空字典
+        """
+        self.calls += 1
+        index = self._index(symbol, "A")
+        return {} if index is None else self._valuation("A", index)
+
+    async def get_valuation_indicators_async(self, symbol: str) -> Dict[str, Any]:
+        """获取A股估值指标 - 异步版"""
+        return self.get_valuation_indicators(symbol)
+
+    def get_valuation_snapshot(self, trade_date: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        获取A股全市场估值快照
+
+        Args:
+            trade_date: 交易日，合成数据忽略该参数
+
+        Returns:
+            股票代码到估值指标字典的映射
+        """
+        self.calls += 1
+        return self._snapshot("A")
+
+    def get_hk_valuation_indicators(self, symbol: str) -> Dict[str, Any]:
+        """获取港股估值指标，代码不在股票池中时为空字典"""
+        self.calls += 1
+        index = self._index(symbol, "HK")
+        return {} if index is None else self._valuation("HK", index)
+
+    async def get_hk_valuation_indicators_async(self, symbol: str) -> Dict[str, Any]:
+        """获取港股估值指标 - 异步版"""
+        return self.get_hk_valuation_indicators(symbol)
+
+    def get_hk_valuation_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取港股全市场估值快照"""
+        self.calls += 1
+        return self._snapshot("HK")
+
+    # ---- 财务指标与历史 ----
+
+    def get_financial_indicators(self, symbol: str, market: str = "A") -> Dict[str, Any]:
+        """
+        获取财务指标
+
+        Args:
+            symbol: 股票代码
+            market: 市场类型，A表示A股，HK表示港股
+
+        Returns:
+            包含ROE、毛利率、负债率、增长率等字段的字典，代码不存在时为空字典
+        """
+        self.calls += 1
+        index = self._index(symbol, market)
+        if index is None:
+            return {}
+
+        valuation = self._valuation(market, index)
+        rng = self._rng(market, index, "financial")
+        roe = valuation["pb"] / valuation["pe"] * 100
+        gross_margin = min(95.0, max(2.0, rng.gauss(30, 15)))
+        return {
+            "roe": round(roe, 2),
+            "roa": round(roe * rng.uniform(0.1, 0.6), 2),
+            "gross_margin": round(gross_margin, 2),
+            "net_margin": round(gross_margin * rng.uniform(0.1, 0.6), 2),
+            "debt_ratio": round(min(95.0, max(5.0, rng.gauss(50, 18))), 2),
+            "current_ratio": round(max(0.3, rng.gauss(1.6, 0.6)), 2),
+            "revenue_growth": round(rng.gauss(8, 15), 2),
+            "profit_growth": round(rng.gauss(6, 25), 2)
+        }
+
+    def get_valuation_history(self, symbol: str, market: str = "A",
+                              years: int = 10) -> Dict[str, List[Any]]:
+        """
+        获取逐日估值历史
+
+        以HISTORY_END为终点向前生成years年的工作日序列，终点的估值与
+        get_valuation_indicators一致，之前的估值按几何随机游走回溯。
+
+        Args:
+            symbol: 股票代码
+            market: 市场类型，A表示A股，HK表示港股
+            years: 年数
+
+        Returns:
+            列式历史数据：trade_date、close、pe、pb、dividend_yield，
+            按日期升序；代码不存在时为空字典
+        """
+        self.calls += 1
+        index = self._index(symbol, market)
+        if index is None:
+            return {}
+
+        latest = self._valuation(market, index)
+        rng = self._rng(market, index, "history")
+        pe, pb, dividend_yield = latest["pe"], latest["pb"], latest["dividend_yield"]
+        close = round(math.exp(rng.gauss(2.5, 1.0)), 2)
+
+        dates, closes, pes, pbs, dividends = [], [], [], [], []
+        day = HISTORY_END
+        start = HISTORY_END - timedelta(days=int(365.25 * years))
+        while day > start:
+            if day.weekday() < 5:
+                dates.append(day.strftime("%Y%m%d"))
+                closes.append(round(close, 2))
+                pes.append(round(pe, 2))
+                pbs.append(round(pb, 3))
+                dividends.append(round(dividend_yield, 3))
+
+                # 价格变动同时带动PE/PB，股息率反向变动；盈利和净资产另有缓慢漂移
+                step = rng.gauss(0, 0.018)
+                close /= math.exp(step)
+                pe /= math.exp(step + rng.gauss(0, 0.002))
+                pb /= math.exp(step + rng.gauss(0, 0.001))
+                dividend_yield *= math.exp(step)
+            day -= timedelta(days=1)
+
+        for column in (dates, closes, pes, pbs, dividends):
+            column.reverse()
+        return {
+            "trade_date": dates,
+            "close": closes,
+            "pe": pes,
+            "pb": pbs,
+            "dividend_yield": dividends
+        }
@@ -6,13 +6,24 @@ tushare数据源 - 无依赖版
 import os
 from typing import Dict, List, Optional, Any
 import logging
+from datetime import datetime
+
+from .universe import Universe
+from ..utils.rate_limiter import UpstreamClient, rate_limiter_from_env, retry_policy_from_env
 
 logger = logging.getLogger(__name__)
 
+# tushare接口每分钟的调用配额，以及默认允许的突发调用数
+QUOTA_PER_MINUTE = 200
+BURST = 10
+
 
-class TushareSource:
+class TushareSource(UpstreamClient):
     """tushare数据源类 - 无依赖版"""
 
+    # 数据源名称，用于统计和指标标签
+    name = "tushare"
+
     def __init__(self, token: Optional[str] = None):
         """
         初始化tushare数据源
@@ -24,6 +35,16 @@ class TushareSource:
         if not self.token:
             logger.warning("未设置TUSHARE_TOKEN环境变量，使用模拟数据")
 
+        # 进程内共享的限流器，模拟数据默认不限流。令牌桶一分钟内最多放行
+        # 速率×60 + 桶容量 次，配置了token时按此留出突发余量，不超过每分钟的配额
+        self._init_upstream(
+            rate_limiter_from_env(
+                "tushare", default_per_minute=QUOTA_PER_MINUTE - BURST if self.token else 0,
+                default_burst=BURST
+            ),
+            retry_policy_from_env()
+        )
+
         logger.info("tushare数据源初始化完成（无依赖版）")
 
     def get_stock_basic(self, market: str = "A") -> list:
@@ -39,36 +60,7 @@ class TushareSource:
         try:
             logger.info(f"获取{market}股基本信息（模拟数据）")
 
-            # 模拟数据
-            data = [
-                {
-                    'ts_code': '000001.SZ',
-                    'symbol': '000001',
-                    'name': '平安银行',
-                    'area': '深圳',
-                    'industry': '银行',
-                    'market': '主板',
-                    'list_date': '19910403'
-                },
-                {
-                    'ts_code': '000002.SZ',
-                    'symbol': '000002',
-                    'name': '万科A',
-                    'area': '深圳',
-                    'industry': '房地产',
-                    'market': '主板',
-                    'list_date': '19910129'
-                },
-                {
-                    'ts_code': '600519.SH',
-                    'symbol': '600519',
-                    'name': '贵州茅台',
-                    'area': '贵州',
-                    'industry': '白酒',
-                    'market': '主板',
-                    'list_date': '20010827'
-                }
-            ]
+            data = self._request(self._mock_stock_basic)
 
             # 过滤A股
             if market == "A":
@@ -79,6 +71,18 @@ class TushareSource:
             logger.error(f"获取股票基本信息失败: {e}")
             return []
 
+    def get_stock_universe(self, market: str = "A") -> Universe:
+        """
+        获取列式股票池
+
+        Args:
+            market: 市场类型，A表示A股
+
+        Returns:
+            股票池，获取失败时为空股票池
+        """
+        return Universe.from_records(self.get_stock_basic(market), "A")
+
     def get_valuation_indicators(self, symbol: str) -> Dict[str, Any]:
         """
         获取估值指标 - 无依赖版
@@ -92,42 +96,124 @@ class TushareSource:
         try:
             logger.info(f"获取{symbol}估值指标（模拟数据）")
 
-            # 模拟数据 - 根据股票代码返回不同的估值
-            if symbol == "000001":
-                indicators = {
-                    "pe": 5.5,
-                    "pb": 0.6,
-                    "ps": 1.2,
-                    "dividend_yield": 5.8,
-                    "market_cap": 300000000000  # 3000亿
-                }
-            elif symbol == "000002":
-                indicators = {
-                    "pe": 8.2,
-                    "pb": 1.1,
-                    "ps": 2.3,
-                    "dividend_yield": 4.5,
-                    "market_cap": 200000000000  # 2000亿
-                }
-            elif symbol == "600519":
-                indicators = {
-                    "pe": 32.5,
-                    "pb": 12.8,
-                    "ps": 25.3,
-                    "dividend_yield": 1.2,
-                    "market_cap": 2500000000000  # 2.5万亿
-                }
-            else:
-                # 默认值
-                indicators = {
-                    "pe": 15.5,
-                    "pb": 2.1,
-                    "ps": 3.2,
-                    "dividend_yield": 2.8,
-                    "market_cap": 10000000000  # 100亿
-                }
-
-            return indicators
+            return self._request(self._mock_valuation, symbol)
+        except Exception as e:
+            logger.error(f"获取估值指标失败: {e}")
+            return {}
+
+    def get_valuation_snapshot(self, trade_date: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        获取全市场估值快照 - 无依赖版
+
+        一次请求返回指定交易日所有上市股票的估值，对应tushare的daily_basic接口，
+        用于替代批量分析时逐只调用get_valuation_indicators。
+
+        Args:
+            trade_date: 交易日，格式YYYYMMDD，默认当天
+
+        Returns:
+            股票代码（不带后缀）到估值指标字典的映射
+        """
+        try:
+            trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+            logger.info(f"获取{trade_date}全市场估值快照（模拟数据）")
+
+            return self._request(lambda: {
+                item["symbol"]: self._mock_valuation(item["symbol"])
+                for item in self._mock_stock_basic()
+            })
+        except Exception as e:
+            logger.error(f"获取全市场估值快照失败: {e}")
+            return {}
+
+    def _mock_stock_basic(self) -> list:
+        """模拟数据 - A股股票列表"""
+        data = [
+            {
+                'ts_code': '000001.SZ',
+                'symbol': '000001',
+                'name': '平安银行',
+                'area': '深圳',
+                'industry': '银行',
+                'market': '主板',
+                'list_date': '19910403'
+            },
+            {
+                'ts_code': '000002.SZ',
+                'symbol': '000002',
+                'name': '万科A',
+                'area': '深圳',
+                'industry': '房地产',
+                'market': '主板',
+                'list_date': '19910129'
+            },
+            {
+                'ts_code': '600519.SH',
+                'symbol': '600519',
+                'name': '贵州茅台',
+                'area': '贵州',
+                'industry': '白酒',
+                'market': '主板',
+                'list_date': '20010827'
+            }
+        ]
+        return data
+
+    def _mock_valuation(self, symbol: str) -> Dict[str, Any]:
+        """模拟数据 - 根据股票代码返回不同的估值"""
+        if symbol == "000001":
+            indicators = {
+                "pe": 5.5,
+                "pb": 0.6,
+                "ps": 1.2,
+                "dividend_yield": 5.8,
+                "market_cap": 300000000000  # 3000亿
+            }
+        elif symbol == "000002":
+            indicators = {
+                "pe": 8.2,
+                "pb": 1.1,
+                "ps": 2.3,
+                "dividend_yield": 4.5,
+                "market_cap": 200000000000  # 2000亿
+            }
+        elif symbol == "600519":
+            indicators = {
+                "pe": 32.5,
+                "pb": 12.8,
+                "ps": 25.3,
+                "dividend_yield": 1.2,
+                "market_cap": 2500000000000  # 2.5万亿
+            }
+        else:
+            # 默认值
+            indicators = {
+                "pe": 15.5,
+                "pb": 2.1,
+                "ps": 3.2,
+                "dividend_yield": 2.8,
+                "market_cap": 10000000000  # 100亿
+            }
+
+        return indicators
+
+    async def get_valuation_indicators_async(self, symbol: str) -> Dict[str, Any]:
+        """
+        获取估值指标 - 异步版
+
+        模拟数据不涉及网络I/O，直接在事件循环中计算；
+        接入真实接口时应在此处使用异步HTTP客户端，而不是占用线程。
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            包含估值指标的字典
+        """
+        try:
+            logger.info(f"异步获取{symbol}估值指标（模拟数据）")
+
+            return await self._request_async(self._mock_valuation, symbol)
         except Exception as e:
             logger.error(f"获取估值指标失败: {e}")
-            return {}
\ No newline at end of file
+            return {}
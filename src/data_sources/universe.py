@@ -0,0 +1,615 @@
+"""
+股票池 - 无依赖版
+以列式（struct-of-arrays）存储整个市场的股票列表，
+数值列使用array('d')，行业、地区、市场等分类列使用整数编码
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Mapping,
+                    NamedTuple, Optional, Sequence, Tuple, Union)
+
+
+TEXT = "text"
+CATEGORY = "category"
+NUMBER = "number"
+
+
+class Field(NamedTuple):
+    """股票池字段定义"""
+    column: str
+    source_key: str
+    kind: str
+
+
+class UniverseSchema(NamedTuple):
+    """数据源记录到股票池列的映射"""
+    # 代码列的源字段名
+    symbol_key: str
+    # 按源记录中的字段顺序排列
+    fields: Tuple[Field, ...]
+    # 同样可用于查找的附加代码列，如A股的ts_code
+    index_columns: Tuple[str, ...] = ()
+    # 源数据中不存在、所有行取值相同的分类列
+    constants: Tuple[Tuple[str, str], ...] = ()
+
+
+A_SHARE_SCHEMA = UniverseSchema(
+    symbol_key="symbol",
+    fields=(
+        Field("ts_code", "ts_code", TEXT),
+        Field("name", "name", TEXT),
+        Field("area", "area", CATEGORY),
+        Field("industry", "industry", CATEGORY),
+        Field("market", "market", CATEGORY),
+        Field("list_date", "list_date", TEXT),
+    ),
+    index_columns=("ts_code",)
+)
+
+HK_SCHEMA = UniverseSchema(
+    symbol_key="代码",
+    fields=(
+        Field("name", "名称", TEXT),
+        Field("price", "最新价", NUMBER),
+        Field("change", "涨跌额", NUMBER),
+        Field("pct_change", "涨跌幅", NUMBER),
+        Field("volume", "成交量", NUMBER),
+        Field("amount", "成交额", NUMBER),
+        Field("amplitude", "振幅", NUMBER),
+        Field("high", "最高", NUMBER),
+        Field("low", "最低", NUMBER),
+        Field("open", "今开", NUMBER),
+        Field("prev_close", "昨收", NUMBER),
+        Field("pe", "市盈率-动态", NUMBER),
+        Field("pb", "市净率", NUMBER),
+        Field("market_cap", "总市值", NUMBER),
+        Field("float_market_cap", "流通市值", NUMBER),
+    ),
+    constants=(
+        ("industry", "未知"),
+        ("area", "香港"),
+        ("market", "HK"),
+        ("list_date", ""),
+    )
+)
+
+SCHEMAS: Dict[str, UniverseSchema] = {"A": A_SHARE_SCHEMA, "HK": HK_SCHEMA}
+
+# basic_info返回的字段
+BASIC_INFO_COLUMNS = ("name", "industry", "area", "market", "list_date")
+
+
+class Categorical:
+    """分类列：每个取值只保存一次，行内存放整数编码"""
+
+    __slots__ = ("codes", "categories", "_lookup")
+
+    def __init__(self, codes: Optional[array] = None,
+                 categories: Optional[List[str]] = None):
+        self.codes = codes if codes is not None else array("H")
+        self.categories = categories if categories is not None else []
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+
+    def append(self, value: str) -> None:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            if code > 0xFFFF and self.codes.typecode == "H":
+                self.codes = array("I", self.codes)
+            self.categories.append(value)
+            self._lookup[value] = code
+        self.codes.append(code)
+
+    def code_of(self, value: str) -> Optional[int]:
+        """返回取值对应的编码，不存在时返回None"""
+        return self._lookup.get(value)
+
+    def __getitem__(self, row: int) -> str:
+        return self.categories[self.codes[row]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[str]:
+        categories = self.categories
+        return (categories[code] for code in self.codes)
+
+
+Rows = Union[range, array]
+
+
+class ColumnView(Sequence):
+    """列视图：按行号引用底层列，不复制数据"""
+
+    __slots__ = ("_base", "_rows")
+
+    def __init__(self, base: Sequence, rows: Rows):
+        self._base = base
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return ColumnView(self._base, self._rows[position])
+        return self._base[self._rows[position]]
+
+    def __iter__(self) -> Iterator:
+        rows = self._rows
+        if isinstance(rows, range) and rows.step == 1:
+            return islice(self._base, rows.start, rows.stop)
+        base = self._base
+        return (base[row] for row in rows)
+
+    def __repr__(self) -> str:
+        return f"ColumnView({list(islice(iter(self), 10))}{', ...' if len(self) > 10 else ''})"
+
+
+class SortedIndex:
+    """数值列的排序索引：按值升序保存底层行号，缺失值（NaN）不入索引"""
+
+    __slots__ = ("values", "rows")
+
+    def __init__(self, column: Sequence[float]):
+        order = sorted((row for row, v in enumerate(column) if v == v),
+                       key=column.__getitem__)
+        self.rows = array("l", order)
+        self.values = array("d", (column[row] for row in order))
+
+    def select(self, op: str, value: float) -> Sequence[int]:
+        """
+        返回满足 列 op value 的底层行号，二分查找定位区间，不扫描整列
+
+        Args:
+            op: 比较运算符，<、<=、>、>=、==、!=
+            value: 比较值
+        """
+        values, rows = self.values, self.rows
+        if op == "<":
+            return rows[:bisect_left(values, value)]
+        if op == "<=":
+            return rows[:bisect_right(values, value)]
+        if op == ">":
+            return rows[bisect_right(values, value):]
+        if op == ">=":
+            return rows[bisect_left(values, value):]
+        if op == "==":
+            return rows[bisect_left(values, value):bisect_right(values, value)]
+        if op == "!=":
+            return rows[:bisect_left(values, value)] + rows[bisect_right(values, value):]
+        raise ValueError(f"不支持的比较运算符: {op}")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class _UniverseStore:
+    """股票池底层列存储，多个Universe视图共享"""
+
+    __slots__ = ("market", "schema", "symbols", "text", "categorical",
+                 "numeric", "index", "sorted_indexes", "category_indexes")
+
+    def __init__(self, market: str, schema: UniverseSchema):
+        self.market = market
+        self.schema = schema
+        self.symbols: List[str] = []
+        self.text: Dict[str, List[str]] = {}
+        self.categorical: Dict[str, Categorical] = {}
+        self.numeric: Dict[str, array] = {}
+        # 代码（含附加代码列）到底层行号
+        self.index: Dict[str, int] = {}
+        # 按需构建的数值列排序索引与分类列倒排索引
+        self.sorted_indexes: Dict[str, SortedIndex] = {}
+        self.category_indexes: Dict[str, Dict[int, array]] = {}
+
+    def build_index(self) -> None:
+        index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        for column in self.schema.index_columns:
+            for row, code in enumerate(self.text[column]):
+                if code:
+                    index[code] = row
+        self.index = index
+
+    def column(self, name: str) -> Sequence:
+        if name == "symbol":
+            return self.symbols
+        if name in self.numeric:
+            return self.numeric[name]
+        if name in self.categorical:
+            return self.categorical[name]
+        if name in self.text:
+            return self.text[name]
+        raise KeyError(f"股票池没有该列: {name}")
+
+
+class Universe:
+    """
+    列式股票池
+
+    切片和过滤只生成新的行号选择，底层列在视图之间共享。
+    """
+
+    __slots__ = ("_store", "_rows", "_positions")
+
+    def __init__(self, store: _UniverseStore, rows: Optional[Rows] = None):
+        self._store = store
+        self._rows: Rows = rows if rows is not None else range(len(store.symbols))
+        self._positions: Optional[Dict[int, int]] = None
+
+    # ---- 构建 ----
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]], market: str,
+                     schema: Optional[UniverseSchema] = None) -> "Universe":
+        """
+        从数据源返回的记录列表构建股票池
+
+        Args:
+            records: 字典记录序列
+            market: 市场类型，A表示A股，HK表示港股
+            schema: 字段映射，默认按市场选择
+
+        Returns:
+            股票池
+        """
+        schema = schema or SCHEMAS[market]
+        store = _UniverseStore(market, schema)
+        for field in schema.fields:
+            if field.kind == TEXT:
+                store.text[field.column] = []
+            elif field.kind == CATEGORY:
+                store.categorical[field.column] = Categorical()
+            else:
+                store.numeric[field.column] = array("d")
+        constants = [Categorical() for _ in schema.constants]
+
+        for record in records:
+            symbol = record.get(schema.symbol_key)
+            if not symbol:
+                continue
+            store.symbols.append(symbol)
+            for field in schema.fields:
+                value = record.get(field.source_key)
+                if field.kind == TEXT:
+                    store.text[field.column].append("" if value is None else str(value))
+                elif field.kind == CATEGORY:
+                    store.categorical[field.column].append("" if value is None else str(value))
+                else:
+                    store.numeric[field.column].append(math.nan if value is None else float(value))
+            for (_, value), categorical in zip(schema.constants, constants):
+                categorical.append(value)
+
+        for (column, _), categorical in zip(schema.constants, constants):
+            store.categorical[column] = categorical
+
+        store.build_index()
+        return cls(store)
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "Universe":
+        """从to_payload生成的JSON兼容结构还原股票池"""
+        market = payload["market"]
+        store = _UniverseStore(market, SCHEMAS[market])
+        store.symbols = list(payload["symbols"])
+        store.text = {name: list(values) for name, values in payload["text"].items()}
+        for name, column in payload["categorical"].items():
+            typecode = "I" if len(column["categories"]) > 0xFFFF else "H"
+            store.categorical[name] = Categorical(array(typecode, column["codes"]),
+                                                  list(column["categories"]))
+        store.numeric = {
+            name: array("d", (math.nan if v is None else v for v in values))
+            for name, values in payload["numeric"].items()
+        }
+        store.build_index()
+        return cls(store)
+
+    def to_payload(self) -> Dict[str, Any]:
+        """
+        转换为可JSON序列化的列式结构，用于磁盘缓存
+
+        只包含当前视图中的行。
+        """
+        categorical = {}
+        for name, column in self._store.categorical.items():
+            categorical[name] = {
+                "codes": list(ColumnView(column.codes, self._rows)),
+                "categories": column.categories
+            }
+        return {
+            "market": self.market,
+            "symbols": list(self.column("symbol")),
+            "text": {name: list(self.column(name)) for name in self._store.text},
+            "categorical": categorical,
+            "numeric": {
+                # JSON不支持NaN，缺失值记为null
+                name: [None if math.isnan(v) else v for v in self.column(name)]
+                for name in self._store.numeric
+            }
+        }
+
+    # ---- 基本属性 ----
+
+    @property
+    def market(self) -> str:
+        return self._store.market
+
+    @property
+    def rows(self) -> Rows:
+        """当前视图包含的底层行号"""
+        return self._rows
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        store = self._store
+        return (("symbol",) + tuple(store.text) + tuple(store.categorical)
+                + tuple(store.numeric))
+
+    @property
+    def numeric_columns(self) -> Tuple[str, ...]:
+        return tuple(self._store.numeric)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.position(symbol) is not None
+
+    def __repr__(self) -> str:
+        return f"Universe(market={self.market!r}, rows={len(self)})"
+
+    # ---- 列访问 ----
+
+    def column(self, name: str) -> Sequence:
+        """
+        获取列视图
+
+        Args:
+            name: 列名，symbol表示股票代码
+
+        Returns:
+            完整股票池返回底层列本身，视图返回不复制数据的ColumnView
+        """
+        base = self._store.column(name)
+        if self._is_full():
+            return base
+        return ColumnView(base, self._rows)
+
+    def codes(self, name: str) -> Sequence[int]:
+        """获取分类列的整数编码视图"""
+        codes = self._store.categorical[name].codes
+        if self._is_full():
+            return codes
+        return ColumnView(codes, self._rows)
+
+    def categories(self, name: str) -> List[str]:
+        """获取分类列的全部取值"""
+        return self._store.categorical[name].categories
+
+    def as_columns(self, names: Optional[Iterable[str]] = None) -> Dict[str, Sequence[float]]:
+        """
+        获取数值列字典，可直接传给scoring.score_batch
+
+        Args:
+            names: 列名，默认全部数值列
+        """
+        names = self._store.numeric if names is None else names
+        return {name: self.column(name) for name in names}
+
+    # ---- 查找 ----
+
+    def position(self, symbol: str) -> Optional[int]:
+        """
+        返回代码在当前视图中的位置
+
+        Args:
+            symbol: 股票代码，A股也可使用ts_code
+
+        Returns:
+            视图内的位置，不存在时返回None
+        """
+        row = self._store.index.get(symbol)
+        if row is None:
+            return None
+        rows = self._rows
+        if isinstance(rows, range):
+            if row in rows:
+                return (row - rows.start) // rows.step
+            return None
+        if self._positions is None:
+            self._positions = {base: pos for pos, base in enumerate(rows)}
+        return self._positions.get(row)
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """返回视图中指定位置的一行，键为列名"""
+        store = self._store
+        row = self._rows[position]
+        record: Dict[str, Any] = {"symbol": store.symbols[row]}
+        for name, values in store.text.items():
+            record[name] = values[row]
+        for name, column in store.categorical.items():
+            record[name] = column[row]
+        for name, values in store.numeric.items():
+            record[name] = values[row]
+        return record
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """按代码查找一行，不存在时返回None"""
+        position = self.position(symbol)
+        return None if position is None else self.record(position)
+
+    def basic_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        按代码返回DataManager使用的基本信息
+
+        Returns:
+            包含name、industry、area、market、list_date的字典，不存在时返回None
+        """
+        position = self.position(symbol)
+        if position is None:
+            return None
+        store = self._store
+        row = self._rows[position]
+        info = {}
+        for name in BASIC_INFO_COLUMNS:
+            if name in store.text:
+                info[name] = store.text[name][row]
+            else:
+                info[name] = store.categorical[name][row]
+        return info
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self)):
+            yield self.record(position)
+
+    def to_records(self, source_keys: bool = False) -> List[Dict[str, Any]]:
+        """
+        转换为字典列表
+
+        Args:
+            source_keys: 为True时使用数据源的原始字段名，
+                与get_stock_basic / get_hk_stock_basic的返回格式一致
+
+        Returns:
+            字典列表
+        """
+        if not source_keys:
+            return list(self)
+
+        store = self._store
+        schema = store.schema
+        records = []
+        for row in self._rows:
+            record: Dict[str, Any] = {schema.symbol_key: store.symbols[row]}
+            for field in schema.fields:
+                record[field.source_key] = store.column(field.column)[row]
+            records.append(record)
+        return records
+
+    # ---- 切片与过滤 ----
+
+    def __getitem__(self, key: slice) -> "Universe":
+        if not isinstance(key, slice):
+            raise TypeError("Universe只支持切片，单行请使用record()或get()")
+        return Universe(self._store, self._rows[key])
+
+    def take(self, positions: Iterable[int]) -> "Universe":
+        """按视图内的位置选取行，底层列不复制"""
+        rows = self._rows
+        return Universe(self._store, array("l", (rows[p] for p in positions)))
+
+    def filter(self, mask: Union[Sequence[bool], Callable[[Dict[str, Any]], bool]]) -> "Universe":
+        """
+        过滤行
+
+        Args:
+            mask: 与视图等长的布尔序列，或接收一行记录返回布尔值的函数
+
+        Returns:
+            新的股票池视图
+        """
+        if callable(mask):
+            return self.take(p for p in range(len(self)) if mask(self.record(p)))
+        if len(mask) != len(self):
+            raise ValueError(f"过滤掩码长度{len(mask)}与股票池行数{len(self)}不一致")
+        return self.take(p for p, keep in enumerate(mask) if keep)
+
+    def where(self, name: str, values: Iterable[str]) -> "Universe":
+        """
+        按分类列取值过滤，只比较整数编码
+
+        Args:
+            name: 分类列名，如industry
+            values: 要保留的取值
+
+        Returns:
+            新的股票池视图
+        """
+        column = self._store.categorical[name]
+        wanted = {column.code_of(v) for v in values} - {None}
+        return self.take(p for p, code in enumerate(self.codes(name)) if code in wanted)
+
+    def select_rows(self, rows: Iterable[int]) -> "Universe":
+        """
+        按底层行号选取行，底层列不复制
+
+        不在当前视图中的行号会被忽略，结果保持当前视图的行顺序。
+        """
+        wanted = rows if isinstance(rows, (set, frozenset)) else set(rows)
+        return Universe(self._store, array("l", (row for row in self._rows if row in wanted)))
+
+    def with_columns(self, columns: Mapping[str, Sequence[float]]) -> "Universe":
+        """
+        附加数值列，返回新的股票池
+
+        新股票池与原股票池共享代码、文本和分类列，只新建数值列。
+
+        Args:
+            columns: 列名到数值序列的映射，与当前视图等长，缺失值使用NaN
+
+        Returns:
+            包含附加列的股票池，行选择与当前视图相同
+        """
+        old = self._store
+        store = _UniverseStore(old.market, old.schema)
+        store.symbols = old.symbols
+        store.text = old.text
+        store.categorical = old.categorical
+        store.index = old.index
+        store.category_indexes = old.category_indexes
+        store.numeric = dict(old.numeric)
+        store.sorted_indexes = {k: v for k, v in old.sorted_indexes.items()
+                                if k not in columns}
+
+        size = len(old.symbols)
+        for name, values in columns.items():
+            if len(values) != len(self):
+                raise ValueError(f"列{name}长度{len(values)}与股票池行数{len(self)}不一致")
+            if self._is_full():
+                store.numeric[name] = array("d", values)
+            else:
+                column = array("d", [math.nan]) * size
+                for row, value in zip(self._rows, values):
+                    column[row] = value
+                store.numeric[name] = column
+        return Universe(store, self._rows)
+
+    # ---- 索引 ----
+
+    def sorted_index(self, name: str) -> SortedIndex:
+        """获取数值列的排序索引，首次使用时构建并在视图之间共享"""
+        store = self._store
+        index = store.sorted_indexes.get(name)
+        if index is None:
+            index = SortedIndex(store.numeric[name])
+            store.sorted_indexes[name] = index
+        return index
+
+    def category_rows(self, name: str, value: str) -> Sequence[int]:
+        """
+        按分类列取值返回底层行号，使用按需构建的倒排索引
+
+        Args:
+            name: 分类列名
+            value: 取值
+        """
+        store = self._store
+        inverted = store.category_indexes.get(name)
+        if inverted is None:
+            inverted = {}
+            for row, code in enumerate(store.categorical[name].codes):
+                rows = inverted.get(code)
+                if rows is None:
+                    rows = inverted[code] = array("l")
+                rows.append(row)
+            store.category_indexes[name] = inverted
+        code = store.categorical[name].code_of(value)
+        return inverted.get(code, array("l"))
+
+    def _is_full(self) -> bool:
+        rows = self._rows
+        return (isinstance(rows, range) and rows.start == 0 and rows.step == 1
+                and rows.stop == len(self._store.symbols))
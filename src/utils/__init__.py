@@ -3,6 +3,21 @@
 提供各种工具函数
 """
 
-from .logger import setup_logger
+from .lazy import lazy_module_attrs
 
-__all__ = ["setup_logger"]
\ No newline at end of file
+# 导出名 -> 所在模块，首次访问时才导入
+_LAZY = {
+    "setup_logger": ".logger",
+    "TTLCache": ".cache",
+    "SingleFlight": ".singleflight",
+    "TokenBucket": ".rate_limiter",
+    "RetryPolicy": ".rate_limiter",
+    "ThrottleError": ".rate_limiter",
+    "BoundedCaller": ".rate_limiter",
+    "UpstreamClient": ".rate_limiter"
+}
+
+__all__ = ["setup_logger", "TTLCache", "SingleFlight", "TokenBucket", "RetryPolicy",
+           "ThrottleError", "BoundedCaller", "UpstreamClient"]
+
+__getattr__, __dir__ = lazy_module_attrs(__name__, _LAZY)
@@ -0,0 +1,134 @@
+"""
+缓存工具 - 无依赖版
+提供带过期时间的LRU内存缓存
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """带过期时间的LRU缓存，线程安全"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大条目数，超出后淘汰最久未使用的条目
+            ttl: 默认过期时间（秒）
+        """
+        if maxsize <= 0:
+            raise ValueError(f"缓存容量必须大于0: {maxsize}")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            default: 未命中或已过期时的返回值
+
+        Returns:
+            缓存值
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 本条目的过期时间（秒），默认使用缓存的ttl
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (expires_at, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        删除单个条目
+
+        Returns:
+            条目是否存在
+        """
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_where(self, predicate) -> int:
+        """
+        删除满足条件的条目
+
+        Args:
+            predicate: 接收缓存键，返回True表示删除
+
+        Returns:
+            删除的条目数
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            包含命中、未命中、淘汰次数和当前大小的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,184 @@
+"""
+磁盘缓存 - 无依赖版
+基于SQLite（WAL模式）的持久化缓存，可供多个进程同时读写
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """SQLite磁盘缓存，值以JSON存储并带过期时间"""
+
+    def __init__(self, cache_dir: str, ttl: float = 3600,
+                 filename: str = "gems_cache.sqlite3", timeout: float = 5.0):
+        """
+        初始化磁盘缓存
+
+        Args:
+            cache_dir: 缓存目录，不存在时自动创建
+            ttl: 默认过期时间（秒）
+            filename: 数据库文件名
+            timeout: 等待其他进程写锁的超时时间（秒）
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, filename)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+        self.purge_expired()
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接，sqlite3连接不能跨线程共享"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   isolation_level=None)
+            # WAL模式下读写互不阻塞，适合多个CLI进程并发访问
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            default: 未命中或已过期时的返回值
+
+        Returns:
+            缓存值
+        """
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            self._count(False)
+            return default
+
+        self._count(True)
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的值
+            ttl: 本条目的过期时间（秒），默认使用缓存的ttl
+        """
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, payload, now, expires_at)
+            )
+
+    def set_many(self, items: Iterable[Tuple[str, Any]], ttl: Optional[float] = None) -> int:
+        """
+        在一个事务中批量写入缓存
+
+        Args:
+            items: (缓存键, 值) 序列
+            ttl: 过期时间（秒），默认使用缓存的ttl
+
+        Returns:
+            写入的条目数
+        """
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        rows = [
+            (key, json.dumps(value, ensure_ascii=False, separators=(",", ":")), now, expires_at)
+            for key, value in items
+        ]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def delete(self, key: str) -> int:
+        """删除单个条目，返回删除的条目数"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+
+    def delete_prefix(self, prefix: str) -> int:
+        """删除以prefix开头的条目，返回删除的条目数"""
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",)
+            ).rowcount
+
+    def purge_expired(self) -> int:
+        """清理已过期的条目，返回清理的条目数"""
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            包含数据库路径、条目数和本进程命中情况的字典
+        """
+        size = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "path": self.path,
+                "size": size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,35 @@
+"""
+延迟导入工具 - 无依赖版
+包的导出名在首次访问时才导入所在子模块（PEP 562），缩短命令行启动时间
+"""
+
+import importlib
+import sys
+from typing import Any, Callable, List, Mapping, Tuple
+
+
+def lazy_module_attrs(name: str, mapping: Mapping[str, str]
+                      ) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    生成包级别的__getattr__和__dir__
+
+    Args:
+        name: 包名，在包的__init__中传入__name__
+        mapping: 导出名到所在模块的映射，模块名相对于该包
+
+    Returns:
+        (__getattr__, __dir__)，在包的__init__中赋给同名变量
+    """
+    def __getattr__(attr: str) -> Any:
+        module = mapping.get(attr)
+        if module is None:
+            raise AttributeError(f"module {name!r} has no attribute {attr!r}")
+        value = getattr(importlib.import_module(module, name), attr)
+        # 写入包的命名空间，之后的访问不再经过__getattr__
+        setattr(sys.modules[name], attr, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[name])) | set(mapping))
+
+    return __getattr__, __dir__
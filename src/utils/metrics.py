@@ -0,0 +1,194 @@
+"""
+指标导出工具 - 无依赖版
+生成Prometheus文本格式（0.0.4）的指标快照，并可通过本地HTTP端点提供
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Optional[Mapping[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    # Prometheus文本格式中的特殊值写作NaN、+Inf和-Inf
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsWriter:
+    """
+    Prometheus文本格式生成器
+
+    同名指标的多个样本（不同标签）归入同一组，HELP和TYPE只输出一次。
+    """
+
+    def __init__(self, prefix: str = "gems"):
+        """
+        初始化生成器
+
+        Args:
+            prefix: 指标名前缀
+        """
+        self.prefix = prefix
+        # 指标名 -> (类型, 说明, 样本行)
+        self._families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def _family(self, name: str, kind: str, help_text: str) -> List[str]:
+        full_name = self._full_name(name)
+        family = self._families.get(full_name)
+        if family is None:
+            family = self._families[full_name] = (kind, help_text, [])
+        return family[2]
+
+    def _full_name(self, name: str) -> str:
+        return f"{self.prefix}_{name}" if self.prefix else name
+
+    def counter(self, name: str, value: float, help_text: str = "",
+                labels: Optional[Mapping[str, str]] = None) -> None:
+        """添加计数器样本，name应以_total结尾"""
+        self._family(name, "counter", help_text).append(
+            f"{self._full_name(name)}{_format_labels(labels)} {_format_value(value)}"
+        )
+
+    def gauge(self, name: str, value: float, help_text: str = "",
+              labels: Optional[Mapping[str, str]] = None) -> None:
+        """添加仪表样本"""
+        self._family(name, "gauge", help_text).append(
+            f"{self._full_name(name)}{_format_labels(labels)} {_format_value(value)}"
+        )
+
+    def histogram(self, name: str, buckets: Sequence[Tuple[float, int]], total: float,
+                  count: int, help_text: str = "",
+                  labels: Optional[Mapping[str, str]] = None) -> None:
+        """
+        添加直方图样本
+
+        Args:
+            name: 指标名
+            buckets: [(桶上界, 累积样本数)]，不含+Inf
+            total: 样本值之和
+            count: 样本数
+            help_text: 说明
+            labels: 标签
+        """
+        lines = self._family(name, "histogram", help_text)
+        full_name = self._full_name(name)
+        base = dict(labels or {})
+        for bound, cumulative in list(buckets) + [(float("inf"), count)]:
+            bucket_labels = {**base, "le": _format_value(bound)}
+            lines.append(f"{full_name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{full_name}_sum{_format_labels(base)} {_format_value(total)}")
+        lines.append(f"{full_name}_count{_format_labels(base)} {count}")
+
+    def render(self) -> str:
+        """生成完整的文本快照"""
+        output = []
+        for name, (kind, help_text, lines) in self._families.items():
+            if help_text:
+                output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+
+class MetricsServer:
+    """
+    本地指标HTTP端点
+
+    GET /metrics 返回render()生成的文本快照，其他路径返回404。
+    """
+
+    def __init__(self, render: Callable[[], str], host: str = "127.0.0.1", port: int = 9464):
+        """
+        初始化指标端点
+
+        Args:
+            render: 生成指标文本的函数，每次请求调用一次
+            host: 监听地址，默认只监听本机
+            port: 监听端口，0表示自动分配
+        """
+        # http.server导入较慢，只在启动端点时导入
+        from http.server import ThreadingHTTPServer
+
+        self.render = render
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """指标地址"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def _handler_class(self):
+        from http.server import BaseHTTPRequestHandler
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                try:
+                    payload = server.render().encode("utf-8")
+                except Exception as e:
+                    logger.error(f"生成指标失败: {e}")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> "MetricsServer":
+        """在后台线程中启动端点"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"指标端点已启动: {self.url}")
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程中运行端点，直到被中断"""
+        logger.info(f"指标端点已启动: {self.url}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """停止端点"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
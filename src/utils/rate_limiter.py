@@ -0,0 +1,426 @@
+"""
+限流与重试工具 - 无依赖版
+令牌桶限流器在同一进程内的所有线程和协程之间共享，
+重试使用带随机抖动的指数退避
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottleError(Exception):
+    """数据源返回的限流错误（如超过每分钟调用次数）"""
+
+
+# 默认可重试的异常：超时、连接错误和限流
+# asyncio按需导入以缩短启动时间，其TimeoutError在call_async中补充
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    TimeoutError, ConnectionError, ThrottleError
+)
+
+
+class TokenBucket:
+    """
+    令牌桶限流器
+
+    以rate个/秒的速度补充令牌，最多积累burst个。获取令牌时先预留，
+    令牌不足时按欠额计算等待时间，等待期间其他调用方继续排在其后，
+    因此并发调用的总速率不会超过rate。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        初始化限流器
+
+        Args:
+            rate: 每秒补充的令牌数，必须大于0
+            burst: 桶容量，即允许的突发调用数
+        """
+        if rate <= 0:
+            raise ValueError(f"限流速率必须大于0: {rate}")
+        if burst < 1:
+            raise ValueError(f"桶容量必须不小于1: {burst}")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _reserve(self, tokens: float, timeout: Optional[float]) -> Optional[float]:
+        """预留令牌，返回需要等待的秒数；超过timeout时不预留并返回None"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return None
+
+            self._tokens -= tokens
+            self.acquired += 1
+            self.waited += wait
+            return wait
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        获取令牌，令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            是否获取成功
+        """
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """异步获取令牌，等待时不阻塞事件循环"""
+        import asyncio
+
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """获取限流统计"""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "acquired": self.acquired,
+                "waited_seconds": self.waited
+            }
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, burst: int = 1) -> TokenBucket:
+    """
+    获取按名称共享的限流器
+
+    同一进程内相同名称只创建一个限流器，后续调用忽略rate和burst参数，
+    保证多个DataManager实例共用同一份配额。
+
+    Args:
+        name: 限流器名称，通常为数据源名称
+        rate: 每秒补充的令牌数
+        burst: 桶容量
+
+    Returns:
+        限流器
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucket(rate, burst)
+            _limiters[name] = limiter
+        return limiter
+
+
+class RetryPolicy:
+    """带随机抖动的指数退避重试策略"""
+
+    def __init__(self, retries: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 30.0,
+                 retry_on: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS):
+        """
+        初始化重试策略
+
+        Args:
+            retries: 失败后的最大重试次数
+            base_delay: 首次重试的退避上限（秒）
+            max_delay: 单次退避的最大时长（秒）
+            retry_on: 需要重试的异常类型
+        """
+        self.retries = max(0, retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+
+        # attempts: 调用次数（含重试）；retried: 重试次数；
+        # errors: 失败次数；throttled: 其中被数据源限流的次数
+        self.attempts = 0
+        self.retried = 0
+        self.errors = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次重试前的等待时间，在[0, 指数上限]内均匀取值"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _record(self, retried: bool) -> None:
+        with self._lock:
+            if retried:
+                self.retried += 1
+            else:
+                self.attempts += 1
+
+    def _record_error(self, error: BaseException) -> None:
+        with self._lock:
+            self.errors += 1
+            if isinstance(error, ThrottleError):
+                self.throttled += 1
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        调用fn，遇到可重试异常时退避后重试
+
+        Returns:
+            fn的返回值
+
+        Raises:
+            最后一次失败的异常，或不可重试的异常
+        """
+        for attempt in range(self.retries + 1):
+            self._record(False)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                self._record_error(e)
+                if not isinstance(e, self.retry_on):
+                    raise
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff(attempt)
+                self._record(True)
+                logger.warning(f"调用失败，{delay:.2f}秒后第{attempt + 1}次重试: {e}")
+                time.sleep(delay)
+
+    async def call_async(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """异步版本，退避等待时不阻塞事件循环"""
+        import asyncio
+
+        retry_on = self.retry_on
+        if TimeoutError in retry_on:
+            # Python 3.11之前asyncio.TimeoutError不是内置TimeoutError的子类
+            retry_on = retry_on + (asyncio.TimeoutError,)
+        for attempt in range(self.retries + 1):
+            self._record(False)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                self._record_error(e)
+                if not isinstance(e, retry_on):
+                    raise
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff(attempt)
+                self._record(True)
+                logger.warning(f"调用失败，{delay:.2f}秒后第{attempt + 1}次重试: {e}")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, int]:
+        """获取重试统计"""
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "retries": self.retried,
+                "errors": self.errors,
+                "throttled": self.throttled
+            }
+
+
+class BoundedCaller:
+    """
+    在固定大小的线程池中调用同步接口，超过timeout秒仍未返回时放弃等待
+
+    同步接口无法从外部中止，被放弃的调用会继续运行至结束，期间一直占用
+    一个并发名额。名额用完时新的调用等待（计入timeout），因此超时后的
+    重试不会在上游叠加额外的并发负载，线程数也不会随超时次数增长。
+    """
+
+    def __init__(self, max_workers: int = 8, name: str = "upstream"):
+        """
+        初始化调用器
+
+        Args:
+            max_workers: 同时进行的调用数上限（含已放弃但仍在运行的调用）
+            name: 工作线程名前缀
+        """
+        if max_workers < 1:
+            raise ValueError(f"并发调用数必须不小于1: {max_workers}")
+
+        self.max_workers = max_workers
+        self.name = name
+        self._slots = threading.BoundedSemaphore(max_workers)
+        # 线程池在首次需要超时控制时才创建
+        self._executor = None
+        self._lock = threading.Lock()
+        # 已放弃等待但仍在运行的调用
+        self._abandoned: Set[Any] = set()
+        self.timeouts = 0
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+    def _finished(self, future) -> None:
+        with self._lock:
+            self._abandoned.discard(future)
+        self._slots.release()
+
+    def call(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """
+        调用fn并等待结果
+
+        Args:
+            fn: 被调用的函数
+            timeout: 超时秒数（含等待并发名额的时间），None或不大于0时在当前线程直接调用
+
+        Returns:
+            fn的返回值
+
+        Raises:
+            TimeoutError: 超时，或等待并发名额超时
+            fn抛出的异常
+        """
+        if timeout is None or timeout <= 0:
+            return fn(*args)
+
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"等待并发名额超过{timeout:g}秒，"
+                               f"{len(self._abandoned)}个已超时的调用仍在运行")
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._finished)
+
+        try:
+            return future.result(max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            # Python 3.11之前concurrent.futures.TimeoutError不是内置TimeoutError的子类
+            with self._lock:
+                if not future.done():
+                    self._abandoned.add(future)
+                self.timeouts += 1
+            raise TimeoutError(f"调用超过{timeout:g}秒未返回") from None
+
+    def stats(self) -> Dict[str, int]:
+        """获取调用统计"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "timeouts": self.timeouts,
+                "abandoned": len(self._abandoned)
+            }
+
+
+class UpstreamClient:
+    """
+    数据源调用上游接口的公共部分：限流、单次超时和重试
+
+    数据源在__init__中调用_init_upstream传入自己的限流器和重试策略，
+    之后通过_request/_request_async调用上游接口。
+    """
+
+    # 数据源名称，用于统计和指标标签
+    name = "upstream"
+
+    def _init_upstream(self, rate_limiter: Optional[TokenBucket],
+                       retry_policy: RetryPolicy) -> None:
+        """
+        初始化限流、超时和重试
+
+        Args:
+            rate_limiter: 进程内共享的限流器，None表示不限流
+            retry_policy: 重试策略
+        """
+        # 单次请求超时（秒），同步和异步请求都按此放弃等待
+        self.timeout = float(os.getenv("DATA_SOURCE_TIMEOUT", "30"))
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        # 同步请求的线程池，每个数据源一个，超时后仍在运行的调用也占用名额
+        self.caller = BoundedCaller(int(os.getenv("DATA_SOURCE_MAX_WORKERS", "8")), self.name)
+
+    def _request(self, fn: Callable[..., Any], *args) -> Any:
+        """经限流和重试调用上游接口，每次尝试消耗一个令牌，超过timeout视为超时"""
+        def _attempt():
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return self.caller.call(fn, *args, timeout=self.timeout)
+
+        return self.retry_policy.call(_attempt)
+
+    async def _request_async(self, fn: Callable[..., Any], *args) -> Any:
+        """异步版本：等待令牌和退避时不阻塞事件循环，单次尝试超过timeout视为超时"""
+        import asyncio
+
+        async def _attempt():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            return await asyncio.wait_for(self._call_upstream_async(fn, *args), self.timeout)
+
+        return await self.retry_policy.call_async(_attempt)
+
+    async def _call_upstream_async(self, fn: Callable[..., Any], *args) -> Any:
+        """模拟数据不涉及网络I/O，直接计算；接入真实接口时在此使用异步HTTP客户端"""
+        return fn(*args)
+
+    def request_stats(self) -> Dict[str, Any]:
+        """获取限流、重试和超时统计"""
+        return {
+            "rate_limiter": self.rate_limiter.stats() if self.rate_limiter else None,
+            "retry": self.retry_policy.stats(),
+            "calls": self.caller.stats()
+        }
+
+
+def rate_limiter_from_env(name: str, default_per_minute: float = 0,
+                          default_burst: int = 1) -> Optional[TokenBucket]:
+    """
+    按环境变量创建共享限流器
+
+    读取 {NAME}_RATE_LIMIT（每分钟调用次数，0表示不限流）和 {NAME}_BURST。
+
+    Args:
+        name: 数据源名称，如tushare
+        default_per_minute: 未配置时的每分钟调用次数
+        default_burst: 未配置时的桶容量
+
+    Returns:
+        限流器，不限流时返回None
+    """
+    prefix = name.upper()
+    per_minute = float(os.getenv(f"{prefix}_RATE_LIMIT", default_per_minute))
+    if per_minute <= 0:
+        return None
+    burst = int(os.getenv(f"{prefix}_BURST", default_burst))
+    return get_rate_limiter(name, per_minute / 60.0, burst)
+
+
+def retry_policy_from_env() -> RetryPolicy:
+    """按DATA_SOURCE_RETRY创建重试策略"""
+    return RetryPolicy(retries=int(os.getenv("DATA_SOURCE_RETRY", "3")))
@@ -0,0 +1,111 @@
+"""
+请求合并工具 - 无依赖版
+同一个键的并发请求只执行一次，所有等待者共享结果或异常
+"""
+
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """同键请求合并，线程和协程均可使用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], "asyncio.Task"] = {}
+
+        # executed: 实际执行的次数；shared: 复用进行中调用结果的次数
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行fn，同一时刻相同key只执行一次
+
+        Args:
+            key: 请求键
+            fn: 无参可调用对象
+
+        Returns:
+            fn的返回值，跟随者得到与执行者相同的对象
+
+        Raises:
+            fn抛出的异常，所有等待者都会收到
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        异步版本：同一事件循环中相同key只执行一次
+
+        实际请求在独立任务中执行，某个等待者被取消不会影响其他等待者。
+
+        Args:
+            key: 请求键
+            fn: 返回协程的无参可调用对象
+
+        Returns:
+            协程的返回值
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = loop.create_task(fn())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+            with self._lock:
+                self.executed += 1
+        else:
+            with self._lock:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """获取合并统计"""
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "shared": self.shared,
+                "in_flight": len(self._calls) + len(self._tasks)
+            }
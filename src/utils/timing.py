@@ -0,0 +1,193 @@
+"""
+阶段计时工具 - 无依赖版
+记录单次分析各阶段的耗时，并在分析器上汇总为分位数统计
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# 分析流程的阶段名称，按执行顺序排列
+STAGES = ("fetch_basic", "fetch_valuation", "fetch_history", "score", "render", "serialize", "total")
+
+# 耗时直方图的桶上界（秒），与Prometheus默认桶相近并补充了亚毫秒级的桶
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def percentile(sorted_samples: Sequence[float], q: float) -> float:
+    """
+    最近秩法分位数
+
+    Args:
+        sorted_samples: 已升序排列的样本
+        q: 分位（0~100）
+
+    Returns:
+        分位数，样本为空时为0
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class StageTimer:
+    """单次调用的阶段计时器，同一阶段多次计时时累加"""
+
+    __slots__ = ("timings",)
+
+    def __init__(self):
+        # 阶段名 -> 耗时（秒）
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """计时一个阶段，阶段内抛出异常时同样记录耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """记录一个阶段的耗时（秒）"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def as_ms(self) -> Dict[str, float]:
+        """各阶段耗时（毫秒），按STAGES顺序排列"""
+        ordered = sorted(self.timings, key=lambda name: (
+            STAGES.index(name) if name in STAGES else len(STAGES), name
+        ))
+        return {name: round(self.timings[name] * 1000, 3) for name in ordered}
+
+
+class TimingStats:
+    """
+    阶段耗时汇总，线程安全
+
+    每个阶段保留最近max_samples个样本用于计算分位数；计数、总耗时和
+    直方图桶计数覆盖全部样本，不受此限制。
+    """
+
+    def __init__(self, max_samples: int = 100000,
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        初始化汇总器
+
+        Args:
+            max_samples: 每个阶段保留的样本数上限
+            buckets: 直方图桶上界（秒），升序
+        """
+        self.max_samples = max_samples
+        self.buckets = tuple(buckets)
+        self._samples: Dict[str, Deque[float]] = {}
+        self._bucket_counts: Dict[str, List[int]] = {}
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: Mapping[str, float]) -> None:
+        """
+        记录一次调用的各阶段耗时
+
+        Args:
+            timings: 阶段名 -> 耗时（秒）
+        """
+        with self._lock:
+            for name, seconds in timings.items():
+                samples = self._samples.get(name)
+                if samples is None:
+                    samples = self._samples[name] = deque(maxlen=self.max_samples)
+                samples.append(seconds)
+                counts = self._bucket_counts.get(name)
+                if counts is None:
+                    counts = self._bucket_counts[name] = [0] * len(self.buckets)
+                position = bisect_left(self.buckets, seconds)
+                if position < len(counts):
+                    counts[position] += 1
+                self._counts[name] = self._counts.get(name, 0) + 1
+                self._totals[name] = self._totals.get(name, 0.0) + seconds
+
+    def add(self, name: str, seconds: float) -> None:
+        """记录单个阶段的耗时（秒）"""
+        self.record({name: seconds})
+
+    def summary(self, stages: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        各阶段统计
+
+        Args:
+            stages: 只返回这些阶段，None表示全部
+
+        Returns:
+            阶段名 -> {count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms}
+        """
+        with self._lock:
+            names = [name for name in self._samples if stages is None or name in stages]
+            snapshot = {name: sorted(self._samples[name]) for name in names}
+            counts = dict(self._counts)
+            totals = dict(self._totals)
+
+        names.sort(key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), name))
+        result = {}
+        for name in names:
+            samples = snapshot[name]
+            count = counts[name]
+            result[name] = {
+                "count": count,
+                "total_ms": totals[name] * 1000,
+                "mean_ms": totals[name] / count * 1000 if count else 0.0,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000
+            }
+        return result
+
+    def histograms(self) -> Dict[str, Tuple[List[Tuple[float, int]], float, int]]:
+        """
+        各阶段的累积直方图
+
+        Returns:
+            阶段名 -> ([(桶上界, 不超过该上界的样本数)], 总耗时秒数, 样本数)
+        """
+        with self._lock:
+            result = {}
+            for name, counts in self._bucket_counts.items():
+                cumulative, running = [], 0
+                for bound, count in zip(self.buckets, counts):
+                    running += count
+                    cumulative.append((bound, running))
+                result[name] = (cumulative, self._totals[name], self._counts[name])
+            return result
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._samples.clear()
+            self._bucket_counts.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+
+def format_timings(summary: Mapping[str, Mapping[str, float]]) -> str:
+    """
+    将TimingStats.summary的结果格式化为文本表格
+
+    Args:
+        summary: 阶段统计
+
+    Returns:
+        多行文本
+    """
+    lines = [f"{'阶段':<18}{'次数':>8}{'总耗时(ms)':>14}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"]
+    for name, item in summary.items():
+        lines.append(
+            f"{name:<18}{item['count']:>8}{item['total_ms']:>14.1f}"
+            f"{item['p50_ms']:>10.3f}{item['p95_ms']:>10.3f}{item['p99_ms']:>10.3f}"
+        )
+    return "\n".join(lines)
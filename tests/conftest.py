@@ -0,0 +1,18 @@
+"""
+测试公共配置
+使用合成数据源、只用内存缓存，测试不访问网络，也不在工作目录中写入缓存文件
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+os.environ["DATA_SOURCE"] = "synthetic"
+os.environ["SYNTHETIC_SIZE"] = "500"
+os.environ["CACHE_DIR"] = ""
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+for name in ("RESULT_STORE_DIR", "HISTORY_STORE_DIR"):
+    os.environ.pop(name, None)
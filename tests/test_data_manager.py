@@ -0,0 +1,64 @@
+"""数据管理器的缓存与请求合并"""
+
+import asyncio
+
+from src.data_sources.data_manager import DataManager
+
+
+class _CountingSource:
+    """记录调用次数的假数据源"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_valuation_indicators(self, symbol):
+        self.calls += 1
+        return {"symbol": symbol, "pe": 10.0, "pb": 1.0}
+
+    async def get_valuation_indicators_async(self, symbol):
+        return self.get_valuation_indicators(symbol)
+
+
+def _manager_with_late_cache_fill():
+    """第一次查缓存未命中，随后由另一个合并窗口写入缓存的数据管理器"""
+    manager = DataManager()
+    source = _CountingSource()
+    manager.tushare_source = source
+    key = ("valuation", "A", "600519")
+    manager._cache_set(key, {"symbol": "600519", "pe": 8.0, "pb": 0.8})
+
+    cache_get = manager._cache_get
+    misses = []
+
+    def _cache_get(k):
+        if k == key and not misses:
+            misses.append(k)
+            return None
+        return cache_get(k)
+
+    manager._cache_get = _cache_get
+    return manager, source
+
+
+def test_fetch_rechecks_cache_before_calling_source():
+    manager, source = _manager_with_late_cache_fill()
+    data = manager.get_valuation_indicators("600519", "A")
+    assert data["pe"] == 8.0
+    assert source.calls == 0
+
+
+def test_async_fetch_rechecks_cache_before_calling_source():
+    manager, source = _manager_with_late_cache_fill()
+    data = asyncio.run(manager.get_valuation_indicators_async("600519", "A"))
+    assert data["pe"] == 8.0
+    assert source.calls == 0
+
+
+def test_fetch_returns_copies_and_caches():
+    manager = DataManager()
+    source = _CountingSource()
+    manager.tushare_source = source
+    first = manager.get_valuation_indicators("000001", "A")
+    first["pe"] = -1.0
+    assert manager.get_valuation_indicators("000001", "A")["pe"] == 10.0
+    assert source.calls == 1
@@ -0,0 +1,195 @@
+"""估值历史存储的写入、区间读取和历史分位"""
+
+import math
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from src.data_sources.history_store import (MIN_PERCENTILE_COVERAGE, PERCENTILE_WINDOWS,
+                                            ValuationHistoryStore, percentile_key)
+
+FIELDS = ("pe", "pb", "dividend_yield")
+
+
+def _weekdays(start, end):
+    day = date(start // 10000, start // 100 % 100, start % 100)
+    days = []
+    while True:
+        value = day.year * 10000 + day.month * 100 + day.day
+        if value > end:
+            return days
+        if day.weekday() < 5:
+            days.append(value)
+        day += timedelta(days=1)
+
+
+def _history(days, rng, missing=0.1):
+    """随机的列式历史，部分日期（节假日）全部字段缺失"""
+    history = {"trade_date": [str(day) for day in days]}
+    holidays = {day for day in days if rng.random() < missing}
+    for field in FIELDS:
+        history[field] = [math.nan if day in holidays else round(rng.uniform(1, 30), 2)
+                          for day in days]
+    return history
+
+
+def test_append_and_read_back(tmp_path):
+    store = ValuationHistoryStore(str(tmp_path))
+    assert store.latest_date("A") is None
+    assert store.append("A", "20240102", {"600000": {"pe": 5.0, "pb": 0.5, "dividend_yield": 6.0},
+                                          "000001": {"pe": 6.0}}) == 2
+    assert store.append("A", "2024-01-03", {"600000": {"pe": 5.1, "pb": 0.51},
+                                            "300750": {"pe": 20.0}}) == 2
+    assert store.latest_date("A") == "20240103"
+
+    history = store.get_history("600000", "A")
+    assert history["trade_date"] == ["20240102", "20240103"]
+    assert history["pe"] == [5.0, 5.1]
+    assert history["dividend_yield"][0] == 6.0 and math.isnan(history["dividend_yield"][1])
+    # 新股票只有加入之后的日期
+    assert store.get_history("000001", "A", fields=["pe"]) == {"trade_date": ["20240102"],
+                                                               "pe": [6.0]}
+    assert store.get_history("300750", "A", fields=["pe"]) == {"trade_date": ["20240103"],
+                                                               "pe": [20.0]}
+    assert store.get_history("999999", "A") == {}
+    assert store.get_history("600000", "HK") == {}
+
+    snapshot = store.get_snapshot("A", "20240103", fields=["pe"])
+    assert snapshot == {"600000": {"pe": 5.1}, "300750": {"pe": 20.0}}
+    assert store.get_snapshot("A", "20240104") == {}
+
+
+def test_reader_sees_symbols_added_by_another_writer(tmp_path):
+    writer = ValuationHistoryStore(str(tmp_path))
+    reader = ValuationHistoryStore(str(tmp_path))
+    writer.append("A", "20240102", {"600000": {"pe": 5.0}})
+    assert reader.get_snapshot("A", "20240102", fields=["pe"]) == {"600000": {"pe": 5.0}}
+
+    # 读取方已加载代码字典后，写入方追加新股票
+    writer.append("A", "20240103", {"600000": {"pe": 5.1}, "300750": {"pe": 20.0}})
+    assert reader.get_snapshot("A", "20240103", fields=["pe"]) == {"600000": {"pe": 5.1},
+                                                                  "300750": {"pe": 20.0}}
+    assert reader.get_history("300750", "A", fields=["pe"]) == {"trade_date": ["20240103"],
+                                                                "pe": [20.0]}
+    assert reader.percentiles("A", {"300750": {"pe": 30.0}}, windows=[3])["300750"]
+
+
+def test_interrupted_symbol_write_is_discarded(tmp_path):
+    store = ValuationHistoryStore(str(tmp_path))
+    store.append("A", "20240102", {"600000": {"pe": 5.0}})
+    # 模拟写入代码时中断，留下没有换行符的半行
+    with open(tmp_path / "A" / "symbols.txt", "a", encoding="utf-8") as f:
+        f.write("0000")
+
+    store = ValuationHistoryStore(str(tmp_path))
+    store.append("A", "20240103", {"000001": {"pe": 6.0}})
+    assert (tmp_path / "A" / "symbols.txt").read_text(encoding="utf-8") == "600000\n000001\n"
+    reader = ValuationHistoryStore(str(tmp_path))
+    assert reader.get_snapshot("A", "20240103", fields=["pe"]) == {"000001": {"pe": 6.0}}
+
+
+@pytest.mark.parametrize("trade_date, message", [
+    ("20240106", "不是工作日"),
+    ("20240102", "只能追加"),
+    ("20231229", "只能追加"),
+])
+def test_append_rejects_invalid_dates(tmp_path, trade_date, message):
+    store = ValuationHistoryStore(str(tmp_path))
+    store.append("A", "20240102", {"600000": {"pe": 5.0}})
+    with pytest.raises(ValueError, match=message):
+        store.append("A", trade_date, {"600000": {"pe": 5.0}})
+
+
+def test_backfill_range_reads_across_years(tmp_path):
+    rng = random.Random(1)
+    days = _weekdays(20211215, 20240131)
+    history = _history(days, rng)
+    store = ValuationHistoryStore(str(tmp_path))
+    assert store.backfill("A", [("600000", history), ("000001", {})]) == 1
+
+    for start, end in [(None, None), ("20211220", "20220110"), ("20230101", "20231231"),
+                       ("20240115", None), ("20250101", None)]:
+        lo = int(start) if start else 0
+        hi = int(end) if end else 99991231
+        expected = [(day, *(history[f][i] for f in FIELDS)) for i, day in enumerate(days)
+                    if lo <= day <= hi and not math.isnan(history["pe"][i])]
+        result = store.get_history("600000", "A", start, end)
+        rows = list(zip(map(int, result.get("trade_date", [])),
+                        *(result.get(f, []) for f in FIELDS)))
+        assert rows == expected, (start, end)
+
+    # 回填覆盖已有日期的值
+    store.backfill("A", [("600000", {"trade_date": ["20230103"], "pe": [99.0]})])
+    assert store.get_history("600000", "A", "20230103", "20230103")["pe"] == [99.0]
+
+
+def test_percentiles_match_brute_force(tmp_path):
+    rng = random.Random(5)
+    as_of = 20240628
+    days = _weekdays(20130101, as_of)
+    histories = {"600000": _history(days, rng),
+                 "000001": _history(days, rng, missing=0.6),
+                 # 只有两年历史，5年和10年窗口数据不足
+                 "300750": _history(_weekdays(20220701, as_of), rng)}
+    store = ValuationHistoryStore(str(tmp_path))
+    store.backfill("A", histories.items())
+
+    current = {"600000": {"pe": 12.0, "pb": 5.5, "dividend_yield": None},
+               "000001": {"pe": 3.0, "pb": 25.0, "dividend_yield": 15.0},
+               "300750": {"pe": 18.0, "pb": 1.0, "dividend_yield": 2.0},
+               "688001": {"pe": 10.0}}
+    result = store.percentiles("A", current)
+    assert set(result) == {"600000", "000001", "300750"}
+
+    for symbol, valuation in current.items():
+        if symbol not in histories:
+            continue
+        history = histories[symbol]
+        series = dict(zip(map(int, history["trade_date"]), zip(*(history[f] for f in FIELDS))))
+        for years in PERCENTILE_WINDOWS:
+            start = as_of - years * 10000
+            # 窗口不含起点当天
+            window = [day for day in _weekdays(start, as_of) if day > start]
+            for index, field in enumerate(FIELDS):
+                value = valuation.get(field)
+                values = [series[day][index] for day in window
+                          if day in series and not math.isnan(series[day][index])]
+                actual = result[symbol][percentile_key(field, years)]
+                if value is None or len(values) < len(window) * MIN_PERCENTILE_COVERAGE:
+                    assert math.isnan(actual), (symbol, field, years)
+                else:
+                    expected = sum(v < value for v in values) / len(values) * 100
+                    assert actual == pytest.approx(expected), (symbol, field, years)
+
+
+def test_data_manager_percentile_cache_follows_history_and_valuation(tmp_path):
+    from src.data_sources.data_manager import DataManager
+
+    manager = DataManager()
+    manager.history_store = ValuationHistoryStore(str(tmp_path))
+    symbol = manager.get_universe("A").column("symbol")[0]
+    valuation = {"pe": 10.0, "pb": 1.0, "dividend_yield": 3.0}
+    # 没有估值历史时的空结果会被缓存，回填历史后不能继续沿用
+    assert manager._valuation_percentiles({symbol: valuation}, "A") == {symbol: {}}
+    assert manager.backfill_valuation_history([symbol], "A", years=3) == 1
+
+    first = manager._valuation_percentiles({symbol: valuation}, "A")[symbol]
+    assert first and not math.isnan(first["pe_percentile_3y"])
+    # 估值变化后按新估值重新计算，而不是返回按旧估值缓存的分位
+    lowest = manager._valuation_percentiles({symbol: dict(valuation, pe=-1e9)}, "A")[symbol]
+    assert lowest["pe_percentile_3y"] == 0.0
+    assert manager._valuation_percentiles({symbol: valuation}, "A")[symbol] == first
+
+
+def test_record_valuation_snapshot_clears_cached_percentiles(tmp_path):
+    from src.data_sources.data_manager import DataManager
+
+    manager = DataManager()
+    manager.history_store = ValuationHistoryStore(str(tmp_path))
+    symbol = manager.get_universe("A").column("symbol")[0]
+    assert manager.get_valuation_percentiles([symbol], "A") == {symbol: {}}
+
+    assert manager.record_valuation_snapshot("A", "20240102") > 0
+    percentiles = manager.get_valuation_percentiles([symbol], "A")[symbol]
+    assert set(percentiles) == {percentile_key(f, y) for f in FIELDS for y in PERCENTILE_WINDOWS}
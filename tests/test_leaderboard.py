@@ -0,0 +1,80 @@
+"""排行榜前N与完整排序一致"""
+
+import random
+
+import pytest
+
+from src.analysis.leaderboard import Leaderboard, SortField, parse_sort_fields
+from src.analysis.result_set import AnalysisResult, ResultSet
+
+
+def _results(count, seed=3):
+    # 取值范围很小，保证大量相同的排序值；部分股息率缺失
+    rng = random.Random(seed)
+    return [
+        AnalysisResult(symbol=f"{i:06d}", market="A", name=f"股票{i}", analysis_date="2024-01-01",
+                       pe=float(rng.randint(5, 8)), pb=float(rng.randint(1, 3)), ps=1.0,
+                       dividend_yield=float("nan") if rng.random() < 0.2 else float(rng.randint(0, 3)),
+                       market_cap=1e9, overall_score=float(rng.choice([60, 75, 85])))
+        for i in range(count)
+    ]
+
+
+def _full_sort(results, fields):
+    """逐字段稳定排序（从最后一个字段开始），缺失值排在最后"""
+    ordered = list(results)
+    for field in reversed(fields):
+        def key(result, name=field.name, descending=field.descending):
+            value = getattr(result, name)
+            if value != value:
+                return (1, 0.0)
+            return (0, -value if descending else value)
+        ordered.sort(key=key)
+    return ordered
+
+
+@pytest.mark.parametrize("size", [1, 7, 50, 500])
+@pytest.mark.parametrize("by, tie_breaks", [
+    ("overall_score", ()),
+    ("overall_score", "pe:asc,dividend_yield"),
+    ("dividend_yield", "pb:asc"),
+    ("pe:asc", ["pb", SortField("dividend_yield", False)]),
+])
+def test_top_n_matches_full_sort(size, by, tie_breaks):
+    results = _results(300)
+    board = Leaderboard(size, by=by, tie_breaks=tie_breaks)
+    board.extend(results)
+
+    expected = _full_sort(results, board.fields)[:size]
+    assert [r.symbol for r in board.results()] == [r.symbol for r in expected]
+    assert len(board) == min(size, len(results))
+    assert board.seen == len(results)
+
+
+def test_push_reports_whether_result_entered():
+    board = Leaderboard(2)
+    low, mid, high, tie = _results(4)
+    low.overall_score, mid.overall_score, high.overall_score, tie.overall_score = 60, 75, 85, 75
+    assert board.push(low) and board.push(mid) and board.push(high)
+    # 与榜上最差的取值相同，但加入得晚，排在其后
+    assert not board.push(tie)
+    snapshot = board.snapshot(final=True)
+    assert [r.symbol for r in snapshot.results] == [high.symbol, mid.symbol]
+    assert snapshot.analyzed == 4 and snapshot.final
+
+
+def test_result_set_top_matches_sort():
+    results = ResultSet(_results(300))
+    for k in (1, 10, 300):
+        assert results.top(k).symbols() == results.sort()[:k].symbols()
+
+
+def test_parse_sort_fields():
+    assert parse_sort_fields("pe:asc, dividend_yield,") == (
+        SortField("pe", False), SortField("dividend_yield", True))
+    with pytest.raises(ValueError, match="排序方向"):
+        parse_sort_fields("pe:up")
+    with pytest.raises(ValueError, match="不支持的排序字段"):
+        parse_sort_fields("symbol")
+    with pytest.raises(ValueError):
+        Leaderboard(0)
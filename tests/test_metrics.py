@@ -0,0 +1,22 @@
+"""Prometheus文本格式的指标输出"""
+
+import math
+
+import pytest
+
+from src.utils.metrics import MetricsWriter
+
+
+@pytest.mark.parametrize("value, text", [
+    (3, "3"),
+    (2.0, "2"),
+    (0.25, "0.25"),
+    (True, "1"),
+    (math.inf, "+Inf"),
+    (-math.inf, "-Inf"),
+    (math.nan, "NaN"),
+])
+def test_sample_values(value, text):
+    writer = MetricsWriter()
+    writer.gauge("value", value, labels={"source": "tushare"})
+    assert f'gems_value{{source="tushare"}} {text}\n' in writer.render()
@@ -0,0 +1,124 @@
+"""报告目录：清单跳过、共用样式和单只报告渲染"""
+
+import dataclasses
+import json
+import os
+
+import pytest
+
+from src.analysis import report_directory
+from src.analysis.report_directory import (MANIFEST_FILENAME, report_filename,
+                                           write_report_directory)
+from src.analysis.report_template import (CSS_FILENAME, REPORT_CSS, SHARED_ASSETS,
+                                          render_stock_report)
+from src.analysis.result_set import AnalysisResult
+from src.analysis.scoring import Recommendation
+
+
+def _results(count=5):
+    return [
+        AnalysisResult(symbol=f"60000{i}", market="A", name=f"股票<{i}>", analysis_date="2024-01-02",
+                       pe=8.0 + i, pb=1.0, ps=2.0, dividend_yield=3.0, market_cap=1e10,
+                       overall_score=85.0, recommendation=Recommendation.BUY,
+                       reasons=["PE较低"], risks=["行业周期"])
+        for i in range(count)
+    ]
+
+
+def _mtimes(output_dir, results):
+    return {r.symbol: os.stat(os.path.join(output_dir, report_filename(r))).st_mtime_ns
+            for r in results}
+
+
+def test_unchanged_reports_are_skipped(tmp_path):
+    output_dir = str(tmp_path)
+    results = _results()
+    assert write_report_directory(results, output_dir, workers=1) == \
+        {"rendered": 5, "skipped": 0, "failed": 0}
+    with open(tmp_path / CSS_FILENAME, encoding="utf-8") as f:
+        assert f.read() == REPORT_CSS
+    with open(tmp_path / MANIFEST_FILENAME, encoding="utf-8") as f:
+        assert set(json.load(f)) == {report_filename(r) for r in results}
+
+    before = _mtimes(output_dir, results)
+    # 分析日期不同不算变化
+    later = [dataclasses.replace(r, analysis_date="2024-01-03") for r in results]
+    assert write_report_directory(later, output_dir, workers=1) == \
+        {"rendered": 0, "skipped": 5, "failed": 0}
+    assert _mtimes(output_dir, results) == before
+
+
+def test_changed_deleted_and_forced_reports_are_rendered(tmp_path):
+    output_dir = str(tmp_path)
+    results = _results()
+    write_report_directory(results, output_dir, workers=1)
+
+    results[0] = dataclasses.replace(results[0], overall_score=60.0,
+                                     recommendation=Recommendation.SELL)
+    os.remove(tmp_path / report_filename(results[1]))
+    assert write_report_directory(results, output_dir, workers=1) == \
+        {"rendered": 2, "skipped": 3, "failed": 0}
+    with open(tmp_path / report_filename(results[0]), encoding="utf-8") as f:
+        assert "总体评分: 60.0/100" in f.read()
+
+    assert write_report_directory(results, output_dir, workers=1, force=True) == \
+        {"rendered": 5, "skipped": 0, "failed": 0}
+
+
+def test_template_change_rerenders(tmp_path, monkeypatch):
+    output_dir = str(tmp_path)
+    write_report_directory(_results(), output_dir, workers=1)
+    monkeypatch.setattr(report_directory, "TEMPLATE_VERSION", "next")
+    assert write_report_directory(_results(), output_dir, workers=1)["rendered"] == 5
+
+
+def test_corrupt_manifest_rerenders_everything(tmp_path):
+    output_dir = str(tmp_path)
+    write_report_directory(_results(), output_dir, workers=1)
+    (tmp_path / MANIFEST_FILENAME).write_text("{not json", encoding="utf-8")
+    assert write_report_directory(_results(), output_dir, workers=1)["rendered"] == 5
+
+
+def test_process_pool_matches_single_process(tmp_path):
+    results = _results(7)
+    write_report_directory(results, str(tmp_path / "w1"), workers=1)
+    assert write_report_directory(results, str(tmp_path / "w2"), workers=2, chunk_size=3) == \
+        {"rendered": 7, "skipped": 0, "failed": 0}
+    for result in results:
+        name = report_filename(result)
+        assert (tmp_path / "w1" / name).read_text(encoding="utf-8") == \
+            (tmp_path / "w2" / name).read_text(encoding="utf-8")
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        write_report_directory([], str(tmp_path), workers=-1)
+    with pytest.raises(ValueError):
+        write_report_directory([], str(tmp_path), chunk_size=0)
+
+
+def test_stock_report_escapes_and_omits_empty_percentiles():
+    result = _results(1)[0]
+    html = render_stock_report(result, SHARED_ASSETS)
+    assert "股票&lt;0&gt;" in html and "股票<0>" not in html
+    assert SHARED_ASSETS in html and "<style>" not in html
+    assert "<div></div>" not in html and "分位" not in html
+
+    html = render_stock_report(dataclasses.replace(result, pe_percentile_5y=12.34))
+    assert "<style>" in html
+    assert "PE分位(3/5/10年): - / 12.3% / -" in html
+    assert "PB分位" not in html
+
+
+def test_batch_report_omits_empty_percentiles():
+    import io
+
+    from src.analysis.batch_report import write_batch_report
+
+    results = _results(2)
+    results[1] = dataclasses.replace(results[1], pb_percentile_10y=80.0)
+    file = io.StringIO()
+    assert write_batch_report(results, file) == 2
+    html = file.getvalue()
+    assert "<div></div>" not in html
+    assert html.count("PB分位(3/5/10年)") == 1
@@ -0,0 +1,109 @@
+"""增量分析的结果存储与输入指纹"""
+
+import pytest
+
+from src.analysis import result_store
+from src.analysis.result_set import AnalysisResult
+from src.analysis.result_store import ResultStore, input_fingerprint
+from src.analysis.scoring import Recommendation
+
+STOCK_INFO = {
+    "symbol": "600000",
+    "market": "A",
+    "basic_info": {"name": "浦发银行", "industry": "银行"},
+    "valuation": {"pe": 5.2, "pb": 0.45, "ps": 1.1, "dividend_yield": 5.6, "market_cap": 3e11},
+    "percentiles": {"pe_percentile_5y": 12.5},
+    "analysis_date": "2024-01-02 09:30:00",
+}
+
+
+def _result(**changes):
+    values = dict(symbol="600000", market="A", name="浦发银行", analysis_date="2024-01-02",
+                  pe=5.2, pb=0.45, ps=1.1, dividend_yield=5.6, market_cap=3e11,
+                  overall_score=85.0, recommendation=Recommendation.BUY,
+                  reasons=["PE较低"], risks=[], timings={"score": 0.1})
+    values.update(changes)
+    return AnalysisResult(**values)
+
+
+def test_fingerprint_ignores_fetch_time_and_key_order():
+    fingerprint = input_fingerprint(STOCK_INFO)
+    later = dict(STOCK_INFO, analysis_date="2024-06-30 15:00:00")
+    reordered = dict(STOCK_INFO, valuation=dict(reversed(list(STOCK_INFO["valuation"].items()))))
+    assert input_fingerprint(later) == fingerprint
+    assert input_fingerprint(reordered) == fingerprint
+
+
+@pytest.mark.parametrize("section, changes", [
+    ("valuation", {"pe": 5.3}),
+    ("basic_info", {"industry": "证券"}),
+    ("percentiles", {"pe_percentile_5y": 13.0}),
+])
+def test_fingerprint_changes_with_inputs(section, changes):
+    changed = dict(STOCK_INFO, **{section: dict(STOCK_INFO[section], **changes)})
+    assert input_fingerprint(changed) != input_fingerprint(STOCK_INFO)
+
+
+def test_fingerprint_changes_with_scoring_config(monkeypatch):
+    fingerprint = input_fingerprint(STOCK_INFO)
+    monkeypatch.setattr(result_store, "_SCORING_CONFIG", '{"version":"next"}')
+    assert input_fingerprint(STOCK_INFO) != fingerprint
+
+
+def test_store_round_trip_and_invalidation(tmp_path):
+    store = ResultStore(str(tmp_path))
+    result = _result()
+    store.put(result, "fp1")
+
+    loaded = ResultStore(str(tmp_path)).get("600000", "A", "fp1")
+    assert loaded is not None
+    assert loaded.recommendation is Recommendation.BUY
+    assert loaded.reasons == ["PE较低"]
+    # 阶段耗时不保存
+    assert loaded.timings is None
+    expected = result.to_dict()
+    expected.pop("timings")
+    assert loaded.to_dict() == expected
+
+    assert store.get("600000", "A", "fp2") is None
+    assert store.get("600000", "HK", "fp1") is None
+    store.put(_result(overall_score=60.0), "fp2")
+    assert store.get("600000", "A", "fp1") is None
+    assert store.get("600000", "A", "fp2").overall_score == 60.0
+
+    stats = store.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (1, 1, 3)
+    store.clear()
+    assert store.stats()["size"] == 0
+
+
+def test_analyzer_reuses_unchanged_results(tmp_path, monkeypatch):
+    from src.analysis.value_investing import ValueInvestingAnalyzer
+
+    monkeypatch.setenv("RESULT_STORE_DIR", str(tmp_path))
+    first = ValueInvestingAnalyzer(incremental=True)
+    symbol = first.data_manager.get_universe("A").column("symbol")[0]
+    original = first.analyze_stock(symbol, "A")
+    assert not first.is_reused(original)
+
+    second = ValueInvestingAnalyzer(incremental=True)
+    reused = second.analyze_stock(symbol, "A")
+    assert second.is_reused(reused)
+    assert reused.overall_score == original.overall_score
+    assert reused.recommendation is original.recommendation
+
+    # 估值变化后重新评分
+    get_stock_info = second.data_manager.get_stock_info
+
+    def changed_stock_info(*args, **kwargs):
+        info = get_stock_info(*args, **kwargs)
+        return dict(info, valuation=dict(info["valuation"], pe=info["valuation"]["pe"] + 1))
+
+    third = ValueInvestingAnalyzer(incremental=True)
+    third.data_manager.get_stock_info = changed_stock_info
+    assert not third.is_reused(third.analyze_stock(symbol, "A"))
+
+    # 同一分析器先沿用、后因输入变化重新评分时，不再报告为沿用
+    second.data_manager.get_stock_info = lambda *args, **kwargs: dict(
+        changed_stock_info(*args, **kwargs), basic_info={"name": "改名"})
+    assert not second.is_reused(second.analyze_stock(symbol, "A"))
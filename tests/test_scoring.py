@@ -0,0 +1,71 @@
+"""批量评分与单只评分一致性"""
+
+import math
+import random
+
+import pytest
+
+from src.analysis.scoring import (RECOMMENDATION_CODES, SCORE_TIERS, VALUATION_DEFAULTS,
+                                  columns_from_valuations, decode_recommendations,
+                                  score_batch, score_stock)
+
+# 档位边界及其两侧、缺失值和极端值
+EDGE_VALUES = [-1.0, 0.0, 1.4999, 1.5, 1.5001, 2.0, 2.9999, 3.0, 14.999, 15.0, 15.001,
+               19.999, 20.0, 29.999, 30.0, 30.001, 1e9, math.inf, -math.inf, math.nan]
+
+
+def _assert_matches_scalar(pe, pb):
+    batch = score_batch({"pe": pe, "pb": pb})
+    recommendations = decode_recommendations(batch["recommendation"])
+    for row, (p, b) in enumerate(zip(pe, pb)):
+        tier = score_stock(p, b)
+        assert SCORE_TIERS[batch["tier"][row]] is tier, (p, b)
+        assert batch["overall_score"][row] == tier.overall_score
+        assert recommendations[row] is tier.recommendation
+
+
+def test_score_batch_matches_scalar_on_tier_edges():
+    pairs = [(p, b) for p in EDGE_VALUES for b in EDGE_VALUES]
+    _assert_matches_scalar([p for p, _ in pairs], [b for _, b in pairs])
+
+
+def test_score_batch_matches_scalar_on_random_values():
+    rng = random.Random(7)
+    pe = [rng.uniform(-10, 60) for _ in range(5000)]
+    pb = [rng.uniform(-1, 6) for _ in range(5000)]
+    _assert_matches_scalar(pe, pb)
+
+
+def test_score_batch_fixed_scores_and_empty_input():
+    batch = score_batch({"pe": [10.0, 40.0], "pb": [1.0, 4.0]})
+    assert list(batch["valuation_score"]) == [75.0, 75.0]
+    assert list(batch["financial_score"]) == [80.0, 80.0]
+    assert list(batch["growth_score"]) == [70.0, 70.0]
+
+    empty = score_batch({"pe": [], "pb": []})
+    assert all(len(column) == 0 for column in empty.values())
+
+
+def test_score_batch_rejects_mismatched_columns():
+    with pytest.raises(ValueError):
+        score_batch({"pe": [10.0, 12.0], "pb": [1.0]})
+
+
+def test_columns_from_valuations_fills_defaults():
+    columns = columns_from_valuations([{"pe": 8.0}, {"pb": 0.9, "market_cap": 5e9}])
+    assert list(columns["pe"]) == [8.0, VALUATION_DEFAULTS["pe"]]
+    assert list(columns["pb"]) == [VALUATION_DEFAULTS["pb"], 0.9]
+    assert list(columns["market_cap"]) == [VALUATION_DEFAULTS["market_cap"], 5e9]
+
+
+def test_analyzer_results_match_score_universe():
+    from src.analysis.value_investing import ValueInvestingAnalyzer
+
+    analyzer = ValueInvestingAnalyzer()
+    universe = analyzer.data_manager.get_valuation_universe("A")
+    scores = analyzer.score_universe(universe)
+    codes = scores["recommendation"]
+    for row, symbol in enumerate(universe.column("symbol")[:200]):
+        result = analyzer.analyze_stock(symbol, "A")
+        assert result.overall_score == scores["overall_score"][row], symbol
+        assert result.recommendation is RECOMMENDATION_CODES[codes[row]], symbol
@@ -0,0 +1,108 @@
+"""全市场筛选表达式的解析与求值"""
+
+import pytest
+
+from src.analysis.screener import ScreenSyntaxError, parse_screen, screen_universe
+
+
+@pytest.fixture(scope="module")
+def universe():
+    from src.data_sources.data_manager import DataManager
+
+    return DataManager().get_valuation_universe("A")
+
+
+def _symbols(universe):
+    return sorted(universe.column("symbol"))
+
+
+def _brute_force(universe, predicate):
+    return sorted(record["symbol"] for record in universe if predicate(record))
+
+
+def test_parse_precedence():
+    assert repr(parse_screen("pe<15 or pb<1 and not dividend_yield>=4")) == \
+        "(pe<15.0 or (pb<1.0 and (not dividend_yield>=4.0)))"
+    assert repr(parse_screen("(pe<15 or pb<1) and industry==银行")) == \
+        "((pe<15.0 or pb<1.0) and industry=='银行')"
+    assert repr(parse_screen("pe = 10")) == "pe==10.0"
+
+
+@pytest.mark.parametrize("op, check", [
+    ("<", lambda v: v < 15), ("<=", lambda v: v <= 15), (">", lambda v: v > 15),
+    (">=", lambda v: v >= 15), ("==", lambda v: v == 15), ("!=", lambda v: v != 15),
+])
+def test_numeric_operators_match_brute_force(universe, op, check):
+    expected = _brute_force(universe, lambda r: check(r["pe"]))
+    assert _symbols(screen_universe(universe, f"pe{op}15")) == expected
+
+
+def test_combined_expression_matches_brute_force(universe):
+    industry = universe.column("industry")[0]
+    expression = f"(pe<15 and pb<1.5 or dividend_yield>4) and not industry=={industry}"
+    expected = _brute_force(universe, lambda r: (r["pe"] < 15 and r["pb"] < 1.5
+                                                 or r["dividend_yield"] > 4)
+                            and r["industry"] != industry)
+    assert _symbols(screen_universe(universe, expression)) == expected
+
+
+def test_symbol_and_categorical_equality(universe):
+    symbol = universe.column("symbol")[3]
+    assert _symbols(screen_universe(universe, f"symbol=={symbol}")) == [symbol]
+    assert symbol not in _symbols(screen_universe(universe, f"symbol!='{symbol}'"))
+    assert len(screen_universe(universe, "symbol==000000X")) == 0
+
+    industry = universe.column("industry")[0]
+    expected = _brute_force(universe, lambda r: r["industry"] == industry)
+    assert _symbols(screen_universe(universe, f"industry=='{industry}'")) == expected
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("", "筛选表达式为空"),
+    ("pe<15 and", "表达式语法错误"),
+    ("(pe<15", "表达式语法错误"),
+    ("pe<15)", "多余的内容"),
+    ("pe<<15", "表达式语法错误"),
+])
+def test_syntax_errors(expression, message):
+    with pytest.raises(ScreenSyntaxError, match=message):
+        parse_screen(expression)
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("roe<10", "未知的筛选字段: roe"),
+    ("roe==10", "未知的筛选字段: roe"),
+    ("pe<abc", "数值列pe只能与数字比较"),
+    ("industry<银行", "非数值列industry只支持==和!="),
+])
+def test_evaluation_errors(universe, expression, message):
+    with pytest.raises(ScreenSyntaxError, match=message):
+        screen_universe(universe, expression)
+
+
+def test_screen_fills_missing_valuations_with_defaults(universe, monkeypatch):
+    import json
+    import math
+    from array import array
+
+    from src.analysis.scoring import VALUATION_DEFAULTS, score_stock
+    from src.analysis.value_investing import ValueInvestingAnalyzer
+
+    # 第一只股票缺少pe和股息率，按analyze_stock的默认值评分
+    columns = {name: array("d", universe.column(name))
+               for name in ("pe", "pb", "ps", "dividend_yield", "market_cap")}
+    columns["pe"][0] = columns["dividend_yield"][0] = math.nan
+    columns["pb"][0] = 0.5
+    missing = universe.column("symbol")[0]
+    analyzer = ValueInvestingAnalyzer()
+    monkeypatch.setattr(analyzer.data_manager, "get_valuation_universe",
+                        lambda market: universe.with_columns(columns))
+
+    results = analyzer.screen("pb<1")
+    scores = [r.overall_score for r in results]
+    assert scores == sorted(scores, reverse=True)
+    result = next(r for r in results if r.symbol == missing)
+    assert (result.pe, result.dividend_yield) == (VALUATION_DEFAULTS["pe"],
+                                                  VALUATION_DEFAULTS["dividend_yield"])
+    assert result.overall_score == score_stock(VALUATION_DEFAULTS["pe"], 0.5).overall_score
+    json.dumps([r.to_dict() for r in results], allow_nan=False)
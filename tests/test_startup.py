@@ -0,0 +1,62 @@
+"""命令行启动：延迟导入
+
+导入耗时与机器有关，只在scripts/benchmark.py中按固定预算（IMPORT_BUDGET_MS）衡量；
+这里检查导入src.cli后哪些模块仍未加载，结果与机器快慢无关。
+"""
+
+import os
+import subprocess
+import sys
+
+from conftest import PROJECT_ROOT
+
+# 启动时不应导入的模块：数据源、估值历史、报告、结果存储，
+# 以及它们依赖的sqlite3/hashlib/mmap、网络和并发相关的标准库
+DEFERRED_MODULES = (
+    "sqlite3",
+    "hashlib",
+    "mmap",
+    "asyncio",
+    "concurrent.futures",
+    "multiprocessing",
+    "socket",
+    "ssl",
+    "http.client",
+    "http.server",
+    "urllib.request",
+    "src.data_sources.tushare_source",
+    "src.data_sources.akshare_source",
+    "src.data_sources.synthetic_source",
+    "src.data_sources.http_source",
+    "src.data_sources.stand_in_server",
+    "src.data_sources.history_store",
+    "src.utils.disk_cache",
+    "src.utils.rate_limiter",
+    "src.analysis.screener",
+    "src.analysis.result_store",
+    "src.analysis.batch_report",
+    "src.analysis.report_directory",
+    "src.analysis.report_template",
+)
+
+ENV = dict(os.environ, CACHE_DIR="")
+
+
+def _loaded_after(statement: str) -> list:
+    """在新的解释器中执行statement，返回其中已加载的延迟模块"""
+    code = (f"import sys; {statement}; "
+            f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=ENV,
+                            check=True, capture_output=True, text=True).stdout.strip()
+    return output.split(",") if output else []
+
+
+def test_cli_import_defers_heavy_modules():
+    assert _loaded_after("import src.cli") == []
+
+
+def test_package_exports_load_on_first_access():
+    assert _loaded_after("import src, src.analysis, src.data_sources, src.utils") == []
+    # 访问导出名时才导入所在模块
+    assert _loaded_after("import src.data_sources as d; d.ValuationHistoryStore") == [
+        "mmap", "src.data_sources.history_store"]